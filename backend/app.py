@@ -15,56 +15,239 @@ Routes:
     /api/optimize/description (POST) - Generates optimized description suggestions
     /api/optimize/tags (POST) - Generates optimized tag suggestions
     /api/optimize/thumbnail (POST) - Generates thumbnail optimization suggestions
+    /api/optimize/thumbnail/compare (POST) - Ranks 2-6 candidate thumbnails in one request
     /api/optimize/key-moments (POST) - Generates chapter suggestions
+    /api/optimize/all (POST) - Runs every optimizer, reusing results whose inputs are unchanged
+    /api/optimize/batch (POST) - Title or tag suggestions for many videos, several per completion
+    /api/tags/index (POST) - Fetches videos and adds their tags to the tag corpus
+    /api/tags/top (GET) - Most used tags in the corpus or a set of channels
+    /api/tags/co-occurring (GET) - Tags used together with a given tag
+    /api/tags/unused (GET) - High-value tags a channel or video does not use
+    /api/tags/complete (GET) - Tag prefix completions (no LLM call)
+    /api/tags/accept (POST) - Records AI tag suggestions an editor accepted
+    /api/transcripts/search (GET) - Ranked transcript passages (video, timestamp, snippet) matching a query
+    /api/jobs (POST) - Queues optimize/analyze tasks as background jobs
+    /api/jobs/<id> (GET) - Job status, progress and result
+    /api/jobs/<id>/events (GET) - Server-sent events with job progress until it finishes
+    /api/health (GET) - Liveness check (does not touch any service)
+    /api/health/upstreams (GET) - Circuit breaker state per upstream
+    /api/health/models (GET) - Model tier and budgets per optimization task
+    /api/health/admission (GET) - Admission control load and limits
+    /metrics (GET) - Prometheus-style stage latency histograms and token usage
+Services are created lazily on first use (see services/registry.py); use
+create_app(warm_up=True) or YTSALT_WARM_UP=1 to build them in the background at boot.
+POST routes that do work pass admission control first (see services/admission.py):
+a saturated backend answers 429 with Retry-After instead of queueing the request.
 Dependencies:
     - Flask
     - flask-cors
     - yt-dlp
     - youtube-transcript-api
 """
-from flask import Flask, request, jsonify, make_response
+import math
+import os
+import threading
+import time
+import json
+from collections import Counter
+from flask import Blueprint, Flask, Response, request, jsonify, make_response, g, stream_with_context
 from flask_cors import CORS
-from services.video_service import VideoService
-from services.transcript_service import TranscriptService
-from services.ai_service import AIService
-
-# Initialize the services
-video_service = VideoService()
-transcript_service = TranscriptService()
-ai_service = AIService()
-
-app = Flask(__name__)
-
-# Configure CORS with specific settings
-CORS(app, resources={
-    r"/api/*": {
-        "origins": ["http://localhost:5173"],
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": True
-    }
-})
+from services import admission, circuit_breaker, deadline, metrics, registry
+from services.logger import get_logger
+from services.tag_completer import transcript_ngrams
+
+log = get_logger('app')
+
+api = Blueprint('api', __name__)
+
+def create_app(warm_up=False):
+    """
+    Application factory.
+
+    Args:
+        warm_up (bool | callable): If True, construct the services and import their
+            heavy dependencies on a background thread right after boot. A callable is
+            run on that thread instead of the default warm-up.
+
+    Returns:
+        Flask: The configured application
+    """
+    app = Flask(__name__)
+
+    # Configure CORS with specific settings
+    CORS(app, resources={
+        r"/api/*": {
+            "origins": ["http://localhost:5173"],
+            "methods": ["GET", "POST", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Request-Deadline", "X-Client-Id",
+                              "X-Request-Priority"],
+            "expose_headers": ["Server-Timing", "Retry-After"],
+            "supports_credentials": True
+        }
+    })
+    app.register_blueprint(api)
+
+    if warm_up:
+        hook = warm_up if callable(warm_up) else registry.warm_up
+        threading.Thread(target=_run_warm_up, args=(hook,), name='ytsalt-warm-up', daemon=True).start()
+    # Pick up jobs queued or interrupted before a restart
+    threading.Thread(target=_resume_jobs, name='ytsalt-jobs-resume', daemon=True).start()
+    return app
+
+def _resume_jobs():
+    try:
+        registry.resume_jobs()
+    except Exception as e:
+        log.error("resume_jobs_failed", error=str(e))
+
+def _run_warm_up(hook):
+    started = time.perf_counter()
+    try:
+        hook()
+        log.info("warm_up_complete", duration_ms=round((time.perf_counter() - started) * 1000, 1))
+    except Exception as e:
+        log.error("warm_up_failed", error=str(e))
+
+@api.before_app_request
+def start_timing():
+    """Begin collecting stage timings for this request"""
+    g.request_started = time.perf_counter()
+    g.timing_token = metrics.start_request_timing()
+
+@api.before_app_request
+def start_deadline():
+    """
+    Start the request's end-to-end deadline: YTSALT_REQUEST_DEADLINE seconds, or
+    less if the client sends a shorter X-Request-Deadline (seconds)
+    """
+    seconds = deadline.default_seconds()
+    requested = request.headers.get('X-Request-Deadline', type=float)
+    if requested and requested > 0:
+        seconds = min(seconds, requested) if seconds > 0 else requested
+    g.deadline_token = deadline.start(seconds)
+
+# POST routes that only record or queue something and return at once
+_ADMISSION_EXEMPT = frozenset(('/api/jobs', '/api/tags/accept'))
+
+@api.before_app_request
+def admit_request():
+    """
+    Take an admission slot for a POST route that does work, or answer 429 with
+    Retry-After. Clients are told apart by X-Client-Id, else by address; batch
+    scripts should send X-Request-Priority: batch.
+    """
+    rule = request.url_rule.rule if request.url_rule is not None else None
+    if request.method != 'POST' or rule is None or rule in _ADMISSION_EXEMPT:
+        return None
+    controller = admission.get_controller()
+    if not controller.enabled:
+        return None
+    client = request.headers.get('X-Client-Id') or request.remote_addr or 'unknown'
+    priority = admission.priority_of(rule, request.headers.get('X-Request-Priority'))
+    try:
+        g.admission_ticket = controller.acquire(client, rule, priority)
+    except admission.AdmissionRejected as e:
+        retry_after = max(1, int(math.ceil(e.retry_after)))
+        response = jsonify({'error': str(e), 'reason': e.reason, 'retry_after': retry_after})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    return None
+
+@api.teardown_app_request
+def release_admission(exc=None):
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        ticket.release()
+
+@api.teardown_app_request
+def end_deadline(exc=None):
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        deadline.end(token)
+
+@api.after_app_request
+def add_server_timing(response):
+    """Expose the request's stage timings as a Server-Timing header"""
+    token = g.pop('timing_token', None)
+    if token is None:
+        return response
+    total = time.perf_counter() - g.pop('request_started')
+    timings = metrics.end_request_timing(token)
+    response.headers['Server-Timing'] = metrics.server_timing_header(timings, total)
+    response.headers['Timing-Allow-Origin'] = 'http://localhost:5173'
+    if request.url_rule is not None and request.method != 'OPTIONS':
+        metrics.registry.observe('ytsalt_http_request_duration_seconds', total,
+                                 route=request.url_rule.rule, status=str(response.status_code))
+    return response
+
+@api.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok'})
+
+@api.route('/api/health/upstreams', methods=['GET'])
+def upstream_health():
+    """Circuit breaker state per upstream; 'degraded' while any breaker is not closed"""
+    states = circuit_breaker.states()
+    degraded = any(state['state'] != circuit_breaker.CLOSED for state in states.values())
+    return jsonify({'status': 'degraded' if degraded else 'ok', 'upstreams': states})
+
+@api.route('/api/health/models', methods=['GET'])
+def model_routes():
+    """Model tiers and per-task routes in effect (see services/model_router.py)"""
+    from services import model_router
+    return jsonify(model_router.get_router().describe())
+
+@api.route('/api/health/admission', methods=['GET'])
+def admission_health():
+    """Requests running and waiting, and the admission limits in effect"""
+    return jsonify(admission.get_controller().snapshot())
+
+def _upstream_unavailable(e):
+    """503 for a request whose upstream breaker is open"""
+    response = jsonify({'error': str(e), 'upstream': e.upstream, 'retry_after': round(e.retry_after, 1)})
+    response.headers['Retry-After'] = str(max(1, int(e.retry_after + 0.5)))
+    return response, 503
+
+@api.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus-style exposition of stage histograms and token usage"""
+    response = make_response(metrics.registry.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
 
 def create_options_response():
     """Helper function to create OPTIONS response"""
     response = make_response()
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:5173')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+    response.headers.add('Access-Control-Allow-Headers',
+                         'Content-Type, Authorization, X-Request-Deadline, X-Client-Id, X-Request-Priority')
     response.headers.add('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
     response.headers.add('Access-Control-Max-Age', '3600')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
 
 # Add explicit OPTIONS handlers for active routes
-@app.route('/api/optimize/thumbnail', methods=['OPTIONS'])
+@api.route('/api/optimize/thumbnail', methods=['OPTIONS'])
 def thumbnail_options():
     return create_options_response()
 
-@app.route('/api/optimize/key-moments', methods=['OPTIONS'])
+@api.route('/api/optimize/key-moments', methods=['OPTIONS'])
 def key_moments_options():
     return create_options_response()
 
-@app.route('/api/video-info', methods=['POST', 'OPTIONS'])
+def _index_video(video_info):
+    """Feed fetched metadata into the tag corpus (and through it the tag completer) and the transcript index"""
+    registry.get_tag_index().add_video(video_info)
+    registry.get_transcript_index().add_video(video_info)
+
+def _index_transcript(video_id, text):
+    """Feed a transcript's recurring phrases to the tag completer, once per video"""
+    index = registry.get_tag_index()
+    key = f"transcript:{video_id}" if video_id else None
+    if key is None or not index.has_terms(key):
+        index.add_terms('transcript', transcript_ngrams(text or ''), key=key)
+
+@api.route('/api/video-info', methods=['POST', 'OPTIONS'])
 def fetch_video_info():
     if request.method == 'OPTIONS':
         return create_options_response()
@@ -73,15 +256,21 @@ def fetch_video_info():
         video_url = data.get('url')
         if not video_url:
             return jsonify({'error': 'No URL provided'}), 400
-        print(f"Processing URL: {video_url}")
-        video_info = video_service.get_video_info(video_url)
-        print("Successfully processed video")
+        log.info("fetch_video_info", url=video_url)
+        video_info = registry.get_video_service().get_video_info(video_url)
+        _index_video(video_info)
+        # Start the transcript/thumbnail work the user is about to ask for
+        prefetcher = registry.get_prefetcher()
+        if prefetcher is not None:
+            prefetcher.schedule(video_url, video_info)
         return jsonify(video_info)
+    except circuit_breaker.CircuitOpenError as e:
+        return _upstream_unavailable(e)
     except Exception as e:
-        print(f"Error processing request: {str(e)}")
+        log.error("fetch_video_info_failed", error=str(e))
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/transcript', methods=['POST', 'OPTIONS'])
+@api.route('/api/transcript', methods=['POST', 'OPTIONS'])
 def fetch_transcript():
     if request.method == 'OPTIONS':
         return create_options_response()
@@ -90,15 +279,18 @@ def fetch_transcript():
         video_url = data.get('url')
         if not video_url:
             return jsonify({'error': 'No URL provided'}), 400
-        print(f"Fetching transcript for URL: {video_url}")
+        log.info("fetch_transcript", url=video_url)
+        transcript_service = registry.get_transcript_service()
         transcript_data = transcript_service.get_transcript(video_url)
-        print("Successfully fetched transcript")
+        _index_transcript(transcript_service.extract_video_id(video_url), transcript_data.get('transcript'))
         return jsonify(transcript_data)
+    except circuit_breaker.CircuitOpenError as e:
+        return _upstream_unavailable(e)
     except Exception as e:
-        print(f"Error fetching transcript: {str(e)}")
+        log.error("fetch_transcript_failed", error=str(e))
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/optimize/title', methods=['POST', 'OPTIONS'])
+@api.route('/api/optimize/title', methods=['POST', 'OPTIONS'])
 def optimize_title():
     if request.method == 'OPTIONS':
         return create_options_response()
@@ -106,13 +298,13 @@ def optimize_title():
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
-        result = ai_service.optimize_title(data)
+        result = registry.get_ai_service().optimize_title(data)
         return jsonify(result)
     except Exception as e:
-        print(f"Error in optimize_title route: {str(e)}")
+        log.error("optimize_title_failed", error=str(e))
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/optimize/description', methods=['POST', 'OPTIONS'])
+@api.route('/api/optimize/description', methods=['POST', 'OPTIONS'])
 def optimize_description():
     if request.method == 'OPTIONS':
         return create_options_response()
@@ -120,13 +312,13 @@ def optimize_description():
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
-        result = ai_service.optimize_description(data)
+        result = registry.get_ai_service().optimize_description(data)
         return jsonify(result)
     except Exception as e:
-        print(f"Error in optimize_description route: {str(e)}")
+        log.error("optimize_description_failed", error=str(e))
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/optimize/tags', methods=['POST', 'OPTIONS'])
+@api.route('/api/optimize/tags', methods=['POST', 'OPTIONS'])
 def optimize_tags():
     if request.method == 'OPTIONS':
         return create_options_response()
@@ -134,13 +326,13 @@ def optimize_tags():
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
-        result = ai_service.optimize_tags(data)
+        result = registry.get_ai_service().optimize_tags(data)
         return jsonify(result)
     except Exception as e:
-        print(f"Error in optimize_tags route: {str(e)}")
+        log.error("optimize_tags_failed", error=str(e))
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/optimize/key-moments', methods=['POST', 'OPTIONS'])
+@api.route('/api/optimize/key-moments', methods=['POST', 'OPTIONS'])
 def generate_key_moments():
     if request.method == 'OPTIONS':
         return create_options_response()
@@ -151,16 +343,16 @@ def generate_key_moments():
                 "success": False,
                 "error": "Missing transcript data"
             }), 400
-        result = ai_service.generate_key_moments(data)
+        result = registry.get_ai_service().generate_key_moments(data)
         return jsonify(result)
     except Exception as e:
-        print(f"Error generating key moments: {str(e)}")
+        log.error("generate_key_moments_failed", error=str(e))
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
-@app.route('/api/optimize/thumbnail', methods=['POST', 'OPTIONS'])
+@api.route('/api/optimize/thumbnail', methods=['POST', 'OPTIONS'])
 def optimize_thumbnail():
     if request.method == 'OPTIONS':
         return create_options_response()
@@ -168,16 +360,261 @@ def optimize_thumbnail():
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
-        print("Received data for thumbnail optimization:", data)
-        result = ai_service.optimize_thumbnail(data)
-        print("Thumbnail optimization result:", result)
+        log.payload("thumbnail_request", payload=data)
+        result = registry.get_ai_service().optimize_thumbnail(data)
+        log.payload("thumbnail_result", result=result)
+        return jsonify(result)
+    except Exception as e:
+        log.error("optimize_thumbnail_failed", error=str(e))
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+def _thumbnail_candidates():
+    """Video metadata and thumbnail candidates from a JSON or multipart/form-data request"""
+    if request.files or request.form:
+        form = request.form
+        video_data = {key: form[key] for key in ('title', 'description', 'video_id') if form.get(key)}
+        video_data['tags'] = [tag.strip() for value in form.getlist('tags') for tag in value.split(',')
+                              if tag.strip()]
+        candidates = [{'url': url} for url in form.getlist('urls') if url]
+        candidates += [{'image': upload.read(), 'name': upload.filename}
+                       for upload in request.files.getlist('images')]
+        return video_data, candidates
+    data = request.get_json(silent=True) or {}
+    return data, data.get('candidates')
+
+@api.route('/api/optimize/thumbnail/compare', methods=['POST', 'OPTIONS'])
+def compare_thumbnails():
+    if request.method == 'OPTIONS':
+        return create_options_response()
+    try:
+        video_data, candidates = _thumbnail_candidates()
+        if not candidates:
+            return jsonify({"error": "No thumbnail candidates provided"}), 400
+        log.info("thumbnail_compare_request", candidates=len(candidates))
+        result = registry.get_ai_service().compare_thumbnails(video_data, candidates)
+        log.payload("thumbnail_compare_result", result=result)
         return jsonify(result)
     except Exception as e:
-        print(f"Error in thumbnail optimization route: {str(e)}")
+        log.error("compare_thumbnails_failed", error=str(e))
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@api.route('/api/optimize/all', methods=['POST', 'OPTIONS'])
+def optimize_all():
+    if request.method == 'OPTIONS':
+        return create_options_response()
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+        tasks = data.get('tasks')
+        if tasks is not None and not isinstance(tasks, list):
+            return jsonify({"error": "tasks must be a list"}), 400
+        result = registry.get_ai_service().optimize_all(data, tasks)
+        log.info("optimize_all", reused=result['reused'], recomputed=result['recomputed'],
+                 failed=result['failed'])
+        return jsonify(result)
+    except Exception as e:
+        log.error("optimize_all_failed", error=str(e))
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@api.route('/api/optimize/batch', methods=['POST', 'OPTIONS'])
+def optimize_batch():
+    if request.method == 'OPTIONS':
+        return create_options_response()
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+        result = registry.get_ai_service().optimize_batch(data.get('task'), data.get('videos'))
+        if 'results' not in result:
+            return jsonify(result), 400
+        log.info("optimize_batch", task=result['task'], videos=len(result['results']),
+                 batches=result['batches'], retried=result['retried'], failed=result['failed'])
+        return jsonify(result)
+    except Exception as e:
+        log.error("optimize_batch_failed", error=str(e))
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+def _limit_arg(default=20, maximum=500):
+    return max(1, min(request.args.get('limit', default, type=int), maximum))
+
+@api.route('/api/tags/index', methods=['POST', 'OPTIONS'])
+def index_tags():
+    if request.method == 'OPTIONS':
+        return create_options_response()
+    try:
+        data = request.get_json()
+        urls = (data or {}).get('urls')
+        if not urls or not isinstance(urls, list):
+            return jsonify({'error': 'No URLs provided'}), 400
+        results = registry.get_video_service().get_video_info_many(urls)
+        for video_info in results:
+            _index_video(video_info)
+        index = registry.get_tag_index()
+        index.save_if_dirty()
+        return jsonify({
+            'indexed': sum(1 for item in results if not item.get('error')),
+            'failed': [item for item in results if item.get('error')],
+            'corpus': index.summary()
+        })
+    except Exception as e:
+        log.error("index_tags_failed", error=str(e))
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/api/tags/top', methods=['GET'])
+def top_tags():
+    index = registry.get_tag_index()
+    return jsonify({
+        'tags': index.top_tags(limit=_limit_arg(), channels=request.args.getlist('channel')),
+        'corpus': index.summary()
+    })
+
+@api.route('/api/tags/co-occurring', methods=['GET'])
+def co_occurring_tags():
+    tag = request.args.get('tag')
+    if not tag:
+        return jsonify({'error': 'No tag provided'}), 400
+    return jsonify({
+        'tag': tag,
+        'tags': registry.get_tag_index().co_occurring(
+            tag, limit=_limit_arg(), channels=request.args.getlist('channel'))
+    })
+
+@api.route('/api/tags/unused', methods=['GET'])
+def unused_tags():
+    channel = request.args.get('channel')
+    used_tags = request.args.getlist('tag')
+    if not channel and not used_tags:
+        return jsonify({'error': 'Provide a channel or at least one tag'}), 400
+    return jsonify({
+        'tags': registry.get_tag_index().unused_high_value(
+            limit=_limit_arg(), channel=channel, used_tags=used_tags,
+            reference_channels=request.args.getlist('reference'))
+    })
+
+@api.route('/api/tags/complete', methods=['GET'])
+def complete_tags():
+    prefix = request.args.get('prefix', '')
+    if not prefix.strip():
+        return jsonify({'prefix': prefix, 'completions': []})
+    return jsonify({
+        'prefix': prefix,
+        'completions': registry.get_tag_completer().complete(prefix, limit=_limit_arg(default=10))
+    })
+
+@api.route('/api/tags/accept', methods=['POST', 'OPTIONS'])
+def accept_tags():
+    if request.method == 'OPTIONS':
+        return create_options_response()
+    data = request.get_json()
+    tags = (data or {}).get('tags')
+    if not tags or not isinstance(tags, list):
+        return jsonify({'error': 'No tags provided'}), 400
+    registry.get_tag_index().add_terms('accepted', Counter(str(tag) for tag in tags))
+    return jsonify({'accepted': len(tags)})
+
+@api.route('/api/transcripts/search', methods=['GET'])
+def search_transcripts():
+    """
+    Transcript passages matching q, best first. Optional: limit, offset,
+    video_id and channel (repeatable), per_video (hits per video cap).
+    """
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'error': 'No query provided'}), 400
+    index = registry.get_transcript_index()
+    hits = index.search(query, limit=_limit_arg(), offset=max(0, request.args.get('offset', 0, type=int)),
+                        video_ids=request.args.getlist('video_id'), channels=request.args.getlist('channel'),
+                        per_video=request.args.get('per_video', 0, type=int))
+    return jsonify({'query': query, 'hits': hits, 'index': index.summary()})
+
+@api.route('/api/jobs', methods=['POST', 'OPTIONS'])
+def submit_jobs():
+    """
+    Queue a job: {"task": "title", "data": {...}}, or one job per item:
+    {"task": "optimize_url", "items": [{"url": ...}, ...]}. Optional: priority, max_attempts.
+    """
+    if request.method == 'OPTIONS':
+        return create_options_response()
+    data = request.get_json(silent=True) or {}
+    task = data.get('task')
+    items = data.get('items') if 'items' in data else [data.get('data')]
+    if not task:
+        return jsonify({'error': 'No task provided'}), 400
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'Provide data (an object) or items (a list of objects)'}), 400
+    queue = registry.get_job_queue()
+    try:
+        jobs = [queue.submit(task, item, priority=data.get('priority', 0), max_attempts=data.get('max_attempts'))
+                for item in items]
+    except ValueError as e:
+        return jsonify({'error': str(e), 'tasks': sorted(queue.handlers)}), 400
+    log.info("jobs_submitted", task=task, count=len(jobs))
+    if 'items' in data:
+        return jsonify({'jobs': jobs}), 202
+    response = jsonify(jobs[0])
+    response.headers['Location'] = f"/api/jobs/{jobs[0]['id']}"
+    return response, 202
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = registry.get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@api.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-sent events for one job: a 'progress' event for every change and a
+    final 'done' event with the result. Comment lines keep idle connections open.
+    """
+    from services import job_queue
+    queue = registry.get_job_queue()
+    if queue.version(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    poll = float(os.getenv('YTSALT_JOB_EVENTS_POLL', '0.5'))
+    limit = time.monotonic() + float(os.getenv('YTSALT_JOB_EVENTS_TIMEOUT', '300'))
+
+    def events():
+        seen = None
+        idle = 0.0
+        while time.monotonic() < limit:
+            version = queue.version(job_id)
+            if version is None:
+                return
+            if version != seen:
+                seen = version
+                idle = 0.0
+                job = queue.get(job_id, include_result=False)
+                if job['status'] in job_queue.FINISHED:
+                    yield f"event: done\ndata: {json.dumps(queue.get(job_id))}\n\n"
+                    return
+                yield f"event: progress\ndata: {json.dumps(job)}\n\n"
+            elif idle >= 15:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            time.sleep(poll)
+            idle += poll
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+app = create_app(warm_up=os.getenv('YTSALT_WARM_UP') == '1')
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+ytSALT Extraction Throughput Benchmark
+Measures batch metadata extraction (VideoService.get_video_info_many) with the
+default thread execution and with the process pool, for 1..N workers.
+
+yt-dlp is replaced by the benchmark stub, which spends --cpu seconds of CPU time
+(regex + JSON, holding the GIL like yt-dlp's page parsing) and --io seconds of
+sleep per video. Threads only help with the sleep; the process pool also
+spreads the CPU part across cores.
+
+Usage (from the backend directory):
+    python benchmarks/extraction.py --videos 64 --cpu 0.05 --io 0.1 --max-workers 8
+
+Version: 1.0.0
+License: MIT
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import StubConfig, install_stub_modules_from_env  # noqa: E402
+
+
+def measure(execution, workers, urls):
+    from services.video_service import VideoService
+
+    service = VideoService(execution=execution, workers=workers,
+                           worker_setup=install_stub_modules_from_env)
+    try:
+        service.warm_up()
+        started = time.perf_counter()
+        results = service.get_video_info_many(urls)
+        elapsed = time.perf_counter() - started
+    finally:
+        service.shutdown()
+    errors = sum(1 for result in results if 'error' in result)
+    return len(urls) / elapsed, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark batch yt-dlp extraction')
+    parser.add_argument('--videos', type=int, default=64)
+    parser.add_argument('--cpu', type=float, default=0.05, help='CPU seconds per extraction')
+    parser.add_argument('--io', type=float, default=0.1, help='Network wait seconds per extraction')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--modes', default='thread,process')
+    args = parser.parse_args(argv)
+
+    config = StubConfig(ytdlp_latency=args.io, ytdlp_cpu=args.cpu, jitter=0.0)
+    os.environ.update(config.to_env())
+    install_stub_modules_from_env()
+
+    urls = [f"https://www.youtube.com/watch?v=bench{i:07d}" for i in range(args.videos)]
+    worker_counts = sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+
+    print(f"{args.videos} videos, {args.cpu * 1000:.0f} ms CPU + {args.io * 1000:.0f} ms I/O each, "
+          f"{os.cpu_count()} CPU(s)")
+    print(f"{'mode':<10}{'workers':>8}{'videos/s':>12}{'speedup':>10}{'errors':>8}")
+    for mode in args.modes.split(','):
+        baseline = None
+        for workers in worker_counts:
+            rate, errors = measure(mode, workers, urls)
+            baseline = baseline or rate
+            print(f"{mode:<10}{workers:>8}{rate:>12.1f}{rate / baseline:>9.2f}x{errors:>8}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+ytSALT Load-Test Harness
+Drives realistic user flows against the Flask API at increasing concurrency and
+reports throughput, latency percentiles and error rate per route.
+
+Each virtual user repeatedly runs the flow the frontend performs for one video:
+video-info -> transcript -> title, description, tags, thumbnail and key-moments
+optimizations. All upstreams are stubbed (see benchmarks/stubs.py) with
+configurable latency, so results reflect the backend alone.
+
+Every flow uses a video no earlier flow has seen and sends force_refresh to the
+optimizers, so the transcript cache and the result store do not turn flows into
+cache hits. Pass --warm to draw videos from a fixed set of --videos instead and
+let the caches serve repeats. With --cassettes, the recorded videos are taken in
+turn, so transcripts repeat once every video has been used. The tag index, transcript index and job database
+go to a temporary directory, never to backend/data.
+
+By default the app is booted in-process on a threaded WSGI server. Pass --target
+to drive an already running server instead (for example gunicorn serving
+benchmarks.stubbed_app, pointed at the upstream stub started with --upstream-only).
+
+With --cassettes, upstream responses come from recorded cassettes (see
+services/cassette.py) instead of the stubs: real metadata, transcripts,
+thumbnails and completions, replayed with their recorded latency (scaled by
+--cassette-latency-scale) and no network. Record them once with --record, which
+runs one flow per --urls entry against the live upstreams (or against the stubs
+without --live).
+
+Usage (from the backend directory):
+    python benchmarks/loadtest.py --concurrency 1,4,16,32 --duration 20
+    python benchmarks/loadtest.py --openai-latency 3 --json results.json
+    python benchmarks/loadtest.py --cassettes data/cassettes --record --live --urls URL1,URL2
+    python benchmarks/loadtest.py --cassettes data/cassettes --concurrency 4,16
+
+Version: 1.0.0
+License: MIT
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import requests  # noqa: E402
+
+from benchmarks.stubs import StubConfig, StubUpstreamServer, install_stub_modules, use_temp_data_dir  # noqa: E402
+
+FLOW_ROUTES = (
+    '/api/video-info',
+    '/api/transcript',
+    '/api/optimize/title',
+    '/api/optimize/description',
+    '/api/optimize/tags',
+    '/api/optimize/thumbnail',
+    '/api/optimize/key-moments',
+)
+
+
+class Recorder:
+    """Thread-safe collector of (route, latency, ok) samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []
+        self.flows = 0
+
+    def record(self, route: str, latency: float, ok: bool):
+        with self._lock:
+            self.samples.append((route, latency, ok))
+
+    def flow_done(self):
+        with self._lock:
+            self.flows += 1
+
+
+def _post(session, base_url, route, payload, recorder, timeout):
+    started = time.perf_counter()
+    try:
+        response = session.post(base_url + route, json=payload, timeout=timeout)
+        body = response.json()
+        ok = response.status_code < 400 and body.get('success', True) is not False
+    except Exception:
+        body, ok = {}, False
+    recorder.record(route, time.perf_counter() - started, ok)
+    return body if ok else None
+
+
+def run_flow(session, base_url: str, video_url: str, recorder: Recorder, timeout: float,
+             force_refresh: bool = False):
+    """
+    Run one info -> transcript -> five optimizations flow for a video
+    (force_refresh makes the optimizers bypass their stored results)
+
+    Returns:
+        bool: True if every step succeeded
+    """
+    info = _post(session, base_url, '/api/video-info', {'url': video_url}, recorder, timeout)
+    if info is None:
+        return False
+    transcript = _post(session, base_url, '/api/transcript', {'url': video_url}, recorder, timeout)
+    if transcript is None:
+        return False
+
+    video_data = {
+        'title': info.get('title', ''),
+        'description': info.get('description', ''),
+        'tags': info.get('tags', []),
+        'thumbnail_url': info.get('thumbnail_url'),
+    }
+    if force_refresh:
+        video_data['force_refresh'] = True
+    full_text = transcript.get('transcript', '')
+    steps = (
+        ('/api/optimize/title', video_data),
+        ('/api/optimize/description', video_data),
+        ('/api/optimize/tags', dict(video_data, transcript_data={'full_text': full_text})),
+        ('/api/optimize/thumbnail', video_data),
+        ('/api/optimize/key-moments', dict(video_data, transcript_data={'full_text': full_text})),
+    )
+    ok = True
+    for route, payload in steps:
+        ok = _post(session, base_url, route, payload, recorder, timeout) is not None and ok
+    return ok
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    """Aggregate samples into per-route throughput, latency percentiles and error rate"""
+    by_route = defaultdict(list)
+    errors = defaultdict(int)
+    for route, latency, ok in recorder.samples:
+        by_route[route].append(latency)
+        if not ok:
+            errors[route] += 1
+
+    routes = {}
+    for route in FLOW_ROUTES:
+        latencies = sorted(by_route.get(route, []))
+        count = len(latencies)
+        routes[route] = {
+            'requests': count,
+            'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(_percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(_percentile(latencies, 99) * 1000, 1),
+            'error_rate': round(errors[route] / count, 4) if count else 0.0,
+        }
+
+    total = len(recorder.samples)
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'flows': recorder.flows,
+        'flows_per_s': round(recorder.flows / elapsed, 2) if elapsed else 0.0,
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(sum(errors.values()) / total, 4) if total else 0.0,
+        'routes': routes,
+    }
+
+
+def run_level(base_url: str, concurrency: int, duration: float, video_urls: list,
+              timeout: float, warm: bool = False) -> dict:
+    """
+    Run `concurrency` virtual users for `duration` seconds and summarize the results.
+    Without warm, each flow takes a fresh video (generated when video_urls is None,
+    else the next one in turn) and sends force_refresh.
+    """
+    unique = itertools.count()
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def user(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        # One admission-control client per virtual user, as for real browsers
+        session.headers['X-Client-Id'] = f'loadtest-{seed}'
+        while time.perf_counter() < deadline:
+            if warm:
+                video_url = rng.choice(video_urls)
+            elif video_urls is None:
+                video_url = f"https://www.youtube.com/watch?v=load{concurrency}x{next(unique):07d}"
+            else:
+                video_url = video_urls[next(unique) % len(video_urls)]
+            run_flow(session, base_url, video_url, recorder, timeout, force_refresh=not warm)
+            recorder.flow_done()
+        session.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = summarize(recorder, time.perf_counter() - started)
+    result['concurrency'] = concurrency
+    return result
+
+
+def boot_in_process(config: StubConfig, stubs: bool = True):
+    """
+    Start the upstream stub, install stub modules and serve the app on a threaded
+    WSGI server in this process.
+
+    Args:
+        config (StubConfig): Stub latencies
+        stubs (bool): False leaves the upstreams alone (live, or replayed cassettes)
+
+    Returns:
+        tuple: (base_url, upstream_server, wsgi_server)
+    """
+    import logging
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    use_temp_data_dir()
+    upstream = None
+    if stubs:
+        upstream = StubUpstreamServer(config).start()
+        os.environ.setdefault('OPENAI_API_KEY', 'stub-key')
+        os.environ['OPENAI_BASE_URL'] = f"{upstream.base_url}/v1"
+        install_stub_modules(config, upstream.base_url)
+    elif os.getenv('YTSALT_CASSETTE') == 'replay':
+        # Nothing reaches OpenAI, but the client still wants a key
+        os.environ.setdefault('OPENAI_API_KEY', 'replay-key')
+
+    from app import app
+    from services import registry
+
+    # Pay the deferred imports up front so the first level is not skewed by cold start
+    registry.warm_up()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", upstream, server
+
+
+def format_report(result: dict) -> str:
+    lines = [
+        f"concurrency={result['concurrency']}  flows/s={result['flows_per_s']}  "
+        f"req/s={result['throughput_rps']}  errors={result['error_rate']:.2%}",
+        f"  {'route':<28}{'reqs':>7}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err':>8}",
+    ]
+    for route, stats in result['routes'].items():
+        lines.append(
+            f"  {route:<28}{stats['requests']:>7}{stats['throughput_rps']:>8}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+            f"{stats['error_rate']:>8.2%}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the ytSALT API with stubbed upstreams')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32',
+                        help='Comma-separated concurrency levels to step through')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per concurrency level')
+    parser.add_argument('--videos', type=int, default=200, help='Number of distinct stub video ids with --warm')
+    parser.add_argument('--warm', action='store_true',
+                        help='Reuse --videos videos without force_refresh, so caches serve repeat flows')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Client-side request timeout')
+    parser.add_argument('--target', help='Base URL of an already running server')
+    parser.add_argument('--upstream-only', action='store_true',
+                        help='Only run the upstream stub server (for use with --target servers)')
+    parser.add_argument('--upstream-port', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='Write all results to this JSON file')
+    parser.add_argument('--cassettes', help='Replay upstream responses from this cassette directory')
+    parser.add_argument('--record', action='store_true',
+                        help='Record cassettes: run one flow per --urls entry and exit')
+    parser.add_argument('--live', action='store_true', help='With --record, call the real upstreams')
+    parser.add_argument('--urls', help='Comma-separated video URLs to record')
+    parser.add_argument('--cassette-latency-scale', type=float, default=1.0,
+                        help='Multiplier for recorded latencies on replay (0 replays instantly)')
+    defaults = StubConfig.from_env()
+    for field in StubConfig.FIELDS:
+        parser.add_argument('--' + field.replace('_', '-'), type=float,
+                            default=getattr(defaults, field))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = StubConfig(**{field: getattr(args, field) for field in StubConfig.FIELDS})
+
+    if args.upstream_only:
+        upstream = StubUpstreamServer(config, port=args.upstream_port).start()
+        print(f"Upstream stub listening on {upstream.base_url}")
+        print('Serve the app with:')
+        print(' '.join(f"{k}={v}" for k, v in config.to_env().items()) +
+              f" STUB_UPSTREAM_URL={upstream.base_url} gunicorn benchmarks.stubbed_app:app")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            upstream.stop()
+        return
+
+    video_urls = [f"https://www.youtube.com/watch?v=stub{number:07d}" for number in range(args.videos)]
+    if not args.warm and not args.cassettes:
+        video_urls = None
+    stubs = True
+    if args.cassettes:
+        os.environ['YTSALT_CASSETTE_DIR'] = os.path.abspath(args.cassettes)
+        os.environ['YTSALT_CASSETTE'] = 'record' if args.record else 'replay'
+        os.environ['YTSALT_CASSETTE_LATENCY_SCALE'] = str(args.cassette_latency_scale)
+        stubs = args.record and not args.live
+        if args.urls:
+            video_urls = [url.strip() for url in args.urls.split(',') if url.strip()]
+        if not args.record:
+            from services import cassette
+            video_urls = cassette.recorded_keys('ytdlp')
+            if not video_urls:
+                sys.exit(f"No recorded videos in {args.cassettes}")
+
+    if args.target:
+        base_url, upstream, server = args.target.rstrip('/'), None, None
+    else:
+        base_url, upstream, server = boot_in_process(config, stubs=stubs)
+
+    if args.record:
+        recorder = Recorder()
+        try:
+            for video_url in video_urls:
+                ok = run_flow(requests.Session(), base_url, video_url, recorder, args.timeout)
+                print(f"{'recorded' if ok else 'FAILED  '} {video_url}", flush=True)
+        finally:
+            if server is not None:
+                server.shutdown()
+            if upstream is not None:
+                upstream.stop()
+        return
+
+    results = []
+    try:
+        for level in (int(c) for c in args.concurrency.split(',') if c.strip()):
+            result = run_level(base_url, level, args.duration, video_urls, args.timeout, warm=args.warm)
+            results.append(result)
+            print(format_report(result), flush=True)
+    finally:
+        if server is not None:
+            server.shutdown()
+        if upstream is not None:
+            upstream.stop()
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'stubs': vars(config), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+ytSALT Cold-Start Benchmark
+Measures how long a fresh interpreter takes to import app.py and to answer its
+first /api/health request, and checks both against the checked-in budget in
+benchmarks/startup_budget.json.
+
+Import time comes from `python -X importtime -c "import app"` (cumulative
+microseconds of the top-level `app` module). The same run verifies that the
+modules listed under "deferred_modules" are not imported at startup.
+
+Each measurement runs in a fresh subprocess; the median of --runs is reported.
+Exits with status 1 when any budget is exceeded, so it can gate CI.
+
+Usage (from the backend directory):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 9 --top 15
+
+Version: 1.0.0
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+FIRST_REQUEST_SNIPPET = """
+import time
+started = time.perf_counter()
+from app import create_app
+client = create_app().test_client()
+assert client.get('/api/health').status_code == 200
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _child_env():
+    env = dict(os.environ)
+    env.setdefault('OPENAI_API_KEY', 'startup-benchmark')
+    env.pop('YTSALT_WARM_UP', None)
+    return env
+
+
+def measure_import():
+    """
+    Import app.py once under -X importtime
+
+    Returns:
+        tuple: (total_ms, {module: cumulative_ms}) for the fresh interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR, env=_child_env(), capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        modules[name.strip()] = int(cumulative) / 1000.0
+    return modules.get('app', 0.0), modules
+
+
+def measure_first_request():
+    """Returns milliseconds from interpreter start of import to first /api/health response"""
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_REQUEST_SNIPPET],
+        cwd=BACKEND_DIR, env=_child_env(), capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check app.py cold start against the budget')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Show the N slowest top-level imports')
+    args = parser.parse_args(argv)
+
+    with open(BUDGET_PATH) as f:
+        budget = json.load(f)
+
+    import_times, first_request_times = [], []
+    modules = {}
+    for _ in range(args.runs):
+        total, modules = measure_import()
+        import_times.append(total)
+        first_request_times.append(measure_first_request())
+
+    import_ms = statistics.median(import_times)
+    first_request_ms = statistics.median(first_request_times)
+    eagerly_imported = [name for name in budget.get('deferred_modules', []) if name in modules]
+
+    print(f"import app:           {import_ms:8.1f} ms  (budget {budget['import_app_ms']} ms)")
+    print(f"first /api/health:    {first_request_ms:8.1f} ms  (budget {budget['first_health_request_ms']} ms)")
+    top_level = sorted(
+        ((ms, name) for name, ms in modules.items() if '.' not in name and name != 'app'),
+        reverse=True)[:args.top]
+    print('slowest top-level imports (last run):')
+    for ms, name in top_level:
+        print(f"  {name:<30}{ms:8.1f} ms")
+
+    failures = []
+    if import_ms > budget['import_app_ms']:
+        failures.append(f"import app took {import_ms:.1f} ms > {budget['import_app_ms']} ms")
+    if first_request_ms > budget['first_health_request_ms']:
+        failures.append(
+            f"first request took {first_request_ms:.1f} ms > {budget['first_health_request_ms']} ms")
+    if eagerly_imported:
+        failures.append(f"deferred modules imported at startup: {', '.join(eagerly_imported)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print('OK: within startup budget')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+ytSALT Stubbed Application Module
+WSGI entry point that serves the real Flask app with yt-dlp and the transcript API
+replaced by latency-configurable stubs. Thumbnail and OpenAI traffic is sent to the
+stub upstream server started by the load-test driver. The tag index, transcript
+index and job database live in a temporary directory (see use_temp_data_dir).
+
+Environment:
+    STUB_UPSTREAM_URL - Base URL of the running StubUpstreamServer (required)
+    STUB_YTDLP_LATENCY, STUB_TRANSCRIPT_LATENCY, STUB_JITTER - see StubConfig
+
+Usage (from the backend directory):
+    STUB_UPSTREAM_URL=http://127.0.0.1:8900 gunicorn benchmarks.stubbed_app:app
+
+Version: 1.0.0
+License: MIT
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubConfig, install_stub_modules, use_temp_data_dir  # noqa: E402
+
+_upstream_url = os.environ['STUB_UPSTREAM_URL']
+os.environ.setdefault('OPENAI_API_KEY', 'stub-key')
+os.environ['OPENAI_BASE_URL'] = f"{_upstream_url}/v1"
+install_stub_modules(StubConfig.from_env(), _upstream_url)
+# One directory per gunicorn master, shared by its workers as backend/data would be
+use_temp_data_dir(f"ytsalt-bench-{os.getppid()}")
+
+from app import app  # noqa: E402,F401
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+ytSALT Benchmark Stubs Module
+This module provides stand-ins for every upstream the backend talks to, so the
+Flask API can be exercised under load without touching YouTube or OpenAI.
+
+yt-dlp and youtube-transcript-api are replaced by fake modules installed into
+sys.modules before the services are imported. Thumbnail downloads and OpenAI
+completions are served over real HTTP by a local upstream server, so the
+backend's own HTTP clients are exercised exactly as in production.
+
+Every stub sleeps for a configurable latency (plus jitter) before answering.
+The completion stub also mimics OpenAI's prompt prefix cache: a system message
+seen before, at least prompt_cache_min_tokens long, is reported as cached
+(usage.prompt_tokens_details.cached_tokens, in 128-token blocks).
+
+Classes:
+    StubConfig: Latency settings for each stubbed upstream
+    StubUpstreamServer: Local HTTP server for thumbnails and chat completions
+
+Functions:
+    install_stub_modules: Registers fake yt_dlp / youtube_transcript_api modules
+    install_stub_modules_from_env: Same, configured from STUB_* variables
+    use_temp_data_dir: Points the backend's persistent stores at a throwaway directory
+
+Version: 1.0.0
+License: MIT
+"""
+
+import atexit
+import io
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubConfig:
+    """Latency settings (in seconds) for each stubbed upstream"""
+
+    ENV_PREFIX = 'STUB_'
+    FIELDS = ('ytdlp_latency', 'transcript_latency', 'thumbnail_latency',
+              'openai_latency', 'jitter', 'ytdlp_cpu', 'prompt_cache_min_tokens')
+
+    def __init__(self, ytdlp_latency=0.4, transcript_latency=0.3,
+                 thumbnail_latency=0.05, openai_latency=1.5, jitter=0.2, ytdlp_cpu=0.0,
+                 prompt_cache_min_tokens=1024):
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        self.ytdlp_latency = ytdlp_latency
+        self.ytdlp_cpu = ytdlp_cpu
+        self.transcript_latency = transcript_latency
+        self.thumbnail_latency = thumbnail_latency
+        self.openai_latency = openai_latency
+        self.jitter = jitter
+
+    @classmethod
+    def from_env(cls):
+        """Build a config from STUB_* environment variables"""
+        config = cls()
+        for field in cls.FIELDS:
+            value = os.getenv(cls.ENV_PREFIX + field.upper())
+            if value is not None:
+                setattr(config, field, float(value))
+        return config
+
+    def to_env(self) -> dict:
+        """Export the config as STUB_* environment variables"""
+        return {
+            self.ENV_PREFIX + field.upper(): str(getattr(self, field))
+            for field in self.FIELDS
+        }
+
+    def sleep(self, base: float):
+        """Sleep for base seconds, +/- the configured jitter fraction"""
+        if base <= 0:
+            return
+        spread = base * self.jitter
+        time.sleep(max(0.0, base + random.uniform(-spread, spread)))
+
+    def burn_cpu(self, seconds: float):
+        """Hold the GIL doing yt-dlp-like work (regex + JSON) for `seconds` of CPU time"""
+        if seconds <= 0:
+            return
+        page = json.dumps({'videoDetails': {'title': 'x' * 200, 'keywords': ['k'] * 50}})
+        stop = time.thread_time() + seconds
+        while time.thread_time() < stop:
+            json.loads(page)
+            _PLAYER_RE.search(page)
+
+
+_PLAYER_RE = re.compile(r'"keywords":\s*\[(.*?)\]')
+
+
+def _video_id_from_url(url: str) -> str:
+    parsed = urlparse(url)
+    if parsed.hostname == 'youtu.be':
+        return parsed.path[1:]
+    return parse_qs(parsed.query).get('v', ['stubvideo00'])[0]
+
+
+def _fake_video_info(video_id: str, thumbnail_base: str) -> dict:
+    rng = random.Random(video_id)
+    topic = rng.choice(['python', 'cooking', 'guitar', 'travel', 'gaming', 'fitness'])
+    tags = [f"{topic} tutorial", f"learn {topic}", topic, f"{topic} tips",
+            f"{topic} for beginners", "how to", "step by step"]
+    description = '\n'.join(
+        [f"In this video we cover everything about {topic}."] +
+        [f"Line {i}: more detail about {topic} techniques #{topic}" for i in range(20)] +
+        ["Follow us at https://example.com/channel"]
+    )
+    return {
+        'id': video_id,
+        'title': f"How to get started with {topic} - complete guide",
+        'description': description,
+        'tags': tags,
+        'thumbnails': [
+            {'url': f"{thumbnail_base}/vi/{video_id}/default.jpg"},
+            {'url': f"{thumbnail_base}/vi/{video_id}/maxresdefault.jpg"},
+        ],
+        'duration': rng.randint(300, 1800),
+        'view_count': rng.randint(1000, 1000000),
+        'like_count': rng.randint(10, 50000),
+        'channel': f"{topic.capitalize()} Channel",
+        'upload_date': '20250201',
+    }
+
+
+def _fake_transcript(video_id: str) -> list:
+    rng = random.Random(video_id)
+    words = ['so', 'now', "let's", 'look', 'at', 'the', 'next', 'step', 'which',
+             'is', 'really', 'important', 'for', 'this', 'project', 'and', 'we',
+             'will', 'see', 'how', 'it', 'works', 'finally', 'another', 'example']
+    segments = []
+    start = 0.0
+    for _ in range(240):
+        duration = round(rng.uniform(2.0, 6.0), 2)
+        segments.append({
+            'text': ' '.join(rng.choice(words) for _ in range(rng.randint(6, 14))),
+            'start': round(start, 2),
+            'duration': duration,
+        })
+        start += duration
+    return segments
+
+
+def install_stub_modules(config: StubConfig, thumbnail_base: str):
+    """
+    Install fake yt_dlp and youtube_transcript_api modules into sys.modules.
+    Must be called before the backend services are imported.
+
+    Args:
+        config (StubConfig): Latency settings
+        thumbnail_base (str): Base URL thumbnails should point at
+    """
+    yt_dlp = types.ModuleType('yt_dlp')
+
+    class YoutubeDL:
+        def __init__(self, opts=None):
+            self.opts = opts or {}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            config.sleep(config.ytdlp_latency)
+            config.burn_cpu(config.ytdlp_cpu)
+            if 'list=' in url or url.rstrip('/').endswith('/videos'):
+                count = int(self.opts.get('playlistend') or 50)
+                return {'_type': 'playlist', 'entries': [
+                    {'_type': 'url', 'id': f"stub{i:07d}"} for i in range(count)]}
+            return _fake_video_info(_video_id_from_url(url), thumbnail_base)
+
+    yt_dlp.YoutubeDL = YoutubeDL
+    sys.modules['yt_dlp'] = yt_dlp
+
+    transcript_api = types.ModuleType('youtube_transcript_api')
+
+    class TranscriptsDisabled(Exception):
+        pass
+
+    class NoTranscriptFound(Exception):
+        pass
+
+    class YouTubeTranscriptApi:
+        @staticmethod
+        def get_transcript(video_id, languages=('en',)):
+            config.sleep(config.transcript_latency)
+            return _fake_transcript(video_id)
+
+    transcript_api.YouTubeTranscriptApi = YouTubeTranscriptApi
+    transcript_api.TranscriptsDisabled = TranscriptsDisabled
+    transcript_api.NoTranscriptFound = NoTranscriptFound
+    sys.modules['youtube_transcript_api'] = transcript_api
+
+
+def install_stub_modules_from_env():
+    """
+    install_stub_modules() configured from STUB_* variables and STUB_UPSTREAM_URL.
+    Module-level so it can be passed as VideoService(worker_setup=...) to worker processes.
+    """
+    install_stub_modules(StubConfig.from_env(), os.getenv('STUB_UPSTREAM_URL', 'http://127.0.0.1:9'))
+
+
+def use_temp_data_dir(name: str = None) -> str:
+    """
+    Point the tag index, transcript index and job database at a temporary
+    directory, so benchmark traffic never lands in backend/data. Call before the
+    services are imported.
+
+    Args:
+        name (str, optional): Fixed directory name under the system temp dir, for
+            processes that must share it (gunicorn workers); it is left in place.
+            Without a name, a new directory is created and removed at exit.
+
+    Returns:
+        str: The directory
+    """
+    if name:
+        data_dir = os.path.join(tempfile.gettempdir(), name)
+        os.makedirs(data_dir, exist_ok=True)
+    else:
+        data_dir = tempfile.mkdtemp(prefix='ytsalt-bench-')
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+    os.environ['YTSALT_TAG_INDEX_PATH'] = os.path.join(data_dir, 'tag_index.json')
+    os.environ['YTSALT_TRANSCRIPT_INDEX_PATH'] = os.path.join(data_dir, 'transcripts.sqlite3')
+    os.environ['YTSALT_JOBS_PATH'] = os.path.join(data_dir, 'jobs.sqlite3')
+    return data_dir
+
+
+def _render_thumbnail() -> bytes:
+    from PIL import Image
+
+    image = Image.new('RGB', (1280, 720))
+    pixels = image.load()
+    for x in range(0, 1280, 4):
+        for y in range(0, 720, 4):
+            color = (x * 255 // 1280, y * 255 // 720, 128)
+            for dx in range(4):
+                for dy in range(4):
+                    pixels[x + dx, y + dy] = color
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def _completion_text(messages: list, variant: int = 0) -> str:
+    """
+    Pick a canned completion shaped like what each AIService parser expects.
+    Choices after the first (n > 1) overlap with the previous one, as model samples do.
+    """
+    shift = 2 * variant
+    parts = []
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, list):
+            parts.extend(item.get('text', '') for item in content if item.get('type') == 'text')
+            parts.extend('__image__' for item in content if item.get('type') == 'image_url')
+        else:
+            parts.append(content or '')
+    text = '\n'.join(parts).lower()
+
+    if 'several youtube videos at once' in text:
+        videos = json.loads(messages[-1]['content']).get('videos', [])
+        if 'optimized titles' in text:
+            return json.dumps({'videos': [
+                {'id': video['id'], 'titles': [{'title': f"Stub Batch Title {i} For Video {video['id']}",
+                                                 'reasoning': 'more specific'} for i in range(1, 6)]}
+                for video in videos]})
+        return json.dumps({'videos': [
+            {'id': video['id'], 'tags': [{'tag': f"stub batch tag {i}", 'category': 'long-tail',
+                                           'reasoning': 'relevant'} for i in range(12)]}
+            for video in videos]})
+    if 'candidate thumbnails' in text:
+        count = text.count('__image__')
+        return json.dumps({
+            'ranking': [{'candidate': number, 'score': 10 - number,
+                         'strengths': [f'strength of candidate {number}'], 'weaknesses': ['small text']}
+                        for number in range(count, 0, -1)],
+            'winner': count,
+            'summary': 'The last candidate has the clearest focal point.'
+        })
+    if '__image__' in text:
+        return '\n'.join(
+            [f"{section}:\n- first point about {section.lower()}\n- second point"
+             for section in ('Current Thumbnail Analysis', 'Visual Elements', 'Text Overlay',
+                             'Color Scheme', 'Composition', 'Technical Specs',
+                             'Additional Recommendations')])
+    if 'chapter' in text:
+        return '\n'.join(f"{i * 2}:{(i * 17) % 60:02d} Chapter Topic {i}" for i in range(8))
+    if 'tag' in text and 'optimized tags' in text:
+        return '\n\n'.join(
+            f"Tag: stub tag {i}\nCategory: long-tail\nSource: transcript\nReasoning: relevant term {i}"
+            for i in range(shift, shift + 18))
+    if 'description' in text and 'optimized descriptions' in text:
+        return '\n\n'.join(
+            f"{i}.\nDescription: Stub description {i} with a hook #stub https://example.com\n"
+            f"Explanation: Better hook and CTA {i}"
+            for i in range(shift + 1, shift + 4))
+    return '\n'.join(
+        f"{i - shift}. Stub Optimized Title Number {i} For Testing\n   Improves CTR by being specific"
+        for i in range(shift + 1, shift + 6))
+
+
+class _PrefixCache:
+    """Remembers system messages, like the provider's prompt prefix cache"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, messages: list) -> int:
+        if not messages or messages[0].get('role') != 'system':
+            return 0
+        prefix = json.dumps(messages[0])
+        tokens = len(prefix) // 4
+        with self._lock:
+            seen = prefix in self._seen
+            self._seen.add(prefix)
+        if not seen or tokens < self.config.prompt_cache_min_tokens:
+            return 0
+        return tokens // 128 * 128
+
+
+class _UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without TCP_NODELAY every response
+    # would stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        config = self.server.config
+        if self.path.startswith('/vi/'):
+            config.sleep(config.thumbnail_latency)
+            self._send(200, self.server.thumbnail_bytes, 'image/jpeg')
+        else:
+            self._send(404, b'not found', 'text/plain')
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            self._send(404, b'{}', 'application/json')
+            return
+
+        config.sleep(config.openai_latency)
+        choices = []
+        for index in range(int(payload.get('n') or 1)):
+            choices.append({
+                'index': index,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': _completion_text(payload.get('messages', []), index)},
+            })
+        prompt_tokens = len(json.dumps(payload.get('messages', []))) // 4
+        completion_tokens = sum(len(c['message']['content']) // 4 for c in choices)
+        cached_tokens = self.server.cached_tokens(payload.get('messages', []))
+        body = {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'stub'),
+            'choices': choices,
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+                'prompt_tokens_details': {'cached_tokens': cached_tokens},
+            },
+        }
+        self._send(200, json.dumps(body).encode('utf-8'), 'application/json')
+
+
+class StubUpstreamServer:
+    """
+    Local HTTP server that answers thumbnail GETs and OpenAI chat completion POSTs
+    """
+
+    def __init__(self, config: StubConfig, host: str = '127.0.0.1', port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), _UpstreamHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = config
+        self.httpd.thumbnail_bytes = _render_thumbnail()
+        self.httpd.cached_tokens = _PrefixCache(config).cached_tokens
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
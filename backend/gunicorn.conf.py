@@ -0,0 +1,59 @@
+"""
+ytSALT gunicorn configuration
+The backend spends almost all of its time waiting on YouTube and OpenAI, so each
+worker process serves many requests concurrently: with OS threads (gthread, the
+default) or greenlets (gevent, if installed). A few processes are still used to
+spread the CPU-bound parts (yt-dlp parsing, JSON, image re-encoding) across cores.
+
+gevent note: gevent removes select.epoll, so it cannot be used in an environment
+that also has `trio` installed (httpcore imports it and needs epoll at import time).
+
+Environment:
+    YTSALT_BIND - Listen address (default 0.0.0.0:5000)
+    YTSALT_WORKER_CLASS - 'gthread' (default) or 'gevent'
+    YTSALT_WORKERS - Worker processes (default: CPU count, max 8)
+    YTSALT_THREADS - Threads per gthread worker (default 64)
+    YTSALT_WORKER_CONNECTIONS - Concurrent greenlets per gevent worker (default 256)
+    YTSALT_TIMEOUT - Seconds a silent worker may run before it is restarted (default 180)
+    YTSALT_GRACEFUL_TIMEOUT - Seconds in-flight requests get to finish on shutdown (default 60)
+    YTSALT_KEEPALIVE - Seconds to hold idle client connections (default 5)
+    YTSALT_MAX_REQUESTS - Recycle a worker after this many requests, 0 disables (default 0)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('YTSALT_BIND', '0.0.0.0:5000')
+worker_class = os.getenv('YTSALT_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('YTSALT_WORKERS', min(multiprocessing.cpu_count(), 8)))
+# Workers read it to split server-wide limits (services/admission.py) between them
+os.environ['YTSALT_WORKERS'] = str(workers)
+threads = int(os.getenv('YTSALT_THREADS', '64'))
+worker_connections = int(os.getenv('YTSALT_WORKER_CONNECTIONS', '256'))
+
+# LLM completions routinely take tens of seconds; only kill workers that are truly stuck
+timeout = int(os.getenv('YTSALT_TIMEOUT', '180'))
+# SIGTERM stops accepting connections and lets in-flight optimizations finish
+graceful_timeout = int(os.getenv('YTSALT_GRACEFUL_TIMEOUT', '60'))
+keepalive = int(os.getenv('YTSALT_KEEPALIVE', '5'))
+
+max_requests = int(os.getenv('YTSALT_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Each worker imports the app itself: services start threads (log writer, warm-up)
+# that would not survive a fork from a preloaded master.
+preload_app = False
+
+accesslog = None
+errorlog = '-'
+
+
+def worker_int(worker):
+    worker.log.info("worker %s interrupted, shutting down", worker.pid)
+
+
+def on_exit(server):
+    server.log.info("ytsalt gunicorn master exiting")
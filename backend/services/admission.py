@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+ytSALT Admission Control Module
+This module decides, before a route runs, whether the backend takes on a request,
+so one client running a catalog script cannot fill every worker and the OpenAI
+quota while interactive users time out behind it.
+
+Each admitted request holds one slot until it finishes. Slots are limited:
+    - in total (YTSALT_ADMISSION_MAX_ACTIVE);
+    - per route, for the routes that fan out into many upstream calls;
+    - per client (YTSALT_ADMISSION_CLIENT_LIMIT), counting its running and its
+      waiting requests. A client at its limit is refused at once: waiting would
+      only let it queue more work.
+Batch requests (bulk routes, or X-Request-Priority: batch) may not take the
+slots reserved for interactive ones (YTSALT_ADMISSION_INTERACTIVE_RESERVE).
+
+A request that finds no free slot waits in a bounded queue. Freed slots go to
+interactive waiters before batch ones, oldest first. A request is refused with
+AdmissionRejected when the queue is full, or when it would wait longer than
+YTSALT_ADMISSION_MAX_WAIT or its remaining deadline. The rejection carries a
+retry_after estimate from the recent hold time of the route.
+
+State is kept per process. Under gunicorn, every limit is divided between the
+YTSALT_WORKERS worker processes (rounded up), so the configured values stay
+server-wide totals. Connections are spread over the workers by the kernel, not
+by client, so the per-client limit is approximate: a client can be refused by a
+busy worker while it is still under its server-wide limit.
+
+Classes:
+    AdmissionRejected: Raised when a request is not admitted
+    Ticket: An admitted request's slot; release it when the request ends
+    AdmissionController: Slot accounting and the wait queue
+
+Functions:
+    get_controller: Shared controller built from the environment
+    priority_of: Priority of a route ('interactive' or 'batch')
+    route_name: Name of a route in settings, e.g. optimize_batch
+
+Environment:
+    YTSALT_ADMISSION_MAX_ACTIVE - Requests running at once (default 32, 0 disables admission control)
+    YTSALT_ADMISSION_CLIENT_LIMIT - Requests running at once per client (default 8, 0 for no limit)
+    YTSALT_ADMISSION_ROUTE_<ROUTE> - Requests running at once on a route, e.g.
+        YTSALT_ADMISSION_ROUTE_OPTIMIZE_BATCH=2 for /api/optimize/batch (0 for no limit)
+    YTSALT_ADMISSION_INTERACTIVE_RESERVE - Share of the slots batch requests cannot use (default 0.25)
+    YTSALT_ADMISSION_QUEUE - Requests waiting at once (default 64)
+    YTSALT_ADMISSION_MAX_WAIT - Seconds a request may wait for a slot (default 5)
+    YTSALT_WORKERS - Worker processes sharing the limits (set by gunicorn.conf.py; default 1)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import itertools
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from services import deadline, metrics
+from services.logger import get_logger
+
+log = get_logger('admission')
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+_PRIORITY_ORDER = {INTERACTIVE: 0, BATCH: 1}
+
+# Routes that do the work of many requests in one, and run as batch work
+BATCH_ROUTES = frozenset(('/api/optimize/batch', '/api/tags/index'))
+
+DEFAULT_ROUTE_LIMITS = {
+    # Several completions per request
+    'optimize_all': 8,
+    'optimize_batch': 2,
+    # One metadata fetch per URL, possibly hundreds
+    'tags_index': 2,
+}
+
+metrics.registry.describe('ytsalt_admission_total',
+                          'Admission decisions by route, priority and outcome '
+                          '(admitted, queued, rejected_client_limit, rejected_queue, rejected_wait)', 'counter')
+metrics.registry.describe('ytsalt_admission_wait_seconds', 'Time admitted requests waited for a slot', 'histogram')
+metrics.registry.describe('ytsalt_admission_active', 'Requests holding an admission slot', 'gauge')
+metrics.registry.describe('ytsalt_admission_waiting', 'Requests waiting for an admission slot', 'gauge')
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted; retry_after is a suggested delay in seconds"""
+
+    def __init__(self, reason: str, retry_after: float, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def priority_of(route: str, requested: Optional[str] = None) -> str:
+    """
+    Priority of a request: batch for bulk routes or when the client asks for it,
+    interactive otherwise (a client cannot raise a bulk route to interactive)
+    """
+    if route in BATCH_ROUTES or (requested or '').lower() == BATCH:
+        return BATCH
+    return INTERACTIVE
+
+
+def route_name(route: str) -> str:
+    """Name of a route in settings: '/api/optimize/batch' -> 'optimize_batch'"""
+    path = route.split('/api/', 1)[-1].strip('/')
+    return ''.join(c if c.isalnum() else '_' for c in path).lower()
+
+
+class Ticket:
+    """An admitted request's slot"""
+
+    def __init__(self, controller: 'AdmissionController', client: str, route: str, priority: str):
+        self.controller = controller
+        self.client = client
+        self.route = route
+        self.priority = priority
+        self.granted_at: Optional[float] = None
+        self._released = False
+
+    def release(self):
+        """Give the slot back (idempotent)"""
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class _Waiter:
+    def __init__(self, ticket: Ticket, sequence: int):
+        self.ticket = ticket
+        self.sequence = sequence
+        self.granted = threading.Event()
+        # Set with granted when an interactive request took this waiter's place in the queue
+        self.evicted = False
+
+    def sort_key(self):
+        return _PRIORITY_ORDER[self.ticket.priority], self.sequence
+
+
+class AdmissionController:
+    """
+    Concurrency limits and the wait queue. Safe to share between request threads.
+    """
+
+    def __init__(self, max_active: int = 32, client_limit: int = 8, route_limits: Optional[Dict[str, int]] = None,
+                 interactive_reserve: float = 0.25, max_waiting: int = 64, max_wait: float = 5.0):
+        """
+        Args:
+            max_active (int): Requests running at once
+            client_limit (int): Requests running or waiting at once per client (0 for no limit)
+            route_limits (dict, optional): Route name (see route_name) -> requests running at once
+            interactive_reserve (float): Share of max_active that batch requests cannot use
+            max_waiting (int): Requests waiting at once
+            max_wait (float): Seconds a request may wait for a slot
+        """
+        self.max_active = max_active
+        self.client_limit = client_limit
+        self.route_limits = {route: limit for route, limit in (route_limits or {}).items() if limit > 0}
+        self.batch_limit = max(1, max_active - int(math.ceil(max_active * interactive_reserve)))
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._active = 0
+        self._active_batch = 0
+        self._by_client: Dict[str, int] = {}
+        self._waiting_by_client: Dict[str, int] = {}
+        self._by_route: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        # Recent slot hold time per route (exponential moving average), for Retry-After
+        self._hold: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        """
+        Controller configured by the YTSALT_ADMISSION_* settings, with every limit
+        divided between the YTSALT_WORKERS processes
+        """
+        processes = max(1, int(os.getenv('YTSALT_WORKERS') or '1'))
+
+        def share(limit: int) -> int:
+            # 0 keeps its meaning (disabled / no limit)
+            return int(math.ceil(limit / processes)) if limit > 0 else limit
+
+        route_limits = dict(DEFAULT_ROUTE_LIMITS)
+        prefix = 'YTSALT_ADMISSION_ROUTE_'
+        for key, value in os.environ.items():
+            if key.startswith(prefix) and value:
+                route_limits[key[len(prefix):].lower()] = int(value)
+        return cls(
+            max_active=share(int(os.getenv('YTSALT_ADMISSION_MAX_ACTIVE', '32'))),
+            client_limit=share(int(os.getenv('YTSALT_ADMISSION_CLIENT_LIMIT', '8'))),
+            route_limits={route: share(limit) for route, limit in route_limits.items()},
+            interactive_reserve=float(os.getenv('YTSALT_ADMISSION_INTERACTIVE_RESERVE', '0.25')),
+            max_waiting=share(int(os.getenv('YTSALT_ADMISSION_QUEUE', '64'))),
+            max_wait=float(os.getenv('YTSALT_ADMISSION_MAX_WAIT', '5')),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_active > 0
+
+    def _route_limit(self, route: str) -> Optional[int]:
+        return self.route_limits.get(route_name(route))
+
+    def _client_load(self, client: str) -> int:
+        """Requests of a client running or waiting"""
+        return self._by_client.get(client, 0) + self._waiting_by_client.get(client, 0)
+
+    def _fits(self, ticket: Ticket) -> bool:
+        """True when a slot is free for this ticket and its client is under its limit"""
+        if self._active >= self.max_active:
+            return False
+        if self.client_limit and self._by_client.get(ticket.client, 0) >= self.client_limit:
+            return False
+        if ticket.priority == BATCH and self._active_batch >= self.batch_limit:
+            return False
+        limit = self._route_limit(ticket.route)
+        return limit is None or self._by_route.get(ticket.route, 0) < limit
+
+    def _take(self, ticket: Ticket):
+        self._active += 1
+        if ticket.priority == BATCH:
+            self._active_batch += 1
+        self._by_client[ticket.client] = self._by_client.get(ticket.client, 0) + 1
+        self._by_route[ticket.route] = self._by_route.get(ticket.route, 0) + 1
+        ticket.granted_at = time.perf_counter()
+
+    def _retry_after(self, route: str, ahead: int) -> float:
+        """Seconds until roughly `ahead` more slots have turned over on a route"""
+        hold = self._hold.get(route, 1.0)
+        limit = self._route_limit(route) or self.max_active
+        return max(1.0, hold * (ahead + 1) / max(1, min(limit, self.max_active)))
+
+    def _update_gauges(self):
+        metrics.registry.set_gauge('ytsalt_admission_active', self._active)
+        metrics.registry.set_gauge('ytsalt_admission_waiting', len(self._waiters))
+
+    def acquire(self, client: str, route: str, priority: str = INTERACTIVE) -> Ticket:
+        """
+        Take a slot for a request, waiting for one if needed
+
+        Args:
+            client (str): Client identity
+            route (str): Route rule, e.g. '/api/optimize/title'
+            priority (str): 'interactive' or 'batch'
+
+        Returns:
+            Ticket: The slot; call release() when the request ends
+
+        Raises:
+            AdmissionRejected: When the client is at its limit, the queue is full,
+                or no slot frees up within the allowed wait
+        """
+        ticket = Ticket(self, client, route, priority)
+        labels = {'route': route, 'priority': priority}
+        wait = self.max_wait
+        left = deadline.remaining()
+        if left is not None:
+            wait = min(wait, left)
+
+        with self._lock:
+            if self.client_limit and self._client_load(client) >= self.client_limit:
+                raise self._reject('client_limit', client, labels, self._retry_after(route, 0),
+                                   f"Too many concurrent requests from this client (limit {self.client_limit})")
+            # Waiters are handed every slot they fit as it frees up, so a request that
+            # fits now is not overtaking anyone
+            if self._fits(ticket):
+                self._take(ticket)
+                self._update_gauges()
+                metrics.registry.increment('ytsalt_admission_total', outcome='admitted', **labels)
+                metrics.registry.observe('ytsalt_admission_wait_seconds', 0.0, route=route)
+                return ticket
+            ahead = sum(1 for w in self._waiters if w.sort_key()[0] <= _PRIORITY_ORDER[priority])
+            if len(self._waiters) >= self.max_waiting:
+                evicted = self._evict_batch_waiter() if priority == INTERACTIVE else None
+                if evicted is None:
+                    raise self._reject('queue', client, labels, self._retry_after(route, ahead),
+                                       "Server is at capacity; retry later")
+            # Refuse now rather than after a wait that is not going to end in a slot
+            if route in self._hold and self._retry_after(route, ahead) > wait:
+                raise self._reject('wait', client, labels, self._retry_after(route, ahead),
+                                   "Server is at capacity; retry later")
+            waiter = _Waiter(ticket, next(self._sequence))
+            self._waiters.append(waiter)
+            self._waiting_by_client[client] = self._waiting_by_client.get(client, 0) + 1
+            self._update_gauges()
+        metrics.registry.increment('ytsalt_admission_total', outcome='queued', **labels)
+
+        started = time.perf_counter()
+        waiter.granted.wait(max(0.0, wait))
+        with self._lock:
+            if waiter.evicted:
+                raise self._reject('queue', client, labels, self._retry_after(route, ahead),
+                                   "Server is at capacity; retry later")
+            if not waiter.granted.is_set():
+                self._remove_waiter(waiter)
+                self._update_gauges()
+                raise self._reject('wait', client, labels, self._retry_after(route, ahead),
+                                   "Server is at capacity; retry later")
+        metrics.registry.increment('ytsalt_admission_total', outcome='admitted', **labels)
+        metrics.registry.observe('ytsalt_admission_wait_seconds', time.perf_counter() - started, route=route)
+        return ticket
+
+    def _evict_batch_waiter(self) -> Optional[_Waiter]:
+        """Drop the newest batch waiter to make room for an interactive one (lock held)"""
+        batch = [w for w in self._waiters if w.ticket.priority == BATCH]
+        if not batch:
+            return None
+        waiter = max(batch, key=lambda w: w.sequence)
+        self._remove_waiter(waiter)
+        waiter.evicted = True
+        waiter.granted.set()
+        return waiter
+
+    def _remove_waiter(self, waiter: _Waiter):
+        """Take a waiter out of the queue and its client's waiting count (lock held)"""
+        self._waiters.remove(waiter)
+        client = waiter.ticket.client
+        self._waiting_by_client[client] -= 1
+        if not self._waiting_by_client[client]:
+            del self._waiting_by_client[client]
+
+    def _reject(self, reason: str, client: str, labels: Dict, retry_after: float,
+                message: str) -> AdmissionRejected:
+        metrics.registry.increment('ytsalt_admission_total', outcome=f'rejected_{reason}', **labels)
+        log.info("admission_rejected", reason=reason, client=client, retry_after=round(retry_after, 1),
+                 active=self._active, waiting=len(self._waiters), **labels)
+        return AdmissionRejected(reason, retry_after, message)
+
+    def _release(self, ticket: Ticket):
+        with self._lock:
+            self._active -= 1
+            if ticket.priority == BATCH:
+                self._active_batch -= 1
+            self._by_client[ticket.client] -= 1
+            if not self._by_client[ticket.client]:
+                del self._by_client[ticket.client]
+            self._by_route[ticket.route] -= 1
+            held = time.perf_counter() - ticket.granted_at
+            previous = self._hold.get(ticket.route)
+            self._hold[ticket.route] = held if previous is None else 0.8 * previous + 0.2 * held
+            self._dispatch()
+            self._update_gauges()
+
+    def _dispatch(self):
+        """Hand free slots to waiters: interactive first, then oldest first (lock held)"""
+        self._waiters.sort(key=_Waiter.sort_key)
+        for waiter in list(self._waiters):
+            if self._active >= self.max_active:
+                break
+            if self._fits(waiter.ticket):
+                self._remove_waiter(waiter)
+                self._take(waiter.ticket)
+                waiter.granted.set()
+
+    def snapshot(self) -> Dict:
+        """Current load and limits, for monitoring"""
+        with self._lock:
+            return {
+                'active': self._active,
+                'active_batch': self._active_batch,
+                'waiting': len(self._waiters),
+                'waiting_batch': sum(1 for w in self._waiters if w.ticket.priority == BATCH),
+                'clients': len(self._by_client),
+                'routes': {route: count for route, count in self._by_route.items() if count},
+                'limits': {
+                    'max_active': self.max_active,
+                    'batch_active': self.batch_limit,
+                    'client': self.client_limit or None,
+                    'routes': self.route_limits,
+                    'queue': self.max_waiting,
+                    'max_wait': self.max_wait,
+                },
+            }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> AdmissionController:
+    """Shared AdmissionController, built from the environment on first use"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController.from_env()
+    return _controller
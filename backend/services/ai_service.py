@@ -1,137 +1,608 @@
 # backend/services/ai_service.py
-from openai import OpenAI
 from typing import Dict, List
 import os
 from dotenv import load_dotenv
 import re
 from datetime import datetime
 import base64
-import requests
-from PIL import Image  # for thumbnail processing
+import contextvars
 import io
-from io import BytesIO
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from services import metrics
+from services.metrics import stage, record_token_usage
+from services.logger import get_logger
+from services import (http_client, fingerprint, deadline, cassette, circuit_breaker, content_classifier,
+                      model_router, prompts, text_metrics, thumbnail_metrics, variants)
+from services.cache import LRUCache, SingleFlight
+from services.tag_completer import transcript_ngrams
+from services.tag_index import normalize_tag
 
 load_dotenv()
 
+log = get_logger('ai_service')
+
+# Upstream not reachable in time (or known to be failing): serve a fallback instead
+UNAVAILABLE_ERRORS = (deadline.DeadlineExceeded, circuit_breaker.CircuitOpenError)
+
+# Estimated answer tokens per video in a batch completion
+BATCH_OUTPUT_TOKENS = {'title': 220, 'tags': 260}
+
+metrics.registry.describe('ytsalt_batch_videos_total',
+                          'Videos handled by batch optimization, by outcome', 'counter')
+
+def _is_openai_failure(exc):
+    """Circuit breaker classifier: 4xx responses (other than timeouts/rate limits) are our fault"""
+    status = getattr(exc, 'status_code', None)
+    return not (status and 400 <= status < 500 and status not in (408, 409, 429))
+
 class AIService:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, tag_index=None, router=None):
+        self._client = None
+        # Optional services.tag_index.TagIndex used to annotate and filter tag candidates
+        self.tag_index = tag_index
+        # Model, output cap and budgets per task
+        self.router = router or model_router.get_router()
+        self._client_lock = threading.Lock()
+        # Successful results keyed by task + input fingerprint, so a re-run only
+        # recomputes the tasks whose inputs changed
+        self.result_store = LRUCache(maxsize=int(os.getenv('YTSALT_RESULT_CACHE_SIZE', '1024')))
+        # Latest successful result per (task, video), whatever its inputs; the
+        # fallback when a request's deadline passes
+        self.latest_results = LRUCache(maxsize=int(os.getenv('YTSALT_RESULT_CACHE_SIZE', '1024')))
+        # Downloaded thumbnails by URL (short-lived: creators replace them) and
+        # their JPEG encodings by image digest; also filled by the prefetcher
+        thumbnail_cache_size = int(os.getenv('YTSALT_THUMBNAIL_CACHE_SIZE', '128'))
+        self.thumbnails = LRUCache(maxsize=thumbnail_cache_size,
+                                   ttl=float(os.getenv('YTSALT_THUMBNAIL_CACHE_TTL', '300')))
+        self.encoded_thumbnails = LRUCache(maxsize=thumbnail_cache_size)
+        self._thumbnail_flights = SingleFlight()
+        # Content type by digest of the metadata it is derived from
+        self.content_types = LRUCache(maxsize=1024)
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use so importing the service stays cheap"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    # All completions share one pooled, keep-alive connection pool
+                    self._client = OpenAI(
+                        api_key=os.getenv('OPENAI_API_KEY'),
+                        http_client=http_client.get_openai_http_client(),
+                        timeout=http_client.openai_timeout(),
+                        max_retries=int(os.getenv('YTSALT_OPENAI_MAX_RETRIES', '2'))
+                    )
+        return self._client
+
+    def warm_up(self):
+        """Create the OpenAI client and import the image stack ahead of the first request"""
+        self.client
+        http_client.get_http_client()
+        from PIL import Image  # noqa: F401
+
+    def _complete(self, task: str, escalate: bool = False, **params):
+        """
+        Run a chat completion for the given task on the model its route selects,
+        timing the model wait and recording token usage (including prompt tokens
+        served from the provider's prefix cache) and cost from response.usage.
+        Under a request deadline (or the route's latency budget) the call is cut
+        off when the budget runs out (DeadlineExceeded); while the OpenAI breaker
+        is open it fails fast (CircuitOpenError).
+
+        Args:
+            task (str): Task name, which selects the route
+            escalate (bool): Run on the route's escalation tier
+            **params: Chat completion parameters (model and max_tokens come from the route)
+        """
+        route_params = self.router.params(task, params.get('messages', []), escalate, choices=params.get('n', 1))
+        tier = route_params.pop('tier')
+        params = dict(route_params, **params)
+        # The request itself, without per-call transport settings, identifies a cassette entry
+        request_key = {key: value for key, value in params.items() if key != 'timeout'}
+        with deadline.deadline(self.router.route(task).latency_budget):
+            if deadline.remaining() is not None:
+                params.setdefault('timeout', http_client.within_deadline(http_client.openai_timeout(), 'llm_wait'))
+
+            def create():
+                client = self.client
+                if deadline.remaining() is not None:
+                    # SDK retries do not know about the deadline; a retry would outlive it
+                    client = client.with_options(max_retries=0)
+                return client.chat.completions.create(**params)
+
+            breaker = circuit_breaker.get_breaker(circuit_breaker.OPENAI, _is_openai_failure)
+            breaker.allow()
+            try:
+                with stage('llm_wait', task):
+                    response = cassette.call('openai', request_key, create,
+                                             encode=cassette.encode_completion, decode=cassette.decode_completion)
+            except (deadline.DeadlineExceeded, cassette.CassetteMiss):
+                # Neither says anything about OpenAI's health
+                breaker.release()
+                raise
+            except Exception as e:
+                if deadline.expired():
+                    breaker.release()
+                    raise deadline.exceeded('llm_wait') from e
+                if _is_openai_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                raise
+        breaker.record_success()
+        tokens = record_token_usage(task, params['model'], getattr(response, 'usage', None))
+        cost = self.router.record_cost(task, tier, tokens)
+        log.debug("llm_usage", task=task, tier=tier, model=params['model'], prompt_tokens=tokens['prompt'],
+                  cached_tokens=tokens['cached'], completion_tokens=tokens['completion'], cost=round(cost, 6))
+        return response
+
+    def _complete_parsed(self, task: str, parse, **params):
+        """
+        Run a completion and parse it. When parsing fails or yields fewer results
+        than the route's min_results, retry once on the route's escalation tier.
+
+        Args:
+            task (str): Task name
+            parse (callable): Turns the response text into a list of results
+            **params: Chat completion parameters
+
+        Returns:
+            tuple: (response, parsed results)
+        """
+        response = self._complete(task, **params)
+        try:
+            with stage('parse', task):
+                parsed = self._parse_choices(response, parse)
+            error = None
+        except Exception as e:
+            parsed, error = None, e
+
+        if (error or len(parsed) < self.router.route(task).min_results) and self.router.can_escalate(task):
+            log.info("llm_escalation", task=task, results=0 if parsed is None else len(parsed),
+                     error=str(error) if error else None)
+            metrics.registry.increment('ytsalt_llm_escalations_total', task=task)
+            try:
+                escalated = self._complete(task, escalate=True, **params)
+            except UNAVAILABLE_ERRORS:
+                # No time (or no upstream) left for the retry: keep the first answer if there is one
+                if parsed is None:
+                    raise
+                return response, parsed
+            with stage('parse', task):
+                return escalated, self._parse_choices(escalated, parse)
+
+        if error:
+            raise error
+        return response, parsed
+
+    @staticmethod
+    def _parse_choices(response, parse) -> List:
+        """Parsed results of every choice of a completion (several when sampled with n), in order"""
+        parsed = []
+        for choice in response.choices:
+            parsed.extend(parse(choice.message.content))
+        return parsed
+
+    @staticmethod
+    def _variant_params(choices: int) -> Dict:
+        """Completion parameters sampling `choices` variants in one call"""
+        return {'n': choices} if choices > 1 else {}
+
+    def _with_stored_result(self, task: str, video_data: Dict, compute, thumbnail_bytes: bytes = None) -> Dict:
+        """
+        Serve a task from the result store when its input fingerprint is unchanged,
+        otherwise compute it and store the result if it succeeded.
+
+        Args:
+            task (str): Task name (see fingerprint.TASK_INPUTS)
+            video_data (dict): Request payload; 'force_refresh': true bypasses the store
+            compute (callable): Produces the result when it is not stored
+            thumbnail_bytes (bytes, optional): Thumbnail content, for the thumbnail task
+
+        Returns:
+            dict: Task result with 'reused' and 'fingerprint' added
+        """
+        digests = fingerprint.field_digests(video_data, thumbnail_bytes)
+        # Results from another model are not reused. The number of variants is not part of
+        # the key: pages are served from whatever pool is stored, unless it is too small.
+        task_fingerprint = fingerprint.task_fingerprint(task, digests, salt=self.router.model(task))
+        key = f"{task}:{task_fingerprint}"
+
+        if not video_data.get('force_refresh'):
+            stored = self.result_store.get(key)
+            if stored is not None and (task not in variants.TEXT_FIELDS or variants.covers(stored, video_data)):
+                log.debug("result_reused", task=task, fingerprint=task_fingerprint)
+                return dict(stored, reused=True, fingerprint=task_fingerprint)
+
+        try:
+            deadline.check(task)
+            result = compute()
+        except UNAVAILABLE_ERRORS as e:
+            return self._fallback(task, video_data, e)
+        if result.get('success') and not result.get('degraded'):
+            self.result_store.set(key, result)
+            self.latest_results.set((task, fingerprint.video_key(video_data)), result)
+        return dict(result, reused=False, fingerprint=task_fingerprint)
+
+    def _fallback(self, task: str, video_data: Dict, reason: Exception) -> Dict:
+        """
+        Result for a task whose deadline passed or whose upstream breaker is open:
+        the latest stored result for the same video, else a locally computed one,
+        else an error. All are flagged 'degraded', with 'fallback' naming the source.
+        """
+        log.warning("upstream_fallback", task=task, reason=str(reason))
+        stale = self.latest_results.get((task, fingerprint.video_key(video_data)))
+        if stale is not None:
+            deadline.record_fallback(task, 'cached')
+            return dict(stale, reused=True, degraded=True, fallback='cached')
+
+        local = self._local_result(task, video_data)
+        if local is not None:
+            deadline.record_fallback(task, 'local')
+            return dict(local, reused=False, degraded=True, fallback='local')
+
+        deadline.record_fallback(task, 'none')
+        failure = {
+            "success": False,
+            "error": str(reason),
+            "degraded": True
+        }
+        if isinstance(reason, circuit_breaker.CircuitOpenError):
+            failure['retry_after'] = round(reason.retry_after, 1)
+        return failure
+
+    def _local_result(self, task: str, video_data: Dict):
+        """
+        Heuristic result computed without any upstream call, for the tasks that
+        have one: chapters from transcript segments and keyword tags
+
+        Returns:
+            dict or None
+        """
+        if task == 'key_moments':
+            from services.transcript_service import TranscriptService
+
+            transcript_data = video_data.get('transcript_data') or {}
+            timestamps = TranscriptService().generate_timestamps(transcript_data)
+            chapters = self._validate_chapters([
+                {'time': int(item['time']), 'timestamp': item['timestamp'],
+                 'title': item['title'], 'type': 'chapter'}
+                for item in timestamps
+            ])
+            if chapters:
+                return {"success": True, "key_moments": chapters}
+        elif task == 'tags':
+            suggestions = self._local_keyword_tags(video_data)
+            if suggestions:
+                return {
+                    "success": True,
+                    "suggestions": suggestions,
+                    "reasoning": "Keywords extracted locally from the transcript and metadata"
+                }
+        return None
+
+    def _local_keyword_tags(self, video_data: Dict, limit: int = 15) -> List[Dict]:
+        """
+        Tag candidates from recurring transcript phrases and title/description
+        phrases, skipping tags the video already has
+        """
+        existing = {normalize_tag(tag) for tag in video_data.get('tags') or []}
+        from_transcript = transcript_ngrams(fingerprint.transcript_text(video_data))
+        from_metadata = transcript_ngrams(
+            f"{video_data.get('title', '')}\n{video_data.get('description', '')}", min_count=1)
+
+        # Metadata phrases were chosen by the creator, so they weigh more
+        scores = Counter(from_transcript)
+        for phrase, count in from_metadata.items():
+            scores[phrase] += 2 * count
+
+        suggestions = []
+        for phrase, _ in scores.most_common():
+            if phrase in existing or len(phrase) < 3:
+                continue
+            in_transcript, in_metadata = phrase in from_transcript, phrase in from_metadata
+            suggestions.append({
+                'tag': phrase,
+                'is_new': True,
+                'category': 'long-tail' if ' ' in phrase else 'primary keyword',
+                'source': 'both' if in_transcript and in_metadata else 'transcript' if in_transcript else 'metadata',
+                'reasoning': 'Recurring phrase in the video content',
+                'metrics': text_metrics.tag_metrics(phrase)
+            })
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+    def optimize_all(self, video_data: Dict, tasks: List[str] = None, on_result=None) -> Dict:
+        """
+        Run several optimization tasks for one video, reusing stored results for
+        every task whose inputs have not changed since the last run
+
+        Args:
+            video_data (dict): Request payload (title, description, tags,
+                thumbnail_url, transcript_data)
+            tasks (list, optional): Subset of fingerprint.TASK_INPUTS; defaults to all
+                tasks whose inputs are present
+            on_result (callable, optional): Called as on_result(task, result) after
+                each task, e.g. to report job progress
+
+        Returns:
+            dict: Per-task results plus the lists of reused and recomputed tasks
+        """
+        runners = {
+            'title': self.optimize_title,
+            'description': self.optimize_description,
+            'tags': self.optimize_tags,
+            'thumbnail': self.optimize_thumbnail,
+            'key_moments': self.generate_key_moments,
+        }
+        if tasks is None:
+            tasks = [task for task in runners
+                     if (task != 'thumbnail' or video_data.get('thumbnail_url'))
+                     and (task != 'key_moments' or fingerprint.transcript_text(video_data))]
+
+        results = {}
+        for task in tasks:
+            if task not in runners:
+                results[task] = {"success": False, "error": f"Unknown task: {task}"}
+                continue
+            results[task] = runners[task](video_data)
+            if on_result is not None:
+                on_result(task, results[task])
+
+        return {
+            "success": all(result.get('success') for result in results.values()),
+            "results": results,
+            "reused": [task for task, result in results.items() if result.get('reused')],
+            "recomputed": [task for task, result in results.items()
+                           if result.get('success') and not result.get('reused') and not result.get('degraded')],
+            "failed": [task for task, result in results.items() if not result.get('success')],
+            "degraded": [task for task, result in results.items() if result.get('degraded')]
+        }
+
+    def optimize_batch(self, task: str, videos: List[Dict]) -> Dict:
+        """
+        Quick title or tag suggestions for many videos, several videos per
+        completion (e.g. for catalog audits)
+
+        Videos are packed into batches whose size follows from the token budgets:
+        the prompt budget (YTSALT_BATCH_PROMPT_TOKENS) bounds the input, the
+        route's max_tokens bounds the answers (BATCH_OUTPUT_TOKENS per video), and
+        YTSALT_BATCH_MAX_VIDEOS caps the count. Batches run concurrently. Videos the
+        model skipped or answered unusably are packed again and retried, up to
+        YTSALT_BATCH_RETRIES times; the others are not sent again.
+
+        Args:
+            task (str): 'title' or 'tags'
+            videos (list): Video metadata dicts (title, description, tags, video_id)
+
+        Returns:
+            dict: One result per video, in input order, plus batch counts
+        """
+        if task not in BATCH_OUTPUT_TOKENS:
+            return {"success": False, "error": f"Batch mode supports {', '.join(BATCH_OUTPUT_TOKENS)}"}
+        if not isinstance(videos, list) or not videos or not all(isinstance(video, dict) for video in videos):
+            return {"success": False, "error": "videos must be a non-empty list of objects"}
+        maximum = int(os.getenv('YTSALT_BATCH_MAX_TOTAL', '1000'))
+        if len(videos) > maximum:
+            return {"success": False, "error": f"At most {maximum} videos per request"}
+
+        with stage('prompt_build', f'{task}_batch'):
+            items = [prompts.batch_item(str(number), video) for number, video in enumerate(videos, 1)]
+        results: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        pending = items
+        calls = 0
+        retried = 0
+        for attempt in range(1 + int(os.getenv('YTSALT_BATCH_RETRIES', '1'))):
+            if not pending:
+                break
+            if attempt:
+                retried += len(pending)
+                log.info("batch_retry", task=task, videos=len(pending), attempt=attempt)
+            batches = self._pack_batch(task, pending)
+            calls += len(batches)
+            workers = max(1, min(len(batches), int(os.getenv('YTSALT_BATCH_CONCURRENCY', '4'))))
+            # Each batch runs in its own copy of the request context (deadline, stage timings)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ytsalt-batch') as pool:
+                futures = [pool.submit(contextvars.copy_context().run, self._run_batch, task, batch)
+                           for batch in batches]
+                outcomes = [future.result() for future in futures]
+
+            unavailable = False
+            for batch, (answers, error) in zip(batches, outcomes):
+                unavailable = unavailable or isinstance(error, UNAVAILABLE_ERRORS)
+                for item in batch:
+                    if item['id'] in answers:
+                        results[item['id']] = answers[item['id']]
+                        errors.pop(item['id'], None)
+                    else:
+                        errors[item['id']] = str(error) if error else "No usable suggestions in the batch answer"
+            pending = [item for item in pending if item['id'] not in results]
+            if unavailable:
+                # No point in retrying while the upstream is down or the deadline has passed
+                break
+
+        output = []
+        for number, video in enumerate(videos, 1):
+            key = str(number)
+            entry = {"index": number - 1, "video_id": video.get('video_id')}
+            if key in results:
+                entry.update(success=True, suggestions=self._batch_suggestions(task, video, results[key]))
+            else:
+                entry.update(success=False, error=errors.get(key, "Not processed"))
+            output.append(entry)
+        failed = sum(1 for entry in output if not entry['success'])
+        metrics.registry.increment('ytsalt_batch_videos_total', len(videos) - failed, task=task, outcome='done')
+        if failed:
+            metrics.registry.increment('ytsalt_batch_videos_total', failed, task=task, outcome='failed')
+        return {
+            "success": failed == 0,
+            "task": task,
+            "results": output,
+            "batches": calls,
+            "retried": retried,
+            "failed": failed
+        }
+
+    def _pack_batch(self, task: str, items: List[Dict]) -> List[List[Dict]]:
+        """Greedily split items into batches that fit the prompt and output budgets"""
+        prompt_budget = int(os.getenv('YTSALT_BATCH_PROMPT_TOKENS', '8000'))
+        per_video = BATCH_OUTPUT_TOKENS[task]
+        max_videos = min(int(os.getenv('YTSALT_BATCH_MAX_VIDEOS', '20')),
+                         max(1, self.router.route(f'{task}_batch').max_tokens // per_video))
+        batches, batch, size = [], [], 0
+        for item in items:
+            tokens = prompts.item_tokens(item)
+            if batch and (len(batch) >= max_videos or size + tokens > prompt_budget):
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(item)
+            size += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _run_batch(self, task: str, batch: List[Dict]):
+        """
+        One batch completion
+
+        Returns:
+            tuple: (id -> raw suggestions for the videos answered usably, error or None)
+        """
+        try:
+            response = self._complete(
+                f'{task}_batch',
+                messages=prompts.render_batch(task, batch),
+                response_format={"type": "json_object"},
+                max_tokens=min(self.router.route(f'{task}_batch').max_tokens,
+                               len(batch) * BATCH_OUTPUT_TOKENS[task] + 100),
+                temperature=0.7
+            )
+            with stage('parse', f'{task}_batch'):
+                answers = self._parse_batch_answers(task, response.choices[0].message.content,
+                                                    {item['id'] for item in batch})
+            return answers, None
+        except Exception as e:
+            log.warning("batch_failed", task=task, videos=len(batch), error=str(e))
+            return {}, e
+
+    def _parse_batch_answers(self, task: str, response_text: str, ids: set) -> Dict[str, List[Dict]]:
+        """
+        Map a batch answer back to its videos, keeping only usable answers
+        (at least 3 titles, or 5 tags)
+        """
+        try:
+            data = json.loads(response_text)
+        except (TypeError, ValueError):
+            match = re.search(r'\{.*\}', response_text or '', re.DOTALL)
+            try:
+                data = json.loads(match.group(0)) if match else {}
+            except ValueError:
+                data = {}
+        videos = data.get('videos') if isinstance(data, dict) else None
+
+        key, field, minimum = ('titles', 'title', 3) if task == 'title' else ('tags', 'tag', 5)
+        answers = {}
+        for video in videos if isinstance(videos, list) else []:
+            if not isinstance(video, dict) or str(video.get('id')) not in ids:
+                continue
+            suggestions = [item for item in video.get(key) or []
+                           if isinstance(item, dict) and isinstance(item.get(field), str) and item[field].strip()]
+            if len(suggestions) >= minimum:
+                answers[str(video['id'])] = suggestions
+        return answers
+
+    def _batch_suggestions(self, task: str, video: Dict, raw: List[Dict]) -> List[Dict]:
+        """Batch answers in the shape of the single-video suggestions"""
+        if task == 'title':
+            return [{
+                'title': item['title'].strip(),
+                'reasoning': str(item.get('reasoning') or ''),
+                'metrics': text_metrics.title_metrics(item['title'].strip())
+            } for item in raw]
+        existing = {str(tag).lower() for tag in video.get('tags') or []}
+        return [{
+            'tag': item['tag'].strip(),
+            'category': str(item.get('category') or ''),
+            'reasoning': str(item.get('reasoning') or ''),
+            'is_new': item['tag'].strip().lower() not in existing,
+            'metrics': text_metrics.tag_metrics(item['tag'].strip())
+        } for item in raw]
+
+    def content_type(self, video_data: Dict) -> str:
+        """Content type of a video (see _determine_content_type), cached by metadata digest"""
+        key = fingerprint.digest([video_data.get('title'), video_data.get('description'), video_data.get('tags')])
+        content_type = self.content_types.get(key)
+        if content_type is None:
+            content_type = self._determine_content_type(video_data)
+            self.content_types.set(key, content_type)
+        return content_type
 
     def _determine_content_type(self, video_data: Dict) -> str:
         """
         Analyze video metadata to determine the content type
         """
         try:
-            title = video_data.get('title', '').lower()
-            description = video_data.get('description', '').lower()
-            tags = [tag.lower() for tag in video_data.get('tags', [])]
-            
-            # Define content type indicators
-            content_types = {
-                'tutorial': ['how to', 'tutorial', 'guide', 'learn', 'step by step'],
-                'review': ['review', 'hands on', 'unboxing', 'testing'],
-                'vlog': ['vlog', 'day in', 'daily', 'life'],
-                'entertainment': ['fun', 'funny', 'comedy', 'prank', 'challenge'],
-                'gaming': ['gameplay', 'playthrough', 'gaming', 'game'],
-                'educational': ['explained', 'understanding', 'education', 'learn'],
-                'news': ['news', 'update', 'latest', 'breaking'],
-                'commentary': ['reaction', 'thoughts on', 'discussing', 'opinion']
-            }
-            
-            # Check content against indicators
-            content_scores = {ctype: 0 for ctype in content_types}
-            
-            for ctype, indicators in content_types.items():
-                # Check title
-                if any(indicator in title for indicator in indicators):
-                    content_scores[ctype] += 2
-                
-                # Check description
-                if any(indicator in description for indicator in indicators):
-                    content_scores[ctype] += 1
-                    
-                # Check tags
-                if any(indicator in ' '.join(tags) for indicator in indicators):
-                    content_scores[ctype] += 1
-            
-            # Get the content type with highest score
-            max_score = max(content_scores.values())
-            if max_score > 0:
-                content_type = max(content_scores.items(), key=lambda x: x[1])[0]
-            else:
-                content_type = 'general'
-                
-            return content_type.capitalize()
-            
+            return content_classifier.classify(video_data)
         except Exception as e:
-            print(f"Error determining content type: {str(e)}")
+            log.warning("content_type_failed", error=str(e))
             return 'General'
 
     def optimize_title(self, video_data: Dict) -> Dict:
+        """
+        Generate optimized title suggestions based on video metadata
+        Served from the result store when the task's inputs are unchanged; 'variants'
+        samples several answers in one call and 'page'/'page_size' page through the
+        ranked pool (see services/variants.py).
+        """
+        result = self._with_stored_result('title', video_data, lambda: self._optimize_title(video_data))
+        return variants.page('title', result, video_data)
+
+    def _optimize_title(self, video_data: Dict) -> Dict:
         """
         Generate optimized title suggestions based on video metadata
         Note: Removed async since OpenAI's Python client handles async internally
         """
         try:
-            prompt = self._create_title_optimization_prompt(video_data)
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": """You are a YouTube SEO expert.
-                    Analyze the provided video metadata and suggest 5 optimized titles
-                    that will improve CTR while maintaining content accuracy."""},
-                    {"role": "user", "content": prompt}
-                ],
+            with stage('prompt_build', 'title'):
+                messages = self._create_title_optimization_prompt(video_data)
+            choices = variants.requested(video_data)
+
+            response, suggestions = self._complete_parsed(
+                'title',
+                self._parse_title_suggestions,
+                messages=messages,
                 temperature=0.7,
-                max_tokens=300
+                **self._variant_params(choices)
             )
 
-            # Debug logging
-            print("OpenAI Response received")
-            print(f"Response content: {response.choices[0].message.content[:100]}...")
+            log.debug("title_response", content=response.choices[0].message.content[:100])
 
-            suggestions = self._parse_title_suggestions(response.choices[0].message.content)
-            
             return {
                 "success": True,
-                "suggestions": suggestions,
+                "suggestions": variants.rank('title', suggestions, video_data, choices),
+                "variants": choices,
                 "reasoning": response.choices[0].message.content
             }
+        except UNAVAILABLE_ERRORS:
+            raise
         except Exception as e:
-            print(f"Error in optimize_title: {str(e)}")  # Debug logging
+            log.error("optimize_title_failed", error=str(e))
             return {
                 "success": False,
                 "error": f"Failed to generate suggestions: {str(e)}"
             }
 
-    def _create_title_optimization_prompt(self, video_data: Dict) -> str:
-        """
-        Creates a structured prompt for title optimization
+    def _create_title_optimization_prompt(self, video_data: Dict) -> List[Dict]:
         """
-        return f"""
-        Analyze the following video metadata and suggest 5 optimized titles:
-
-        Current Title: {video_data.get('title', 'No title provided')}
-        Description: {video_data.get('description', 'No description provided')}
-        Tags: {', '.join(video_data.get('tags', []) or ['No tags provided'])}
-
-        Please provide 5 optimized titles in the following format:
-        1. [Suggested Title]
-           [Explanation of why this title would perform better]
-        2. [Suggested Title]
-           [Explanation of why this title would perform better]
-
-        Requirements for each title:
-        - Must maintain the core message
-        - Should improve CTR (Click-Through Rate)
-        - Follow YouTube best practices
-        - Include relevant keywords
-        - Stay within 70 characters
-        - Be engaging and searchable
-
-        Provide each title with a clear explanation of its benefits.
+        Creates the chat messages for title optimization (see services/prompts.py)
         """
+        return prompts.render('title', video_data)
 
     def _parse_title_suggestions(self, response_text: str) -> List[Dict]:
         """
@@ -154,7 +625,7 @@ class AIService:
                         suggestions.append({
                             'title': current_title,
                             'reasoning': ' '.join(current_reasoning),
-                            'metrics': self._analyze_title_metrics(current_title)
+                            'metrics': text_metrics.title_metrics(current_title)
                         })
                     
                     # Extract new title
@@ -171,7 +642,7 @@ class AIService:
                 suggestions.append({
                     'title': current_title,
                     'reasoning': ' '.join(current_reasoning),
-                    'metrics': self._analyze_title_metrics(current_title)
+                    'metrics': text_metrics.title_metrics(current_title)
                 })
             
             # If no suggestions were parsed, try alternate parsing method
@@ -180,21 +651,9 @@ class AIService:
             
             return suggestions
         except Exception as e:
-            print(f"Error parsing suggestions: {str(e)}")  # Debug logging
+            log.warning("parse_title_failed", error=str(e))
             return []
 
-    def _analyze_title_metrics(self, title: str) -> Dict:
-        """
-        Analyze title metrics for additional insights
-        """
-        return {
-            'length': len(title),
-            'word_count': len(title.split()),
-            'has_number': any(char.isdigit() for char in title),
-            'character_limit_ok': len(title) <= 70,
-            'recommended': len(title) >= 30 and len(title) <= 70
-        }
-
     def _alternate_parse_method(self, response_text: str) -> List[Dict]:
         """
         Fallback parsing method for different response formats
@@ -219,103 +678,57 @@ class AIService:
                     suggestions.append({
                         'title': title,
                         'reasoning': reasoning,
-                        'metrics': self._analyze_title_metrics(title)
+                        'metrics': text_metrics.title_metrics(title)
                     })
             
             return suggestions
         except Exception as e:
-            print(f"Error in alternate parse method: {str(e)}")  # Debug logging
+            log.warning("alternate_parse_failed", error=str(e))
             return []
 
 
-    def _create_description_optimization_prompt(self, video_data: Dict) -> str:
+    def _create_description_optimization_prompt(self, video_data: Dict) -> List[Dict]:
         """
-        Creates a structured prompt for description optimization
+        Creates the chat messages for description optimization (see services/prompts.py)
         """
-        return f"""
-        Analyze the following video metadata and create 3 optimized descriptions:
-
-        Current Title: {video_data.get('title', 'No title provided')}
-        Current Description: {video_data.get('description', 'No description provided')}
-        Tags: {', '.join(video_data.get('tags', []) or ['No tags provided'])}
-
-        For each suggestion, please use this exact format:
-        1.
-        Description: [Your suggested description here]
-        Explanation: [Why this description would perform better]
+        return prompts.render('description', video_data)
 
-        2.
-        Description: [Your suggested description here]
-        Explanation: [Why this description would perform better]
-
-        3.
-        Description: [Your suggested description here]
-        Explanation: [Why this description would perform better]
-
-        Requirements for each description:
-        - Include relevant keywords naturally
-        - Start with a compelling hook
-        - Include clear call-to-actions (CTAs)
-        - Use proper formatting and line breaks
-        - Include relevant hashtags
-        - Optimize for both viewer engagement and SEO
-        - Maximum 5000 characters
-        - Include timestamps for longer videos
-        - Include relevant links and social media
-        """
-
-    def _analyze_description_metrics(self, description: str) -> Dict:
+    def optimize_description(self, video_data: Dict) -> Dict:
         """
-        Analyze description metrics for additional insights
+        Generate optimized description suggestions based on video metadata
+        Served from the result store when the task's inputs are unchanged; see
+        optimize_title for 'variants' and paging.
         """
-        if not description:
-            return {
-                'word_count': 0,
-                'line_count': 0,
-                'has_hashtags': False,
-                'has_links': False,
-                'character_limit_ok': True
-            }
-            
-        lines = description.split('\n')
-        words = description.split()
-        
-        return {
-            'word_count': len(words),
-            'line_count': len(lines),
-            'has_hashtags': '#' in description,
-            'has_links': 'http' in description.lower() or 'www.' in description.lower(),
-            'character_limit_ok': len(description) <= 5000,
-            'length': len(description)
-        }
+        result = self._with_stored_result('description', video_data, lambda: self._optimize_description(video_data))
+        return variants.page('description', result, video_data)
 
-    def optimize_description(self, video_data: Dict) -> Dict:
+    def _optimize_description(self, video_data: Dict) -> Dict:
         """
         Generate optimized description suggestions based on video metadata
         """
         try:
-            prompt = self._create_description_optimization_prompt(video_data)
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": """You are a YouTube SEO expert. 
-                    Analyze the video metadata and suggest 3 optimized descriptions 
-                    that will improve searchability and engagement while maintaining 
-                    content accuracy."""},
-                    {"role": "user", "content": prompt}
-                ],
+            with stage('prompt_build', 'description'):
+                messages = self._create_description_optimization_prompt(video_data)
+            choices = variants.requested(video_data)
+
+            response, suggestions = self._complete_parsed(
+                'description',
+                self._parse_description_suggestions,
+                messages=messages,
                 temperature=0.7,
-                max_tokens=1000
+                **self._variant_params(choices)
             )
 
             return {
                 "success": True,
-                "suggestions": self._parse_description_suggestions(response.choices[0].message.content),
+                "suggestions": variants.rank('description', suggestions, video_data, choices),
+                "variants": choices,
                 "reasoning": response.choices[0].message.content
             }
+        except UNAVAILABLE_ERRORS:
+            raise
         except Exception as e:
-            print(f"Error in optimize_description: {str(e)}")
+            log.error("optimize_description_failed", error=str(e))
             return {
                 "success": False,
                 "error": f"Failed to generate description suggestions: {str(e)}"
@@ -341,7 +754,7 @@ class AIService:
                         suggestions.append({
                             'description': current_description,
                             'reasoning': ' '.join(current_reasoning),
-                            'metrics': self._analyze_description_metrics(current_description)
+                            'metrics': text_metrics.description_metrics(current_description)
                         })
                     
                     # Start new description
@@ -367,31 +780,56 @@ class AIService:
                 suggestions.append({
                     'description': current_description,
                     'reasoning': ' '.join(current_reasoning),
-                    'metrics': self._analyze_description_metrics(current_description)
+                    'metrics': text_metrics.description_metrics(current_description)
                 })
             
             return suggestions
         except Exception as e:
-            print(f"Error parsing description suggestions: {str(e)}")
+            log.warning("parse_description_failed", error=str(e))
             return []
 
-    def _analyze_description_metrics(self, description: str) -> Dict:
+    def optimize_tags(self, video_data: Dict) -> Dict:
         """
-        Analyze description metrics for additional insights
+        Generate optimized tag suggestions based on video metadata and transcript
+        Served from the result store when the task's inputs are unchanged; see
+        optimize_title for 'variants' and paging.
         """
-        lines = description.split('\n')
-        words = description.split()
-        
-        return {
-            'length': len(description),
-            'word_count': len(words),
-            'line_count': len(lines),
-            'has_links': 'http' in description.lower(),
-            'has_hashtags': '#' in description,
-            'character_limit_ok': len(description) <= 5000
-        }
+        result = self._with_stored_result('tags', video_data, lambda: self._optimize_tags(video_data))
+        return variants.page('tags', self._apply_tag_corpus(result, video_data), video_data)
 
-    def optimize_tags(self, video_data: Dict) -> Dict:
+    def _apply_tag_corpus(self, result: Dict, video_data: Dict) -> Dict:
+        """
+        Annotate tag suggestions with their usage in the tag corpus and, when
+        requested, drop candidates the corpus does not back up.
+
+        Options come from video_data['tag_corpus']:
+            channels (list): Reference channels (e.g. competitors); default whole corpus
+            min_videos (int): Drop suggestions used on fewer reference videos
+            include_unused (bool): Add high-value reference tags the video/channel lacks
+        """
+        if not result.get('success') or self.tag_index is None or not len(self.tag_index):
+            return result
+        options = video_data.get('tag_corpus') or {}
+        channels = options.get('channels')
+
+        suggestions = result.get('suggestions') or []
+        stats = self.tag_index.tag_stats([s.get('tag', '') for s in suggestions], channels)
+        annotated = [dict(s, corpus=stats[s.get('tag', '')]) for s in suggestions]
+        min_videos = int(options.get('min_videos') or 0)
+        if min_videos:
+            annotated = [s for s in annotated if s['corpus']['videos'] >= min_videos]
+
+        result = dict(result, suggestions=annotated)
+        if options.get('include_unused'):
+            result['unused_high_value'] = self.tag_index.unused_high_value(
+                limit=int(options.get('limit') or 20),
+                channel=video_data.get('channel'),
+                used_tags=video_data.get('tags'),
+                reference_channels=channels
+            )
+        return result
+
+    def _optimize_tags(self, video_data: Dict) -> Dict:
         """
         Generate optimized tag suggestions based on video metadata and transcript
         """
@@ -399,8 +837,7 @@ class AIService:
             # Input validation
             if not isinstance(video_data, dict):
                 raise ValueError("Invalid video data format")
-            # Debug logging
-            print(f"Received video data with keys: {video_data.keys()}")
+            log.debug("optimize_tags_request", keys=sorted(video_data))
             
             # Extract existing keywords from current tags and description
             existing_keywords = set()
@@ -413,86 +850,52 @@ class AIService:
                 existing_keywords.update(desc_words)
             
             # Create prompt with transcript data
-            prompt = self._create_tag_optimization_prompt(video_data, existing_keywords)
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": """You are a YouTube SEO expert.
-                    Analyze the video metadata and transcript to suggest optimized tags.
-                    Pay special attention to key topics and terms mentioned in the transcript
-                    that aren't already covered in existing tags. Include:
-                    - Primary keywords from video content
-                    - Long-tail variations based on context
-                    - Related terms from transcript
-                    - Trending topics that relate to the content
-                    Maximum 500 characters total for all tags combined."""},
-                    {"role": "user", "content": prompt}
-                ],
+            with stage('prompt_build', 'tags'):
+                messages = self._create_tag_optimization_prompt(video_data, existing_keywords)
+            choices = variants.requested(video_data)
+            response, suggestions = self._complete_parsed(
+                'tags',
+                lambda text: self._parse_tag_suggestions(text, existing_keywords),
+                messages=messages,
                 temperature=0.7,
-                max_tokens=500
+                **self._variant_params(choices)
             )
-            
-            suggestions = self._parse_tag_suggestions(
-                response.choices[0].message.content,
-                existing_keywords
-            )
-            
+
             return {
                 "success": True,
-                "suggestions": suggestions,
+                "suggestions": variants.rank('tags', suggestions, video_data, choices),
+                "variants": choices,
                 "reasoning": response.choices[0].message.content
             }
+        except UNAVAILABLE_ERRORS:
+            raise
         except Exception as e:
-            print(f"Error in optimize_tags: {str(e)}")
+            log.error("optimize_tags_failed", error=str(e))
             return {
                 "success": False,
                 "error": f"Failed to generate tag suggestions: {str(e)}"
             }
 
-    def _create_tag_optimization_prompt(self, video_data: Dict, existing_keywords: set) -> str:
+    def _create_tag_optimization_prompt(self, video_data: Dict, existing_keywords: set) -> List[Dict]:
         """
-        Creates a structured prompt for tag optimization including transcript analysis
+        Creates the chat messages for tag optimization including transcript analysis
+        (see services/prompts.py)
         """
         # Safely extract transcript text
         transcript_text = ''
         if isinstance(video_data.get('transcript_data'), dict):
             transcript_text = video_data['transcript_data'].get('full_text', '')
         
-        # Debug logging
-        print(f"Creating prompt with transcript length: {len(transcript_text)}")
+        log.debug("tag_prompt", transcript_length=len(transcript_text))
         
-        return f"""
-        Analyze this video's content and metadata to suggest optimized tags:
-        
-        Title: {video_data.get('title', 'No title provided')}
-        Description: {video_data.get('description', 'No description provided')}
-        Current Tags: {', '.join(video_data.get('tags', []) or ['No tags provided'])}
-        
-        Transcript Content:
-        {transcript_text[:1500]}... [truncated]
-        
-        Existing Keywords: {', '.join(existing_keywords)}
-        
-        Please provide:
-        1. A list of 15-20 optimized tags
-        2. Categories for each tag (primary keyword, long-tail, related term, trending)
-        3. Explanation of why each tag was chosen
-        4. Indicate if the tag is newly discovered from transcript content
-        
-        Format each tag suggestion as:
-        Tag: [tag]
-        Category: [category]
-        Source: [metadata/transcript/both]
-        Reasoning: [brief explanation]
-        
-        Remember:
-        - Prioritize terms found in the transcript that aren't in existing tags
-        - Keep individual tags under 100 characters
-        - Total tags combined should not exceed 500 characters
-        - Include a mix of specific and broad terms
-        - Consider search volume and competition
-        - Maintain relevance to video content
-        """
+        return prompts.render('tags', {
+            'title': video_data.get('title'),
+            'description': video_data.get('description'),
+            'tags': video_data.get('tags') or [],
+            'transcript': transcript_text,
+            # Sorted so the same video always renders the same prompt
+            'existing_keywords': sorted(existing_keywords)
+        })
 
     def _parse_tag_suggestions(self, response_text: str, existing_keywords: set) -> List[Dict]:
         """
@@ -518,12 +921,12 @@ class AIService:
                     current_tag['source'] = line.split(':', 1)[1].strip()
                 elif line.lower().startswith('reasoning:'):
                     current_tag['reasoning'] = line.split(':', 1)[1].strip()
-                    current_tag['metrics'] = self._analyze_tag_metrics(current_tag['tag'])
+                    current_tag['metrics'] = text_metrics.tag_metrics(current_tag['tag'])
             
             if current_tag:
                 # Make sure the last tag has metrics if it wasn't added
                 if 'metrics' not in current_tag and 'tag' in current_tag:
-                    current_tag['metrics'] = self._analyze_tag_metrics(current_tag['tag'])
+                    current_tag['metrics'] = text_metrics.tag_metrics(current_tag['tag'])
                 suggestions.append(current_tag)
             
             # Sort suggestions to prioritize new tags from transcript
@@ -535,58 +938,45 @@ class AIService:
             
             return suggestions
         except Exception as e:
-            print(f"Error parsing tag suggestions: {str(e)}")
+            log.warning("parse_tags_failed", error=str(e))
             return []
 
-    def _analyze_tag_metrics(self, tag: str) -> Dict:
-        """
-        Analyze tag metrics for additional insights
-        """
-        return {
-            'length': len(tag),
-            'word_count': len(tag.split()),
-            'has_numbers': any(char.isdigit() for char in tag),
-            'is_recommended_length': 10 <= len(tag) <= 30
-        }
-
     def optimize_thumbnail(self, video_data: Dict) -> Dict:
         """
-        Generate thumbnail optimization suggestions based on video content type, metadata, and current thumbnail
+        Generate thumbnail optimization suggestions based on video content type, metadata, and current thumbnail.
+        The thumbnail is downloaded unless a recent copy is cached; the analysis is
+        served from the result store when neither the image bytes nor the metadata
+        changed.
         """
         try:
-            # Debug print
-            # print("Video data:", video_data)
-            
-            content_type = self._determine_content_type(video_data)
-            title = video_data.get('title', '')
             thumbnail_url = video_data.get('thumbnail_url', '')
-
             if not thumbnail_url:
                 raise ValueError("No thumbnail URL provided")
 
-            # Download the image from the URL
-            response = requests.get(thumbnail_url)
-            if response.status_code != 200:
-                raise ValueError(f"Failed to download thumbnail image: {response.status_code}")
+            image_bytes = self.fetch_thumbnail(thumbnail_url)
+        except UNAVAILABLE_ERRORS as e:
+            return self._fallback('thumbnail', video_data, e)
+        except Exception as e:
+            log.error("optimize_thumbnail_failed", error=str(e))
+            return {
+                "success": False,
+                "error": f"Error: {str(e)}"
+            }
 
-            # Convert WebP to JPEG
-            image = Image.open(io.BytesIO(response.content))
-            
-            # Convert to RGB if necessary (in case of RGBA WebP)
-            if image.mode in ('RGBA', 'LA'):
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                background.paste(image, mask=image.split()[-1])
-                image = background
-            elif image.mode != 'RGB':
-                image = image.convert('RGB')
+        return self._with_stored_result(
+            'thumbnail', video_data,
+            lambda: self._optimize_thumbnail(video_data, thumbnail_url, image_bytes),
+            thumbnail_bytes=image_bytes
+        )
 
-            # Save as JPEG in memory
-            jpeg_buffer = io.BytesIO()
-            image.save(jpeg_buffer, format='JPEG', quality=95)
-            jpeg_buffer.seek(0)
-            
-            # Encode the JPEG image
-            encoded_image = base64.b64encode(jpeg_buffer.getvalue()).decode('utf-8')
+    def _optimize_thumbnail(self, video_data: Dict, thumbnail_url: str, image_bytes: bytes) -> Dict:
+        """
+        Analyze the downloaded thumbnail image together with the video metadata
+        """
+        try:
+            content_type = self.content_type(video_data)
+            title = video_data.get('title', '')
+            encoded_image = self.encode_thumbnail(image_bytes)
 
             prompt = f"""
             Analyze this YouTube video thumbnail and provide specific optimization recommendations.
@@ -618,8 +1008,8 @@ class AIService:
             - Platform-specific considerations
             """
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = self._complete(
+                'thumbnail',
                 messages=[
                     {
                         "role": "user",
@@ -636,13 +1026,13 @@ class AIService:
                             }
                         ]
                     }
-                ],
-                max_tokens=1000
+                ]
             )
 
-            parsed_recommendations = self._parse_thumbnail_recommendations(
-                response.choices[0].message.content
-            )
+            with stage('parse', 'thumbnail'):
+                parsed_recommendations = self._parse_thumbnail_recommendations(
+                    response.choices[0].message.content
+                )
 
             return {
                 "success": True,
@@ -650,23 +1040,302 @@ class AIService:
                 "content_type": content_type,
                 "current_thumbnail_url": thumbnail_url
             }
+        except UNAVAILABLE_ERRORS:
+            raise
         except Exception as e:
-            print(f"Error in thumbnail optimization: {str(e)}")
+            log.error("optimize_thumbnail_failed", error=str(e))
             return {
                 "success": False,
                 "error": f"Error: {str(e)}"
             }
 
-    def _download_and_encode_image(self, image_url: str) -> str:
+    def fetch_thumbnail(self, thumbnail_url: str) -> bytes:
+        """
+        Thumbnail image bytes, from the cache or downloaded. A download already in
+        flight for the same URL (e.g. a prefetch) is joined rather than repeated.
+
+        Raises:
+            ValueError: If the download does not return 200
+        """
+        image_bytes = self.thumbnails.get(thumbnail_url)
+        if image_bytes is not None:
+            return image_bytes
+
+        def download():
+            with stage('image_fetch', 'thumbnail'):
+                response = http_client.fetch(thumbnail_url)
+            if response.status_code != 200:
+                raise ValueError(f"Failed to download thumbnail image: {response.status_code}")
+            self.thumbnails.set(thumbnail_url, response.content)
+            return response.content
+
+        return self._thumbnail_flights.run(thumbnail_url, download,
+                                           wait=lambda future: deadline.wait(future, 'image_fetch'))
+
+    def encode_thumbnail(self, image_bytes: bytes) -> str:
+        """
+        Thumbnail as the base64 JPEG sent to the vision model, cached by image digest
+        """
+        key = fingerprint.digest(image_bytes)
+        encoded_image = self.encoded_thumbnails.get(key)
+        if encoded_image is not None:
+            return encoded_image
+
+        from PIL import Image  # for thumbnail processing
+
+        with stage('image_encode', 'thumbnail'):
+            # Convert WebP to JPEG
+            image = Image.open(io.BytesIO(image_bytes))
+
+            # Convert to RGB if necessary (in case of RGBA WebP)
+            if image.mode in ('RGBA', 'LA'):
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.split()[-1])
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            # Save as JPEG in memory
+            jpeg_buffer = io.BytesIO()
+            image.save(jpeg_buffer, format='JPEG', quality=95)
+
+            # Encode the JPEG image
+            encoded_image = base64.b64encode(jpeg_buffer.getvalue()).decode('utf-8')
+
+        self.encoded_thumbnails.set(key, encoded_image)
+        return encoded_image
+
+    def compare_thumbnails(self, video_data: Dict, candidates: List) -> Dict:
         """
-        Download image from URL and return base64 encoded string
+        Rank several candidate thumbnails for one video with a single vision request.
+        Candidates are loaded, downscaled and measured locally in parallel, then sent
+        together; comparing the same images and metadata again is served from the
+        result store.
+
+        Args:
+            video_data (dict): Video metadata (title, description, tags)
+            candidates (list): Thumbnail URLs, or dicts with 'url' or 'image' (bytes,
+                base64 or a data URL) and an optional 'name'
+
+        Returns:
+            dict: Ranking (best first) with model feedback and local scores, plus
+                the local metrics of every candidate
         """
         try:
-            response = requests.get(image_url)
-            response.raise_for_status()
-            return base64.b64encode(response.content).decode('utf-8')
+            maximum = int(os.getenv('YTSALT_THUMBNAIL_COMPARE_MAX', '6'))
+            if not isinstance(candidates, list) or not 2 <= len(candidates) <= maximum:
+                raise ValueError(f"Provide between 2 and {maximum} thumbnail candidates")
+            prepared = self._prepare_thumbnail_candidates(candidates)
+        except UNAVAILABLE_ERRORS as e:
+            return self._fallback('thumbnail_compare', video_data, e)
         except Exception as e:
-            raise ValueError(f"Failed to process image: {str(e)}")
+            log.error("compare_thumbnails_failed", error=str(e))
+            return {
+                "success": False,
+                "error": f"Error: {str(e)}"
+            }
+
+        candidate_digests = '|'.join(candidate['digest'] for candidate in prepared)
+        # Key by the candidate set too, so a fallback never serves another set's ranking
+        compare_data = dict(video_data, video_id=(
+            f"{fingerprint.video_key(video_data)}:{fingerprint.digest(candidate_digests)}"))
+        return self._with_stored_result(
+            'thumbnail_compare', compare_data,
+            lambda: self._compare_thumbnails(compare_data, prepared),
+            thumbnail_bytes=candidate_digests.encode('utf-8')
+        )
+
+    def _prepare_thumbnail_candidates(self, candidates: List) -> List[Dict]:
+        """
+        Load, normalize, downscale and measure every candidate in parallel
+
+        Raises:
+            ValueError: If a candidate is malformed, cannot be downloaded or is not an image
+        """
+        def prepare(number, candidate):
+            if isinstance(candidate, str):
+                candidate = {'url': candidate}
+            if not isinstance(candidate, dict) or not (candidate.get('url') or candidate.get('image')):
+                raise ValueError(f"Candidate {number}: expected a URL or an uploaded image")
+            try:
+                if candidate.get('url'):
+                    image_bytes = self.fetch_thumbnail(candidate['url'])
+                else:
+                    image_bytes = thumbnail_metrics.decode_upload(candidate['image'])
+                with stage('image_encode', 'thumbnail_compare'):
+                    image_metrics, encoded_image = thumbnail_metrics.analyze(image_bytes)
+            except UNAVAILABLE_ERRORS:
+                raise
+            except Exception as e:
+                raise ValueError(f"Candidate {number}: {str(e)}")
+            return {
+                'candidate': number,
+                'name': candidate.get('name') or candidate.get('url') or f"Upload {number}",
+                'source': 'url' if candidate.get('url') else 'upload',
+                'digest': fingerprint.digest(image_bytes),
+                'metrics': image_metrics,
+                'encoded_image': encoded_image
+            }
+
+        # Each task runs in its own copy of the request context (deadline, stage timings)
+        with ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix='ytsalt-thumbnails') as pool:
+            futures = [pool.submit(contextvars.copy_context().run, prepare, number, candidate)
+                       for number, candidate in enumerate(candidates, 1)]
+            return [future.result() for future in futures]
+
+    def _compare_thumbnails(self, video_data: Dict, prepared: List[Dict]) -> Dict:
+        """
+        Send all prepared candidates in one multi-image request and merge the
+        model's ranking with the local metrics
+        """
+        try:
+            content_type = self.content_type(video_data)
+            content = [{
+                "type": "text",
+                "text": self._create_thumbnail_comparison_prompt(video_data, content_type, len(prepared))
+            }]
+            for candidate in prepared:
+                content.append({"type": "text", "text": f"Candidate {candidate['candidate']}:"})
+                content.append({
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{candidate['encoded_image']}",
+                        "detail": "low"
+                    }
+                })
+
+            degraded = False
+            try:
+                response = self._complete(
+                    'thumbnail_compare',
+                    messages=[{"role": "user", "content": content}],
+                    response_format={"type": "json_object"}
+                )
+                with stage('parse', 'thumbnail_compare'):
+                    parsed = self._parse_thumbnail_comparison(
+                        response.choices[0].message.content, len(prepared))
+            except UNAVAILABLE_ERRORS as e:
+                # The local metrics alone still give a ranking
+                log.warning("upstream_fallback", task='thumbnail_compare', reason=str(e))
+                deadline.record_fallback('thumbnail_compare', 'local')
+                parsed, degraded = None, True
+
+            result = self._thumbnail_comparison_result(prepared, parsed, content_type)
+            if degraded:
+                result.update(degraded=True, fallback='local')
+            return result
+        except Exception as e:
+            log.error("compare_thumbnails_failed", error=str(e))
+            return {
+                "success": False,
+                "error": f"Error: {str(e)}"
+            }
+
+    def _create_thumbnail_comparison_prompt(self, video_data: Dict, content_type: str, count: int) -> str:
+        return f"""
+            You are comparing {count} candidate thumbnails for the same YouTube video. The
+            images follow this message in order, each labelled "Candidate N".
+
+            Video Context:
+            Title: {video_data.get('title', '')}
+            Content Type: {content_type}
+            Description: {(video_data.get('description') or '')[:500]}
+
+            Judge each candidate on how likely it is to earn the click at feed size:
+            focal point and composition, text legibility, contrast and color,
+            emotional pull, and how well it matches the title.
+
+            Respond with a JSON object only, in this format:
+            {{"ranking": [{{"candidate": <number>, "score": <0-10>, "strengths": ["..."], "weaknesses": ["..."]}}],
+              "winner": <number>, "summary": "<one or two sentences>"}}
+            List every candidate in "ranking", best first.
+            """
+
+    def _parse_thumbnail_comparison(self, response_text: str, count: int):
+        """
+        Parse the comparison JSON into a validated ranking
+
+        Returns:
+            dict or None: {'ranking': [...], 'summary': str}, or None when the
+                response holds no usable ranking
+        """
+        try:
+            data = json.loads(response_text)
+        except ValueError:
+            match = re.search(r'\{.*\}', response_text or '', re.DOTALL)
+            if not match:
+                return None
+            try:
+                data = json.loads(match.group(0))
+            except ValueError:
+                return None
+        if not isinstance(data, dict):
+            return None
+
+        ranking = []
+        seen = set()
+        for item in data.get('ranking') or []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                number = int(item.get('candidate'))
+            except (TypeError, ValueError):
+                continue
+            if not 1 <= number <= count or number in seen:
+                continue
+            seen.add(number)
+            try:
+                score = round(float(item.get('score')), 1)
+            except (TypeError, ValueError):
+                score = None
+            ranking.append({
+                'candidate': number,
+                'score': score,
+                'strengths': [str(point) for point in item.get('strengths') or []][:5],
+                'weaknesses': [str(point) for point in item.get('weaknesses') or []][:5]
+            })
+        if not ranking:
+            return None
+        return {'ranking': ranking, 'summary': str(data.get('summary') or '')}
+
+    def _thumbnail_comparison_result(self, prepared: List[Dict], parsed, content_type: str) -> Dict:
+        """
+        Final ranking: the model's order, then any candidates it left out by local
+        score (the whole ranking is local when there is no usable model response)
+        """
+        by_number = {candidate['candidate']: candidate for candidate in prepared}
+        feedback = {item['candidate']: item for item in (parsed or {}).get('ranking', [])}
+        order = list(feedback)
+        order += [candidate['candidate']
+                  for candidate in sorted(prepared, key=lambda c: -c['metrics']['local_score'])
+                  if candidate['candidate'] not in feedback]
+
+        ranking = []
+        for rank, number in enumerate(order, 1):
+            candidate = by_number[number]
+            item = feedback.get(number, {})
+            ranking.append({
+                'rank': rank,
+                'candidate': number,
+                'name': candidate['name'],
+                'score': item.get('score'),
+                'local_score': candidate['metrics']['local_score'],
+                'strengths': item.get('strengths', []),
+                'weaknesses': item.get('weaknesses', [])
+            })
+
+        return {
+            "success": True,
+            "ranking": ranking,
+            "winner": ranking[0]['candidate'],
+            "summary": parsed['summary'] if parsed else '',
+            "ranking_source": 'model' if parsed else 'local',
+            "content_type": content_type,
+            "candidates": [
+                {key: candidate[key] for key in ('candidate', 'name', 'source', 'metrics')}
+                for candidate in prepared
+            ]
+        }
 
     def _parse_thumbnail_recommendations(self, response_text: str) -> Dict:
         """
@@ -720,7 +1389,7 @@ class AIService:
                 for key, value in recommendations.items()
             }
         except Exception as e:
-            print(f"Error parsing thumbnail recommendations: {str(e)}")
+            log.warning("parse_thumbnail_failed", error=str(e))
             return {
                 'error': f"Failed to parse recommendations: {str(e)}"
             }
@@ -769,7 +1438,7 @@ class AIService:
             
             return moments
         except Exception as e:
-            print(f"Error parsing key moments: {str(e)}")
+            log.warning("parse_key_moments_failed", error=str(e))
             return []
 
     def generate_thumbnail_optimization(self, video_data: Dict) -> Dict:
@@ -792,8 +1461,8 @@ class AIService:
             For each category, provide specific, actionable recommendations.
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            response = self._complete(
+                'thumbnail_elements',
                 messages=[
                     {"role": "system", "content": "You are a YouTube thumbnail optimization expert."},
                     {"role": "user", "content": prompt}
@@ -810,13 +1479,20 @@ class AIService:
                 }
             }
         except Exception as e:
-            print(f"Error generating thumbnail suggestions: {str(e)}")
+            log.error("thumbnail_suggestions_failed", error=str(e))
             return {
                 "success": False,
                 "error": f"Failed to generate thumbnail suggestions: {str(e)}"
             }
 
     def generate_key_moments(self, video_data: Dict) -> Dict:
+        """
+        Generate concise chapter markers from transcript with SEO optimization
+        Served from the result store when the task's inputs are unchanged.
+        """
+        return self._with_stored_result('key_moments', video_data, lambda: self._generate_key_moments(video_data))
+
+    def _generate_key_moments(self, video_data: Dict) -> Dict:
         """
         Generate concise chapter markers from transcript with SEO optimization
         """
@@ -828,86 +1504,29 @@ class AIService:
                     "error": "No transcript data available for chapter generation"
                 }
 
-            prompt = f"""
-            Generate SEO-optimized chapter titles for this video transcript.
-            Format each chapter with its timestamp in this exact format:
-            [timestamp] [brief chapter title]
-
-            Critical Requirements:
-            1. Timing Rules:
-               - Must start with "0:00" for the first chapter
-               - Minimum 10 seconds between chapters (YouTube requirement)
-               - Space chapters logically throughout the video
-               - Use proper timestamp format (M:SS or MM:SS)
-
-            2. Title Format Rules:
-               - Keep titles extremely concise (2-5 words)
-               - Must be clear and descriptive
-               - Use action words when possible
-               - Make titles scannable
-               - Capitalize key words
-
-            3. SEO Optimization:
-               - Use search-friendly keywords
-               - Match user search intent
-               - Include relevant topic terms
-               - Maintain natural language flow
-               - Consider common search phrases
-
-            4. Structure Requirements:
-               - Include introduction chapter
-               - Break into clear content segments
-               - Mark major transitions
-               - Note key demonstrations or examples
-               - Include conclusion/summary if applicable
-
-            Example Format:
-            0:00 Introduction
-            0:45 Project Overview
-            2:15 Main Demonstration
-            5:30 Key Results
-            8:45 Final Tips
-
-            Current Video Context:
-            Title: {video_data.get('title', '')}
-            Description: {video_data.get('description', '')}
-
-            Generate chapters based on this transcript:
-            {transcript_text[:2000]}...
-            """
+            with stage('prompt_build', 'key_moments'):
+                messages = prompts.render('key_moments', {
+                    'title': video_data.get('title'),
+                    'description': video_data.get('description'),
+                    'transcript': transcript_text
+                })
 
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert at creating YouTube chapters that maximize SEO and user engagement.
-                        Focus on creating chapters that:
-                        1. Help viewers navigate the content effectively
-                        2. Improve search visibility
-                        3. Maintain professional formatting
-                        4. Use strategic keywords"""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=500
+            # Chapters count as results only once they pass timing validation
+            response, validated_chapters = self._complete_parsed(
+                'key_moments',
+                lambda text: self._validate_chapters(self._parse_chapters(text)),
+                messages=messages,
+                temperature=0.7
             )
 
-            chapters = self._parse_chapters(response.choices[0].message.content)
-            
-            # Validate chapter timing
-            validated_chapters = self._validate_chapters(chapters)
-            
             return {
                 "success": True,
                 "key_moments": validated_chapters
             }
+        except UNAVAILABLE_ERRORS:
+            raise
         except Exception as e:
-            print(f"Error generating chapters: {str(e)}")
+            log.error("generate_chapters_failed", error=str(e))
             return {
                 "success": False,
                 "error": f"Failed to generate chapters: {str(e)}"
@@ -928,11 +1547,11 @@ class AIService:
                 validated_chapters.append(chapter)
                 previous_time = current_time
             else:
-                print(f"Skipping chapter at {chapter['timestamp']} due to insufficient time gap")
+                log.debug("chapter_skipped", timestamp=chapter['timestamp'], reason="insufficient time gap")
         
         # Ensure first chapter starts at 0:00
         if validated_chapters and validated_chapters[0]['time'] != 0:
-            print("Adding 0:00 Introduction chapter")
+            log.debug("chapter_intro_added")
             validated_chapters.insert(0, {
                 'time': 0,
                 'timestamp': '0:00',
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+ytSALT Cache Module
+A small thread-safe LRU cache with optional time-to-live, shared by the services
+for stored optimization results and other reusable artifacts, and a helper that
+lets concurrent callers share one in-flight fetch of the same item.
+
+Classes:
+    LRUCache: Bounded, thread-safe least-recently-used cache
+    SingleFlight: Collapses concurrent calls for the same key into one
+
+Version: 1.0.0
+License: MIT
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry when full.
+    Entries older than `ttl` seconds (if set) are treated as missing.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None, max_age=None):
+        """
+        Args:
+            key: Entry key
+            default: Returned for missing or expired entries
+            max_age (float, optional): Also treat entries older than this many
+                seconds as missing for this lookup (they stay cached)
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if self.ttl is None or age < self.ttl:
+                    if max_age is None or age < max_age:
+                        self._data.move_to_end(key)
+                        self.hits += 1
+                        return value
+                else:
+                    del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers that arrive while a call
+    for their key is in flight wait for its result instead of repeating it, e.g.
+    a request for a transcript the prefetcher is already downloading.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, wait=None):
+        """
+        Call fn(), or wait for the in-flight call with the same key
+
+        Args:
+            key: Identity of the work
+            fn (callable): Produces the result
+            wait (callable, optional): Waits on the in-flight Future, e.g.
+                deadline.wait; defaults to Future.result()
+
+        Returns:
+            The result of fn(). If the in-flight call fails, a waiting caller
+            runs fn() itself, so it never inherits someone else's failure.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            owner = future is None
+            if owner:
+                future = self._calls[key] = Future()
+                # Running futures cannot be cancelled by a waiter that gives up
+                future.set_running_or_notify_cancel()
+
+        if not owner:
+            try:
+                return wait(future) if wait else future.result()
+            except Exception:
+                if future.done() and not future.cancelled():
+                    return fn()
+                raise
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+ytSALT Cassette Module
+This module records upstream responses once and replays them later without any
+network. It is used to reproduce production behaviour offline and to run
+benchmarks and load tests on real data.
+
+Every upstream call goes through call() with a kind and a request key:
+    ytdlp       VideoService metadata extraction (key: video URL)
+    ytdlp_list  VideoService playlist/channel listing (key: URL and limit)
+    transcript  TranscriptService download (key: video id)
+    http        http_client.fetch, e.g. thumbnails (key: URL)
+    openai      AIService chat completions (key: all request parameters)
+
+Modes (YTSALT_CASSETTE):
+    off     Call the upstream (default; call() adds nothing)
+    record  Call the upstream and store the response and its duration
+    replay  Serve stored responses only; a missing one raises CassetteMiss
+    auto    Replay when a response is stored, otherwise call and record it
+
+Each interaction is one JSON file, <dir>/<kind>/<digest of the key>.json. It
+holds the key, the response, the recorded duration and the time of recording.
+Only successful calls are recorded.
+
+On replay, the recorded duration is reproduced: it is multiplied by
+YTSALT_CASSETTE_LATENCY_SCALE, or replaced by YTSALT_CASSETTE_LATENCY_<KIND>,
+and then spread by YTSALT_CASSETTE_LATENCY_JITTER. The jitter is seeded by the
+key, so a replay run is repeatable. A wait that would outlive the request
+deadline ends at the deadline with DeadlineExceeded, as the live call would.
+
+Classes:
+    CassetteMiss: Raised on replay when no response is stored for a request
+
+Functions:
+    mode: Current cassette mode
+    call: Run, record or replay one upstream call
+    recorded_keys: Keys stored for a kind
+    encode_http / decode_http: (De)serialize an httpx response
+    encode_completion / decode_completion: (De)serialize an OpenAI chat completion
+
+Environment:
+    YTSALT_CASSETTE - off, record, replay or auto (default off)
+    YTSALT_CASSETTE_DIR - Cassette directory (default backend/data/cassettes)
+    YTSALT_CASSETTE_LATENCY_SCALE - Multiplier for recorded durations (default 1, 0 replays instantly)
+    YTSALT_CASSETTE_LATENCY_<KIND> - Fixed replay latency in seconds for one kind
+    YTSALT_CASSETTE_LATENCY_JITTER - +/- fraction applied to replay latency (default 0)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import base64
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Any, Callable, List, Optional
+
+from services import deadline, metrics
+from services.cache import LRUCache
+from services.logger import get_logger
+
+log = get_logger('cassette')
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'data', 'cassettes')
+
+MODES = ('off', 'record', 'replay', 'auto')
+
+metrics.registry.describe('ytsalt_cassette_total',
+                          'Upstream calls recorded, replayed or missing from the cassettes', 'counter')
+
+# Stage a replayed wait is reported under when it runs into the deadline, as for live calls
+_STAGES = {'ytdlp': 'ytdlp_extract', 'ytdlp_list': 'ytdlp_extract', 'transcript': 'transcript_fetch',
+           'http': 'http_fetch', 'openai': 'llm_wait'}
+
+# Loaded interactions by file path; replayed load tests read each file once
+_loaded = LRUCache(maxsize=4096)
+
+
+class CassetteMiss(LookupError):
+    """Raised on replay when no response is stored for a request"""
+
+
+def mode() -> str:
+    """Cassette mode from YTSALT_CASSETTE"""
+    value = os.getenv('YTSALT_CASSETTE', 'off').lower()
+    if value not in MODES:
+        raise ValueError(f"YTSALT_CASSETTE must be one of {', '.join(MODES)}")
+    return value
+
+
+def directory() -> str:
+    return os.getenv('YTSALT_CASSETTE_DIR', DEFAULT_DIR)
+
+
+def _canonical(key: Any) -> str:
+    return json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _path(kind: str, key: Any) -> str:
+    digest = hashlib.sha256(_canonical(key).encode('utf-8')).hexdigest()[:32]
+    return os.path.join(directory(), kind, f"{digest}.json")
+
+
+def call(kind: str, key: Any, fn: Callable, encode: Optional[Callable] = None,
+         decode: Optional[Callable] = None):
+    """
+    Run one upstream call, or record or replay it (see the module docstring)
+
+    Args:
+        kind (str): Upstream kind, e.g. 'openai'
+        key: JSON-serializable request identity
+        fn (callable): The live call
+        encode (callable, optional): Response -> JSON-serializable value
+        decode (callable, optional): Stored value -> response
+
+    Returns:
+        The live or replayed response
+
+    Raises:
+        CassetteMiss: On replay without a stored response
+        DeadlineExceeded: If the replayed latency outlives the request deadline
+    """
+    current = mode()
+    if current == 'off':
+        return fn()
+
+    path = _path(kind, key)
+    if current in ('replay', 'auto'):
+        interaction = _load(path)
+        if interaction is not None:
+            metrics.registry.increment('ytsalt_cassette_total', kind=kind, outcome='replayed')
+            _wait(kind, key, interaction.get('elapsed', 0.0))
+            response = interaction['response']
+            return decode(response) if decode else response
+        if current == 'replay':
+            metrics.registry.increment('ytsalt_cassette_total', kind=kind, outcome='miss')
+            raise CassetteMiss(f"No recorded {kind} response for {_canonical(key)[:200]}")
+
+    started = time.perf_counter()
+    response = fn()
+    elapsed = time.perf_counter() - started
+    _save(path, {
+        'kind': kind,
+        'key': key,
+        'elapsed': round(elapsed, 4),
+        'recorded_at': time.time(),
+        'response': encode(response) if encode else response,
+    })
+    metrics.registry.increment('ytsalt_cassette_total', kind=kind, outcome='recorded')
+    return response
+
+
+def _load(path: str):
+    interaction = _loaded.get(path)
+    if interaction is None and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            interaction = json.load(f)
+        _loaded.set(path, interaction)
+    return interaction
+
+
+def _save(path: str, interaction: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(interaction, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+    _loaded.set(path, interaction)
+    log.debug("cassette_recorded", kind=interaction['kind'], path=path, elapsed=interaction['elapsed'])
+
+
+def _wait(kind: str, key: Any, recorded: float):
+    fixed = os.getenv(f"YTSALT_CASSETTE_LATENCY_{kind.upper()}")
+    seconds = float(fixed) if fixed else recorded * float(os.getenv('YTSALT_CASSETTE_LATENCY_SCALE', '1'))
+    jitter = float(os.getenv('YTSALT_CASSETTE_LATENCY_JITTER', '0'))
+    if jitter:
+        seconds *= 1 + random.Random(_canonical(key)).uniform(-jitter, jitter)
+    if seconds <= 0:
+        return
+    left = deadline.remaining()
+    if left is not None and left < seconds:
+        time.sleep(max(0.0, left))
+        raise deadline.exceeded(_STAGES.get(kind, kind))
+    time.sleep(seconds)
+
+
+def recorded_keys(kind: str) -> List[Any]:
+    """Keys of every interaction stored for a kind"""
+    folder = os.path.join(directory(), kind)
+    if not os.path.isdir(folder):
+        return []
+    keys = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.json'):
+            interaction = _load(os.path.join(folder, name))
+            keys.append(interaction.get('key'))
+    return keys
+
+
+class _RecordedResponse:
+    """The parts of an httpx.Response the services read"""
+
+    def __init__(self, status_code: int, content: bytes, headers: dict):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+
+def encode_http(response) -> dict:
+    return {
+        'status_code': response.status_code,
+        'headers': {'content-type': response.headers.get('content-type', '')},
+        'content': base64.b64encode(response.content).decode('ascii'),
+    }
+
+
+def decode_http(data: dict) -> _RecordedResponse:
+    return _RecordedResponse(data['status_code'], base64.b64decode(data['content']), data.get('headers') or {})
+
+
+def encode_completion(response) -> dict:
+    return response.model_dump(mode='json')
+
+
+def decode_completion(data: dict):
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion.model_validate(data)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+ytSALT Circuit Breaker Module
+This module provides per-upstream circuit breakers, so that when YouTube starts
+throttling or OpenAI has an incident, requests fail fast (or fall back) instead
+of queueing behind calls that are going to fail anyway.
+
+Each breaker tracks outcomes in a sliding window of one-second buckets. While
+closed, calls pass through; once the window holds at least `min_requests` calls
+and the failure rate reaches `failure_rate`, the breaker opens and rejects calls
+with CircuitOpenError for `open_seconds`. It then goes half-open and lets up to
+`half_open_probes` calls through: a success closes it, a failure re-opens it.
+
+Errors that say something about the request rather than the upstream (a private
+video, a video without captions, a 4xx from OpenAI) are passed to the caller but
+counted as successes, since the upstream answered. Request deadline hits count
+as neither: the budget is set by the client, and a stalled upstream still shows
+up through its own socket timeouts.
+
+Classes:
+    CircuitOpenError: Raised instead of calling an upstream whose breaker is open
+    CircuitBreaker: Failure-rate circuit breaker for one upstream
+
+Functions:
+    get_breaker: Shared breaker for an upstream name
+    state: Current state of one upstream's breaker
+    states: Snapshot of every breaker, for monitoring
+
+Environment:
+    YTSALT_BREAKER_WINDOW - Sliding window in seconds (default 30)
+    YTSALT_BREAKER_MIN_REQUESTS - Calls in the window before the rate is judged (default 10)
+    YTSALT_BREAKER_FAILURE_RATE - Failure share that opens the breaker (default 0.5)
+    YTSALT_BREAKER_OPEN_SECONDS - Time spent open before probing (default 30)
+    YTSALT_BREAKER_HALF_OPEN_PROBES - Concurrent probe calls while half-open (default 1)
+    YTSALT_BREAKER_<NAME>_<SETTING> - Per-upstream override, e.g. YTSALT_BREAKER_OPENAI_OPEN_SECONDS
+
+Version: 1.0.0
+License: MIT
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from services import deadline, metrics
+from services.logger import get_logger
+
+log = get_logger('circuit_breaker')
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Upstreams guarded in the services
+YOUTUBE = 'youtube'
+TRANSCRIPTS = 'transcripts'
+THUMBNAILS = 'thumbnails'
+OPENAI = 'openai'
+
+metrics.registry.describe('ytsalt_circuit_state',
+                          'Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)', 'gauge')
+metrics.registry.describe('ytsalt_circuit_rejected_total',
+                          'Calls rejected without contacting the upstream because its breaker was open', 'counter')
+metrics.registry.describe('ytsalt_circuit_transitions_total',
+                          'Circuit breaker state changes per upstream', 'counter')
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = max(0.0, retry_after)
+        super().__init__(f"{upstream} is unavailable (circuit open, retry in {self.retry_after:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one upstream. Safe to share between threads.
+    """
+
+    def __init__(self, name: str, window: float = 30, min_requests: int = 10, failure_rate: float = 0.5,
+                 open_seconds: float = 30, half_open_probes: int = 1,
+                 is_failure: Optional[Callable[[BaseException], bool]] = None):
+        """
+        Args:
+            name (str): Upstream name, used in errors and metrics
+            window (float): Sliding window in seconds
+            min_requests (int): Calls in the window before the failure rate is judged
+            failure_rate (float): Failure share (0-1) that opens the breaker
+            open_seconds (float): Time spent open before half-open probing
+            half_open_probes (int): Concurrent calls allowed while half-open
+            is_failure (callable, optional): Decides whether an exception counts
+                against the upstream; defaults to every exception
+        """
+        self.name = name
+        self.window = int(window)
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.is_failure = is_failure or (lambda exc: True)
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # [second, successes, failures], oldest first
+        self._buckets = deque()
+        self.rejected = 0
+        metrics.registry.set_gauge('ytsalt_circuit_state', 0, upstream=name)
+
+    @classmethod
+    def from_env(cls, name: str, **kwargs) -> 'CircuitBreaker':
+        """Build a breaker from YTSALT_BREAKER_* settings (per-upstream overrides first)"""
+        def setting(key, default, cast):
+            value = os.getenv(f"YTSALT_BREAKER_{name.upper()}_{key}") or os.getenv(f"YTSALT_BREAKER_{key}")
+            return cast(value) if value else default
+
+        return cls(name,
+                   window=setting('WINDOW', 30, float),
+                   min_requests=setting('MIN_REQUESTS', 10, int),
+                   failure_rate=setting('FAILURE_RATE', 0.5, float),
+                   open_seconds=setting('OPEN_SECONDS', 30, float),
+                   half_open_probes=setting('HALF_OPEN_PROBES', 1, int),
+                   **kwargs)
+
+    def _transition(self, state: str):
+        # Caller holds the lock
+        if state == self._state:
+            return
+        log.warning("circuit_state_change", upstream=self.name, previous=self._state, state=state)
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state != HALF_OPEN:
+            self._probes = 0
+        if state == CLOSED:
+            self._buckets.clear()
+        metrics.registry.set_gauge('ytsalt_circuit_state', _STATE_VALUES[state], upstream=self.name)
+        metrics.registry.increment('ytsalt_circuit_transitions_total', upstream=self.name, to=state)
+
+    def _trim(self, now: float):
+        horizon = int(now) - self.window
+        while self._buckets and self._buckets[0][0] <= horizon:
+            self._buckets.popleft()
+
+    def _counts(self, now: float):
+        self._trim(now)
+        successes = sum(bucket[1] for bucket in self._buckets)
+        failures = sum(bucket[2] for bucket in self._buckets)
+        return successes, failures
+
+    def _record(self, failed: bool):
+        now = time.monotonic()
+        second = int(now)
+        self._trim(now)
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        self._buckets[-1][2 if failed else 1] += 1
+        return now
+
+    def allow(self):
+        """
+        Reserve permission to call the upstream
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all probes in flight
+        """
+        with self._lock:
+            if self._state == OPEN:
+                waited = time.monotonic() - self._opened_at
+                if waited < self.open_seconds:
+                    self.rejected += 1
+                    metrics.registry.increment('ytsalt_circuit_rejected_total', upstream=self.name)
+                    raise CircuitOpenError(self.name, self.open_seconds - waited)
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    metrics.registry.increment('ytsalt_circuit_rejected_total', upstream=self.name)
+                    raise CircuitOpenError(self.name, 1.0)
+                self._probes += 1
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(CLOSED)
+            elif self._state == CLOSED:
+                self._record(failed=False)
+
+    def release(self):
+        """Give back a reservation without recording an outcome"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+                return
+            if self._state != CLOSED:
+                return
+            now = self._record(failed=True)
+            successes, failures = self._counts(now)
+            total = successes + failures
+            if total >= self.min_requests and failures / total >= self.failure_rate:
+                self._transition(OPEN)
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call fn through the breaker
+
+        Raises:
+            CircuitOpenError: Without calling fn, if the breaker is open
+        """
+        self.allow()
+        try:
+            result = fn(*args, **kwargs)
+        except deadline.DeadlineExceeded:
+            self.release()
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict:
+        """Current state, window counts and time until the next probe"""
+        with self._lock:
+            now = time.monotonic()
+            successes, failures = self._counts(now)
+            total = successes + failures
+            snapshot = {
+                'state': self._state,
+                'window_requests': total,
+                'window_failures': failures,
+                'failure_rate': round(failures / total, 3) if total else 0.0,
+                'rejected': self.rejected,
+            }
+            if self._state == OPEN:
+                snapshot['retry_after'] = round(max(0.0, self.open_seconds - (now - self._opened_at)), 1)
+            return snapshot
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, is_failure: Optional[Callable[[BaseException], bool]] = None) -> CircuitBreaker:
+    """
+    Shared breaker for an upstream, created from the environment on first use
+
+    Args:
+        name (str): Upstream name (YOUTUBE, TRANSCRIPTS, THUMBNAILS, OPENAI)
+        is_failure (callable, optional): Failure classifier, used when the breaker is created
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker.from_env(name, is_failure=is_failure)
+    return breaker
+
+
+def state(name: str) -> str:
+    """Current state of an upstream's breaker (CLOSED if it was never used)"""
+    breaker = _breakers.get(name)
+    return CLOSED if breaker is None else breaker.snapshot()['state']
+
+
+def states() -> Dict[str, Dict]:
+    """Snapshot of every breaker created so far"""
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
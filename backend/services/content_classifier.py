@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+ytSALT Content Classifier Module
+This module labels videos with a content type (Tutorial, Review, Gaming, ...)
+from indicator phrases in their title, description and tags.
+
+Scoring: a type gets 2 points when one of its indicators appears in the title,
+1 for the description and 1 for the tags (joined with spaces). The highest
+score wins, ties go to the type listed first, and a video without any
+indicator is 'General'. Matching is by lowercase substring.
+
+The indicator table is compiled once. Indicators implied by a shorter one of
+the same type ('funny' by 'fun') are dropped, and each remaining indicator maps
+to a bit mask of the types it votes for. A batch is classified by joining all
+of its lowercased fields into one string and scanning it once per indicator with
+str.find, skipping to the next field after a hit. The per-video work is then a
+lookup from three field masks to a label. This keeps the scanning in C, which
+measured faster in CPython than a regex alternation or a pure-Python
+multi-pattern automaton.
+
+Classes:
+    ContentClassifier: Compiled indicator-based content type classifier
+
+Functions:
+    classify: Content type of one video, using the shared classifier
+    classify_many: Content types of many videos, using the shared classifier
+
+Version: 1.0.0
+License: MIT
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+# Content type -> indicator phrases; order breaks ties
+CONTENT_TYPES = {
+    'tutorial': ['how to', 'tutorial', 'guide', 'learn', 'step by step'],
+    'review': ['review', 'hands on', 'unboxing', 'testing'],
+    'vlog': ['vlog', 'day in', 'daily', 'life'],
+    'entertainment': ['fun', 'funny', 'comedy', 'prank', 'challenge'],
+    'gaming': ['gameplay', 'playthrough', 'gaming', 'game'],
+    'educational': ['explained', 'understanding', 'education', 'learn'],
+    'news': ['news', 'update', 'latest', 'breaking'],
+    'commentary': ['reaction', 'thoughts on', 'discussing', 'opinion']
+}
+
+# Points for an indicator in each field
+FIELD_WEIGHTS = (2, 1, 1)  # title, description, tags
+
+# Videos per scan; bounds the size of the joined string
+_CHUNK = 2000
+
+
+def _fields(video_data: Dict) -> Tuple[str, str, str]:
+    tags = video_data.get('tags') or []
+    return (video_data.get('title') or '',
+            video_data.get('description') or '',
+            ' '.join(str(tag) for tag in tags))
+
+
+class ContentClassifier:
+    """
+    Content type classifier compiled from an indicator table. Safe to share
+    between threads.
+    """
+
+    def __init__(self, content_types: Dict[str, List[str]] = None):
+        """
+        Args:
+            content_types (dict, optional): Type -> indicator phrases (defaults to
+                CONTENT_TYPES); order breaks ties
+        """
+        content_types = content_types or CONTENT_TYPES
+        self.types = list(content_types)
+        self._labels = [content_type.capitalize() for content_type in self.types]
+
+        masks: Dict[str, int] = {}
+        for bit, indicators in enumerate(content_types.values()):
+            for indicator in indicators:
+                indicator = indicator.lower()
+                masks[indicator] = masks.get(indicator, 0) | 1 << bit
+        # An indicator containing another one with the same (or more) types never adds a vote
+        self._patterns = [
+            (indicator, mask) for indicator, mask in masks.items()
+            if not any(other != indicator and other in indicator and other_mask | mask == other_mask
+                       for other, other_mask in masks.items())
+        ]
+        # (title, description, tags) masks -> label; few distinct combinations occur
+        self._memo: Dict[Tuple[int, int, int], str] = {}
+
+    def field_masks(self, texts: List[str]) -> List[int]:
+        """
+        Types with an indicator in each text
+
+        Args:
+            texts (list): Texts to scan (case-insensitive)
+
+        Returns:
+            List[int]: One bit mask per text, bit i set for self.types[i]
+        """
+        # Lowercase per text: lowering can change a string's length ('İ')
+        texts = [text.lower() for text in texts]
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        # The separator is in no indicator, so a match never spans two texts
+        haystack = '\x00'.join(texts)
+        count = len(starts)
+        found = [0] * count
+        find = haystack.find
+
+        for indicator, mask in self._patterns:
+            position = find(indicator)
+            while position != -1:
+                index = bisect_right(starts, position) - 1
+                found[index] |= mask
+                if index + 1 == count:
+                    break
+                position = find(indicator, starts[index + 1])
+        return found
+
+    def scores(self, video_data: Dict) -> Dict[str, int]:
+        """Per-type score of one video"""
+        title, description, tags = self.field_masks(_fields(video_data))
+        return {content_type: self._score(bit, title, description, tags)
+                for bit, content_type in enumerate(self.types)}
+
+    @staticmethod
+    def _score(bit: int, title: int, description: int, tags: int) -> int:
+        return sum(weight for weight, mask in zip(FIELD_WEIGHTS, (title, description, tags)) if mask >> bit & 1)
+
+    def _label(self, title: int, description: int, tags: int) -> str:
+        key = (title, description, tags)
+        label = self._memo.get(key)
+        if label is None:
+            best, best_score = None, 0
+            for bit in range(len(self.types)):
+                score = self._score(bit, title, description, tags)
+                if score > best_score:
+                    best, best_score = bit, score
+            label = 'General' if best is None else self._labels[best]
+            self._memo[key] = label
+        return label
+
+    def classify(self, video_data: Dict) -> str:
+        """
+        Content type of one video
+
+        Args:
+            video_data (dict): Video metadata with title, description and tags
+
+        Returns:
+            str: Capitalized content type, or 'General'
+        """
+        return self._label(*self.field_masks(_fields(video_data)))
+
+    def classify_many(self, videos: Iterable[Dict]) -> List[str]:
+        """
+        Content types of many videos, e.g. a whole channel catalog
+
+        Args:
+            videos (iterable): Video metadata dicts
+
+        Returns:
+            List[str]: One content type per video, in order
+        """
+        labels = []
+        chunk = []
+        for video_data in videos:
+            chunk.extend(_fields(video_data))
+            if len(chunk) >= 3 * _CHUNK:
+                labels.extend(self._classify_fields(chunk))
+                chunk = []
+        if chunk:
+            labels.extend(self._classify_fields(chunk))
+        return labels
+
+    def _classify_fields(self, fields: List[str]) -> List[str]:
+        masks = self.field_masks(fields)
+        return [self._label(masks[i], masks[i + 1], masks[i + 2]) for i in range(0, len(masks), 3)]
+
+
+_default = None
+
+
+def _get_default() -> ContentClassifier:
+    global _default
+    if _default is None:
+        _default = ContentClassifier()
+    return _default
+
+
+def classify(video_data: Dict) -> str:
+    """Content type of one video (see ContentClassifier.classify)"""
+    return _get_default().classify(video_data)
+
+
+def classify_many(videos: Iterable[Dict]) -> List[str]:
+    """Content types of many videos (see ContentClassifier.classify_many)"""
+    return _get_default().classify_many(videos)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+ytSALT Deadline Module
+This module carries an end-to-end deadline for the current request in a context
+variable, so every service call made on behalf of the request can see how much
+time is left without threading a parameter through each signature.
+
+Upstream calls use the remaining budget in two ways. Calls that accept a timeout
+(httpx, the OpenAI SDK) get the remaining time as their timeout, so the socket
+is closed when the budget runs out. Blocking calls without one (yt-dlp,
+youtube-transcript-api) run on a helper thread via call(); the request stops
+waiting when the deadline passes and the helper is abandoned. Either way the
+caller sees DeadlineExceeded and can fall back to a cached or locally computed
+result.
+
+Classes:
+    DeadlineExceeded: Raised when the request's deadline has passed
+
+Functions:
+    start: Begin a deadline for the current context
+    end: Restore the previous deadline
+    deadline: Context manager form of start/end
+    remaining: Seconds left, or None without a deadline
+    expired: True once the deadline has passed
+    exceeded: Count a deadline hit and build its DeadlineExceeded
+    check: Raise DeadlineExceeded if the deadline has passed
+    timeout: Timeout to pass to an upstream call
+    call: Run a blocking function, waiting at most until the deadline
+    wait: Wait for a future, at most until the deadline
+    record_fallback: Count a degraded response
+
+Environment:
+    YTSALT_REQUEST_DEADLINE - Default per-request deadline in seconds (default 60, 0 disables)
+    YTSALT_DEADLINE_WORKERS - Helper threads for call() (default 64)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Optional
+
+from services import metrics
+
+_deadline = contextvars.ContextVar('ytsalt_deadline', default=None)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+metrics.registry.describe('ytsalt_deadline_exceeded_total',
+                          'Upstream calls abandoned because the request deadline passed', 'counter')
+metrics.registry.describe('ytsalt_fallback_total',
+                          'Degraded responses served from a cached or local fallback', 'counter')
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the current request's deadline has passed"""
+
+
+def default_seconds() -> float:
+    """Default request deadline from YTSALT_REQUEST_DEADLINE (0 means none)"""
+    return float(os.getenv('YTSALT_REQUEST_DEADLINE', '60'))
+
+
+def start(seconds: Optional[float]):
+    """
+    Begin a deadline `seconds` from now for the current context. An enclosing,
+    earlier deadline always wins.
+
+    Args:
+        seconds (float): Budget in seconds; None or <= 0 keeps the current deadline
+
+    Returns:
+        contextvars.Token: Token to pass to end
+    """
+    current = _deadline.get()
+    if seconds is None or seconds <= 0:
+        return _deadline.set(current)
+    at = time.monotonic() + seconds
+    return _deadline.set(at if current is None else min(current, at))
+
+
+def end(token):
+    """Restore the deadline that was active before start()"""
+    _deadline.reset(token)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Run the enclosed block under a deadline (see start)"""
+    token = start(seconds)
+    try:
+        yield
+    finally:
+        end(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline, or None when there is no deadline"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def exceeded(what: str, detail: str = '') -> DeadlineExceeded:
+    """Count a deadline hit for a stage and build the exception to raise"""
+    metrics.registry.increment('ytsalt_deadline_exceeded_total', stage=what)
+    return DeadlineExceeded(f"Deadline exceeded {detail or 'during ' + what}")
+
+
+def check(what: str = 'request'):
+    """Raise DeadlineExceeded if the deadline has already passed"""
+    if expired():
+        raise exceeded(what, f"before {what}")
+
+
+def timeout(default: Optional[float] = None, what: str = 'request') -> Optional[float]:
+    """
+    Timeout for an upstream call: the smaller of the remaining budget and default
+
+    Raises:
+        DeadlineExceeded: If no time is left
+    """
+    check(what)
+    left = remaining()
+    if left is None:
+        return default
+    return left if default is None else min(left, default)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=int(os.getenv('YTSALT_DEADLINE_WORKERS', '64')),
+                                           thread_name_prefix='ytsalt-deadline')
+    return _pool
+
+
+def wait(future, what: str = 'call'):
+    """
+    Wait for a future until the deadline
+
+    Raises:
+        DeadlineExceeded: If the deadline passes first (the future is cancelled if
+            it has not started). An exception raised by the future itself is
+            re-raised unchanged.
+    """
+    try:
+        return future.result(timeout=timeout(what=what))
+    except FutureTimeoutError:
+        # On 3.11+ this is the builtin TimeoutError, which the callee may raise
+        # itself (and DeadlineExceeded subclasses): only a wait that ran out is ours
+        if future.done():
+            raise
+        future.cancel()
+        raise exceeded(what) from None
+
+
+def call(fn, *args, what: str = 'call', **kwargs):
+    """
+    Run a blocking function that has no timeout of its own, giving up when the
+    deadline passes. Without a deadline the function runs inline.
+
+    The function runs on a helper thread in a copy of the current context, so
+    stage timings still reach the request. An abandoned call keeps running on
+    its helper thread until it returns.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes first
+    """
+    if remaining() is None:
+        return fn(*args, **kwargs)
+    check(what)
+    context = contextvars.copy_context()
+    return wait(_get_pool().submit(context.run, fn, *args, **kwargs), what)
+
+
+def record_fallback(component: str, kind: str):
+    """Count a degraded response served from a fallback of the given kind"""
+    metrics.registry.increment('ytsalt_fallback_total', component=component, kind=kind)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+ytSALT Fingerprint Module
+This module computes content digests for the individual fields a video's
+optimization tasks depend on, and combines them into per-task fingerprints.
+
+A task's fingerprint only covers the fields that task actually reads, so editing
+the description invalidates title/description/tag results but leaves, for
+example, stored key moments computed from an unchanged transcript reusable.
+
+Functions:
+    digest: Stable short digest of a string, bytes or JSON-like value
+    field_digests: Per-field digests for a video_data payload
+    task_fingerprint: Fingerprint of one task's inputs
+    video_key: Identity of the video a payload describes, independent of its content
+
+Version: 1.0.0
+License: MIT
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, Optional
+
+# Input fields each task depends on
+TASK_INPUTS = {
+    'title': ('title', 'description', 'tags'),
+    'description': ('title', 'description', 'tags'),
+    'tags': ('title', 'description', 'tags', 'transcript'),
+    'thumbnail': ('title', 'description', 'tags', 'thumbnail'),
+    # 'thumbnail' covers the digests of every candidate image, in order
+    'thumbnail_compare': ('title', 'description', 'tags', 'thumbnail'),
+    'key_moments': ('title', 'description', 'transcript'),
+}
+
+
+def digest(value) -> str:
+    """
+    Stable short digest of a value
+
+    Args:
+        value: str, bytes or any JSON-serializable value
+
+    Returns:
+        str: 32-character hex digest
+    """
+    if isinstance(value, bytes):
+        data = value
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+    else:
+        data = json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def transcript_text(video_data: Dict) -> str:
+    """Transcript text as sent by the frontend (transcript_data.full_text)"""
+    transcript_data = video_data.get('transcript_data')
+    if isinstance(transcript_data, dict):
+        return transcript_data.get('full_text') or ''
+    return ''
+
+
+def field_digests(video_data: Dict, thumbnail_bytes: Optional[bytes] = None) -> Dict[str, str]:
+    """
+    Digest every field a task may depend on
+
+    Args:
+        video_data (dict): Optimization request payload
+        thumbnail_bytes (bytes, optional): Downloaded thumbnail; the thumbnail digest
+            is only present when given
+
+    Returns:
+        dict: field name -> digest
+    """
+    digests = {
+        'title': digest(video_data.get('title') or ''),
+        'description': digest(video_data.get('description') or ''),
+        # Tags are a set: order and case do not change the optimization inputs
+        'tags': digest(sorted({tag.strip().lower() for tag in video_data.get('tags') or []})),
+        'transcript': digest(transcript_text(video_data)),
+    }
+    if thumbnail_bytes is not None:
+        digests['thumbnail'] = digest(thumbnail_bytes)
+    return digests
+
+
+def task_fingerprint(task: str, digests: Dict[str, str], salt: str = '') -> str:
+    """
+    Fingerprint of the inputs one task depends on
+
+    Args:
+        task (str): Task name (see TASK_INPUTS)
+        digests (dict): Output of field_digests
+        salt (str): Extra inputs that change the result, e.g. model or prompt version
+
+    Returns:
+        str: Hex fingerprint
+    """
+    parts = [task, salt] + [f"{field}={digests.get(field, '')}" for field in TASK_INPUTS[task]]
+    return digest('|'.join(parts))
+
+
+_THUMBNAIL_ID_RE = re.compile(r'/vi(?:_webp)?/([^/]+)/')
+
+
+def video_key(video_data: Dict) -> str:
+    """
+    Identity of the video a payload describes: its video_id, else the ID in its
+    thumbnail URL, else a digest of its title
+
+    Args:
+        video_data (dict): Optimization request payload
+
+    Returns:
+        str: Key that stays the same when the video's text is edited
+    """
+    if video_data.get('video_id'):
+        return str(video_data['video_id'])
+    match = _THUMBNAIL_ID_RE.search(video_data.get('thumbnail_url') or '')
+    if match:
+        return match.group(1)
+    return digest(video_data.get('title') or '')
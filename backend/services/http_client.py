@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+ytSALT HTTP Client Module
+This module owns the shared, pooled HTTP clients used for every outbound call,
+so connections (and their TLS handshakes) are reused across requests instead of
+being set up per call.
+
+There is one client per upstream: thumbnails (i.ytimg.com and friends) and the
+OpenAI API. Since each client talks to essentially one host, its connection
+limit is effectively a per-host limit. HTTP/2 is used when the optional `h2`
+package is installed.
+
+Functions:
+    get_http_client: Shared client for thumbnail and other media fetches
+    get_openai_http_client: Shared client handed to the OpenAI SDK
+    within_deadline: Cap a timeout at the request's remaining deadline
+    fetch: GET a URL through the shared media client
+    close_all: Close every shared client
+
+Environment:
+    YTSALT_HTTP_CONNECT_TIMEOUT - Connect timeout in seconds (default 5)
+    YTSALT_HTTP_READ_TIMEOUT - Read timeout for media fetches (default 15)
+    YTSALT_HTTP_MAX_CONNECTIONS - Max open connections for media fetches (default 50)
+    YTSALT_HTTP_KEEPALIVE_EXPIRY - Seconds an idle connection is kept (default 60)
+    YTSALT_OPENAI_READ_TIMEOUT - Read timeout for completions (default 120)
+    YTSALT_OPENAI_MAX_CONNECTIONS - Max open connections to the OpenAI API (default 100)
+    YTSALT_HTTP2 - Set to 0 to disable HTTP/2 even if h2 is installed
+
+Dependencies:
+    - httpx (h2 optional)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import atexit
+import os
+import threading
+
+_lock = threading.Lock()
+_clients = {}
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def http2_available():
+    """True if HTTP/2 is enabled and the optional h2 package is importable"""
+    if os.getenv('YTSALT_HTTP2', '1') == '0':
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _timeout(read_timeout_env, read_timeout_default):
+    import httpx
+
+    connect = _env_float('YTSALT_HTTP_CONNECT_TIMEOUT', '5')
+    return httpx.Timeout(connect=connect, read=_env_float(read_timeout_env, read_timeout_default),
+                         write=connect, pool=connect)
+
+
+def _build_client(read_timeout_env, read_timeout_default, max_connections_env, max_connections_default):
+    import httpx
+
+    max_connections = int(os.getenv(max_connections_env, max_connections_default))
+    transport = httpx.HTTPTransport(
+        http2=http2_available(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=_env_float('YTSALT_HTTP_KEEPALIVE_EXPIRY', '60'),
+        ),
+        # Retry only failed connection attempts; requests themselves are not replayed
+        retries=1,
+    )
+    return httpx.Client(
+        transport=transport,
+        timeout=_timeout(read_timeout_env, read_timeout_default),
+        follow_redirects=True,
+    )
+
+
+def _get_or_create(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def get_http_client():
+    """
+    Shared pooled client for thumbnail and other media downloads
+
+    Returns:
+        httpx.Client
+    """
+    return _get_or_create('media', lambda: _build_client(
+        'YTSALT_HTTP_READ_TIMEOUT', '15', 'YTSALT_HTTP_MAX_CONNECTIONS', '50'))
+
+
+def get_openai_http_client():
+    """
+    Shared pooled client for the OpenAI SDK (OpenAI(http_client=...))
+
+    Returns:
+        httpx.Client
+    """
+    return _get_or_create('openai', lambda: _build_client(
+        'YTSALT_OPENAI_READ_TIMEOUT', '120', 'YTSALT_OPENAI_MAX_CONNECTIONS', '100'))
+
+
+def openai_timeout():
+    """Per-request timeout for the OpenAI SDK, matching the pooled client's settings"""
+    return _timeout('YTSALT_OPENAI_READ_TIMEOUT', '120')
+
+
+def within_deadline(timeout, what='http'):
+    """
+    Cap every phase of an httpx.Timeout at the current request's remaining budget
+
+    Args:
+        timeout (httpx.Timeout): Configured timeout
+        what (str): Stage name reported if the deadline has already passed
+
+    Returns:
+        httpx.Timeout: timeout itself when there is no deadline
+
+    Raises:
+        DeadlineExceeded: If no time is left
+    """
+    import httpx
+    from services import deadline
+
+    left = deadline.timeout(what=what)
+    if left is None:
+        return timeout
+
+    def cap(value):
+        return left if value is None else min(value, left)
+    return httpx.Timeout(connect=cap(timeout.connect), read=cap(timeout.read),
+                         write=cap(timeout.write), pool=cap(timeout.pool))
+
+
+def fetch(url, **kwargs):
+    """
+    GET a URL through the shared media client. Under a request deadline the
+    timeout is capped at the remaining budget; calls go through the thumbnails
+    circuit breaker.
+
+    Args:
+        url (str): URL to fetch
+        **kwargs: Passed to httpx.Client.get (e.g. timeout=)
+
+    Returns:
+        httpx.Response (a recorded stand-in when replaying cassettes)
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before or during the fetch
+        CircuitOpenError: If the breaker is open
+    """
+    from services import cassette
+    return cassette.call('http', url, lambda: _fetch(url, **kwargs),
+                         encode=cassette.encode_http, decode=cassette.decode_http)
+
+
+def _fetch(url, **kwargs):
+    import httpx
+    from services import circuit_breaker, deadline
+
+    client = get_http_client()
+    if 'timeout' not in kwargs:
+        kwargs['timeout'] = within_deadline(client.timeout, 'http_fetch')
+
+    breaker = circuit_breaker.get_breaker(circuit_breaker.THUMBNAILS)
+    breaker.allow()
+    try:
+        response = client.get(url, **kwargs)
+    except httpx.TimeoutException as e:
+        if deadline.expired():
+            breaker.release()
+            raise deadline.exceeded('http_fetch') from e
+        breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    # 4xx (e.g. a missing maxres thumbnail) is about the URL, not the upstream
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def close_all():
+    """Close every shared client (called automatically at exit)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_all)
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+ytSALT Job Queue Module
+This module runs optimize and analyze tasks as background jobs, so a client does
+not hold an HTTP connection open for a whole LLM round trip and can pick the
+result up later, after a page refresh or from another process.
+
+Jobs live in a SQLite database: the task, its payload, status, attempts,
+progress, result and error. Worker threads claim queued jobs with an atomic
+UPDATE, so any number of processes (gunicorn workers) can share one database.
+A claimed job holds a lease; progress updates renew it. When the process dies,
+its jobs come back:
+    - a job whose lease ran out is queued again;
+    - at start-up, a job held by a process on this host that no longer exists is
+      queued again right away. A worker is identified by host, PID and a nonce
+      drawn when its JobQueue starts, so a restarted container whose new process
+      has the same PID (often 1) still recovers the jobs of the old one.
+
+A job is retried with exponential backoff when its handler raises, or when it
+returns a degraded result (an upstream was unavailable and a fallback was
+served). It fails without a retry when the handler returns an error result, since
+the same input would fail again. A degraded result on the last attempt is kept
+as the job's result.
+
+Job states: queued -> running -> succeeded | failed (running -> queued on retry)
+
+Classes:
+    JobQueue: SQLite-backed job store and worker pool
+
+Functions:
+    default_handlers: Task name -> handler for every optimize/analyze task
+    has_unfinished_jobs: True when the database holds queued or running jobs
+
+Environment:
+    YTSALT_JOBS_PATH - SQLite database (default backend/data/jobs.sqlite3)
+    YTSALT_JOB_WORKERS - Worker threads per process (default 2)
+    YTSALT_JOB_MAX_ATTEMPTS - Attempts before a job fails (default 3)
+    YTSALT_JOB_RETRY_DELAY - Seconds before the first retry, doubled each time (default 5)
+    YTSALT_JOB_DEADLINE - Deadline of one attempt in seconds (default 300, 0 disables)
+    YTSALT_JOB_LEASE - Seconds a running job is held without a progress update (default 600)
+    YTSALT_JOB_POLL - Seconds between polls for jobs queued by other processes (default 1)
+    YTSALT_JOB_RETENTION - Seconds finished jobs are kept (default 604800)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from services import deadline, metrics
+from services.logger import get_logger
+
+log = get_logger('job_queue')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data', 'jobs.sqlite3')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED = (SUCCEEDED, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    run_after REAL NOT NULL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, run_after, created_at);
+"""
+
+metrics.registry.describe('ytsalt_jobs_total',
+                          'Background jobs by task and outcome (queued, succeeded, failed, retried, recovered)',
+                          'counter')
+metrics.registry.describe('ytsalt_job_duration_seconds', 'Run time of one job attempt', 'histogram')
+
+
+def default_handlers() -> Dict[str, Callable]:
+    """
+    Task name -> handler(payload, progress) for every optimize/analyze task.
+    Handlers use the shared services from services.registry.
+    """
+    from services import registry
+
+    def ai_task(method):
+        return lambda payload, progress: getattr(registry.get_ai_service(), method)(payload)
+
+    def video_info(payload, progress):
+        return registry.get_video_service().get_video_info(payload['url'])
+
+    def transcript(payload, progress):
+        return registry.get_transcript_service().get_transcript(payload['url'])
+
+    def optimize_all(payload, progress):
+        return registry.get_ai_service().optimize_all(
+            payload, payload.get('tasks'), on_result=lambda task, result: progress(task))
+
+    def optimize_batch(payload, progress):
+        return registry.get_ai_service().optimize_batch(payload.get('task'), payload.get('videos'))
+
+    def compare_thumbnails(payload, progress):
+        return registry.get_ai_service().compare_thumbnails(payload, payload.get('candidates'))
+
+    def optimize_url(payload, progress):
+        # The whole pipeline for one URL: metadata, transcript, then every optimizer
+        url = payload['url']
+        progress('video_info')
+        video_data = registry.get_video_service().get_video_info(url)
+        if video_data.get('error'):
+            return {"success": False, "error": video_data['error']}
+        progress('transcript')
+        transcript_data = registry.get_transcript_service().get_transcript(url)
+        if transcript_data.get('transcript'):
+            video_data['transcript_data'] = {'full_text': transcript_data['transcript'],
+                                             'segments': transcript_data.get('segments') or []}
+        result = registry.get_ai_service().optimize_all(
+            video_data, payload.get('tasks'), on_result=lambda task, result: progress(task))
+        return dict(result, video=video_data)
+
+    return {
+        'video_info': video_info,
+        'transcript': transcript,
+        'title': ai_task('optimize_title'),
+        'description': ai_task('optimize_description'),
+        'tags': ai_task('optimize_tags'),
+        'thumbnail': ai_task('optimize_thumbnail'),
+        'thumbnail_compare': compare_thumbnails,
+        'key_moments': ai_task('generate_key_moments'),
+        'all': optimize_all,
+        'batch': optimize_batch,
+        'optimize_url': optimize_url,
+    }
+
+
+def _path() -> str:
+    return os.getenv('YTSALT_JOBS_PATH', DEFAULT_PATH)
+
+
+def has_unfinished_jobs(path: Optional[str] = None) -> bool:
+    """True when the database exists and holds queued or running jobs"""
+    path = path or _path()
+    if not os.path.exists(path):
+        return False
+    connection = sqlite3.connect(path, timeout=5)
+    try:
+        row = connection.execute("SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", (QUEUED, RUNNING)).fetchone()
+        return row is not None
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+
+
+def _worker_gone(worker: Optional[str], host: str, pid: int, nonce: str) -> bool:
+    """
+    True when the 'host:pid:nonce' worker that holds a job has exited: its PID
+    is ours with another nonce (a previous process, PID reused), or no process
+    has that PID any more. Workers on other hosts are left to their lease.
+    """
+    worker_host, worker_pid, worker_nonce = ((worker or '').split(':') + ['', ''])[:3]
+    if worker_host != host or not worker_pid.isdigit():
+        return False
+    if int(worker_pid) == pid:
+        return worker_nonce != nonce
+    return not _pid_alive(int(worker_pid))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    SQLite-backed job store with a pool of worker threads. Safe to share between
+    request threads and between processes using the same database.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable], path: Optional[str] = None, workers: int = None,
+                 max_attempts: int = None, retry_delay: float = None, job_deadline: float = None,
+                 lease: float = None, poll: float = None, retention: float = None):
+        """
+        Args:
+            handlers (dict): Task name -> handler(payload, progress) returning a result dict
+            path (str, optional): SQLite database file
+            workers (int): Worker threads (0 stores jobs without running them)
+            max_attempts (int): Default attempts before a job fails
+            retry_delay (float): Seconds before the first retry, doubled for each one
+            job_deadline (float): Deadline of one attempt in seconds
+            lease (float): Seconds a running job is held without a progress update
+            poll (float): Seconds between polls for jobs queued elsewhere
+            retention (float): Seconds finished jobs are kept
+        """
+        self.handlers = handlers
+        self.path = path or _path()
+        self.workers = int(os.getenv('YTSALT_JOB_WORKERS', '2')) if workers is None else workers
+        self.max_attempts = max_attempts or int(os.getenv('YTSALT_JOB_MAX_ATTEMPTS', '3'))
+        self.retry_delay = float(os.getenv('YTSALT_JOB_RETRY_DELAY', '5')) if retry_delay is None else retry_delay
+        self.job_deadline = float(os.getenv('YTSALT_JOB_DEADLINE', '300')) if job_deadline is None else job_deadline
+        self.lease = lease or float(os.getenv('YTSALT_JOB_LEASE', '600'))
+        self.poll = poll or float(os.getenv('YTSALT_JOB_POLL', '1'))
+        self.retention = retention or float(os.getenv('YTSALT_JOB_RETENTION', str(7 * 24 * 3600)))
+        self.nonce = uuid.uuid4().hex[:12]
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{self.nonce}"
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+        self._recover()
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections are not shared between threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self):
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        return _Transaction(connection)
+
+    def start(self) -> 'JobQueue':
+        """Start the worker threads"""
+        for number in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, name=f'ytsalt-job-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def shutdown(self):
+        """Stop taking jobs; jobs still running are recovered on the next start"""
+        self._stop.set()
+        self._wake.set()
+
+    def submit(self, task: str, payload: Dict, priority: int = 0, max_attempts: int = None) -> Dict:
+        """
+        Queue a job
+
+        Args:
+            task (str): Handler name
+            payload (dict): Handler input, stored as JSON
+            priority (int): Higher runs first
+            max_attempts (int, optional): Attempts before the job fails
+
+        Returns:
+            dict: The queued job (see get)
+
+        Raises:
+            ValueError: For an unknown task or a payload that is not JSON
+        """
+        if task not in self.handlers:
+            raise ValueError(f"Unknown task: {task}")
+        if not isinstance(payload, dict):
+            raise ValueError("Job payload must be an object")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, task, payload, status, priority, max_attempts, created_at, updated_at, run_after)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, task, json.dumps(payload), QUEUED, int(priority),
+                 int(max_attempts or self.max_attempts), now, now, now))
+        metrics.registry.increment('ytsalt_jobs_total', task=task, outcome='queued')
+        self._wake.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        """
+        Job state
+
+        Args:
+            job_id (str): Job id
+            include_result (bool): Include the result (can be large)
+
+        Returns:
+            dict: id, task, status, attempts, max_attempts, progress, result,
+                error, version and timestamps; None for an unknown id
+        """
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            'id': row['id'],
+            'task': row['task'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'max_attempts': row['max_attempts'],
+            'priority': row['priority'],
+            'progress': json.loads(row['progress']) if row['progress'] else None,
+            'error': row['error'],
+            'version': row['version'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+        if include_result:
+            job['result'] = json.loads(row['result']) if row['result'] else None
+        return job
+
+    def version(self, job_id: str) -> Optional[int]:
+        """Change counter of a job, for cheap polling; None for an unknown id"""
+        row = self._connect().execute("SELECT version FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else row['version']
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def _recover(self):
+        """Queue again the running jobs of processes on this host that have exited"""
+        host, pid = socket.gethostname(), os.getpid()
+        now = time.time()
+        recovered = 0
+        with self._transaction() as connection:
+            rows = connection.execute("SELECT id, task, worker FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            for row in rows:
+                if _worker_gone(row['worker'], host, pid, self.nonce):
+                    connection.execute(
+                        "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, run_after = ?,"
+                        " updated_at = ?, version = version + 1 WHERE id = ?",
+                        (QUEUED, now, now, row['id']))
+                    metrics.registry.increment('ytsalt_jobs_total', task=row['task'], outcome='recovered')
+                    recovered += 1
+        if recovered:
+            log.info("jobs_recovered", count=recovered)
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        now = time.time()
+        with self._transaction() as connection:
+            # Jobs of a worker that stopped renewing its lease are up for grabs again
+            expired = connection.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, version = version + 1"
+                " WHERE status = ? AND lease_until < ?", (QUEUED, RUNNING, now)).rowcount
+            if expired:
+                log.warning("job_leases_expired", count=expired)
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE status = ? AND run_after <= ?"
+                " ORDER BY priority DESC, run_after, created_at LIMIT 1", (QUEUED, now)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, lease_until = ?,"
+                " updated_at = ?, version = version + 1 WHERE id = ?",
+                (RUNNING, self.worker_id, now + self.lease, now, row['id']))
+            return row
+
+    def _purge(self):
+        cutoff = time.time() - self.retention
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                               (SUCCEEDED, FAILED, cutoff))
+
+    def _work(self):
+        last_purge = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - last_purge > 3600:
+                    self._purge()
+                    last_purge = time.monotonic()
+                row = self._claim()
+            except sqlite3.Error as e:
+                log.error("job_claim_failed", error=str(e))
+                row = None
+            if row is None:
+                self._wake.wait(self.poll)
+                self._wake.clear()
+                continue
+            try:
+                self._run(row)
+            except Exception as e:
+                # Storing the outcome failed (e.g. database locked): the job stays
+                # running until its lease runs out, but this worker keeps going
+                log.exception("job_run_failed", job=row['id'], task=row['task'], error=str(e))
+
+    def _progress(self, job_id: str, step: str, **details):
+        now = time.time()
+        progress = dict(details, step=step)
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET progress = ?, lease_until = ?, updated_at = ?, version = version + 1"
+                " WHERE id = ? AND worker = ?",
+                (json.dumps(progress), now + self.lease, now, job_id, self.worker_id))
+
+    def _run(self, row: sqlite3.Row):
+        job_id, task = row['id'], row['task']
+        attempt = row['attempts'] + 1
+        last_attempt = attempt >= row['max_attempts']
+        started = time.perf_counter()
+        try:
+            handler = self.handlers[task]
+            with deadline.deadline(self.job_deadline):
+                result = handler(json.loads(row['payload']), lambda step, **details: self._progress(
+                    job_id, step, **details))
+            if not isinstance(result, dict):
+                raise TypeError(f"Handler for {task} returned {type(result).__name__}")
+        except Exception as e:
+            log.warning("job_attempt_failed", job=job_id, task=task, attempt=attempt, error=str(e))
+            if last_attempt:
+                self._finish(job_id, task, FAILED, error=str(e))
+            else:
+                self._retry(job_id, task, attempt, str(e))
+            return
+        finally:
+            metrics.registry.observe('ytsalt_job_duration_seconds', time.perf_counter() - started, task=task)
+
+        if result.get('success') is False or result.get('error'):
+            self._finish(job_id, task, FAILED, result=result, error=str(result.get('error') or 'Task failed'))
+        elif result.get('degraded') and not last_attempt:
+            self._retry(job_id, task, attempt, 'Degraded result: an upstream was unavailable')
+        else:
+            self._finish(job_id, task, SUCCEEDED, result=result)
+
+    def _retry(self, job_id: str, task: str, attempt: int, error: str):
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL, run_after = ?,"
+                " updated_at = ?, version = version + 1 WHERE id = ? AND worker = ?",
+                (QUEUED, error, now + self.retry_delay * 2 ** (attempt - 1), now, job_id, self.worker_id))
+        metrics.registry.increment('ytsalt_jobs_total', task=task, outcome='retried')
+
+    def _finish(self, job_id: str, task: str, status: str, result: Dict = None, error: str = None):
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, worker = NULL, lease_until = NULL,"
+                " updated_at = ?, version = version + 1 WHERE id = ? AND worker = ?",
+                (status, None if result is None else json.dumps(result, default=str), error, now, job_id, self.worker_id))
+        metrics.registry.increment('ytsalt_jobs_total', task=task, outcome=status)
+        log.info("job_finished", job=job_id, task=task, status=status)
+
+
+class _Transaction:
+    """Commits on success, rolls back on error"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+ytSALT Logging Module
+This module provides structured, leveled logging that stays off the request path.
+
+Log calls only truncate their fields and enqueue the record; JSON formatting and
+the actual stdout write happen on a background QueueListener thread. The queue is
+bounded, and records are dropped (and counted) rather than blocking a request
+when the writer falls behind. Verbose payload logs are sampled.
+
+Classes:
+    StructuredLogger: Logger adapter that accepts keyword fields
+
+Functions:
+    get_logger: Returns a StructuredLogger for a component
+    truncate: Size-caps a field value for logging
+
+Environment:
+    YTSALT_LOG_LEVEL - Minimum level (default INFO)
+    YTSALT_LOG_FORMAT - 'json' (default) or 'text'
+    YTSALT_LOG_FIELD_MAX - Max characters kept per string field (default 256)
+    YTSALT_LOG_PAYLOAD_SAMPLE - Fraction of payload logs emitted at DEBUG (default 0.01)
+    YTSALT_LOG_QUEUE_SIZE - Max pending records before dropping (default 10000)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+ROOT_LOGGER_NAME = 'ytsalt'
+_RESERVED_KWARGS = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+_MAX_COLLECTION_ITEMS = 20
+
+_configure_lock = threading.Lock()
+_listener = None
+
+
+def truncate(value, limit: int, depth: int = 0):
+    """
+    Size-cap a value for logging. Long strings are cut with a marker and large
+    collections keep only their first items.
+
+    Args:
+        value: Any JSON-like value
+        limit (int): Max characters kept per string
+
+    Returns:
+        A JSON-serializable, size-capped copy of value
+    """
+    if isinstance(value, str):
+        if len(value) > limit:
+            return f"{value[:limit]}...(+{len(value) - limit} chars)"
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if depth >= 3:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        items = list(value.items())
+        capped = {str(k): truncate(v, limit, depth + 1) for k, v in items[:_MAX_COLLECTION_ITEMS]}
+        if len(items) > _MAX_COLLECTION_ITEMS:
+            capped['...'] = f"+{len(items) - _MAX_COLLECTION_ITEMS} keys"
+        return capped
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        capped = [truncate(v, limit, depth + 1) for v in items[:_MAX_COLLECTION_ITEMS]]
+        if len(items) > _MAX_COLLECTION_ITEMS:
+            capped.append(f"+{len(items) - _MAX_COLLECTION_ITEMS} items")
+        return capped
+    return truncate(str(value), limit, depth)
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        parts = [time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)),
+                 record.levelname, record.name, record.getMessage()]
+        parts.extend(f"{key}={value}" for key, value in fields.items())
+        line = ' '.join(str(part) for part in parts)
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the caller and defers formatting to the
+    listener thread
+    """
+
+    def __init__(self, log_queue, field_max: int):
+        super().__init__(log_queue)
+        self.field_max = field_max
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        fields = getattr(record, 'fields', None)
+        if fields:
+            record.fields = {key: truncate(value, self.field_max) for key, value in fields.items()}
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _configure():
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(os.getenv('YTSALT_LOG_LEVEL', 'INFO').upper())
+        root.propagate = False
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if os.getenv('YTSALT_LOG_FORMAT', 'json').lower() == 'text':
+            stream_handler.setFormatter(_TextFormatter())
+        else:
+            stream_handler.setFormatter(_JsonFormatter())
+
+        log_queue = queue.Queue(maxsize=int(os.getenv('YTSALT_LOG_QUEUE_SIZE', '10000')))
+        root.addHandler(_DroppingQueueHandler(log_queue, int(os.getenv('YTSALT_LOG_FIELD_MAX', '256'))))
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    Logger adapter that turns keyword arguments into structured fields:
+
+        log.info('video_info_fetched', url=url, duration_ms=12.5)
+    """
+
+    def __init__(self, logger, payload_sample_rate: float):
+        super().__init__(logger, {})
+        self.payload_sample_rate = payload_sample_rate
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _RESERVED_KWARGS}
+        if fields:
+            extra = dict(kwargs.get('extra') or {})
+            extra['fields'] = fields
+            kwargs['extra'] = extra
+        return msg, kwargs
+
+    def log(self, level, msg, *args, **kwargs):
+        # Check the level before building fields so disabled calls cost almost nothing
+        if self.logger.isEnabledFor(level):
+            msg, kwargs = self.process(msg, kwargs)
+            self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def exception(self, msg, *args, **kwargs):
+        kwargs['exc_info'] = True
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def payload(self, msg, **fields):
+        """
+        Log a verbose payload at DEBUG, sampled by YTSALT_LOG_PAYLOAD_SAMPLE.
+        Use for request bodies and results that are too large to log every time.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG) and random.random() < self.payload_sample_rate:
+            self.log(logging.DEBUG, msg, sampled=True, **fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """
+    Get a structured logger for a component
+
+    Args:
+        name (str): Component name, e.g. 'ai_service'
+
+    Returns:
+        StructuredLogger: Logger under the 'ytsalt' hierarchy
+    """
+    _configure()
+    return StructuredLogger(
+        logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}"),
+        float(os.getenv('YTSALT_LOG_PAYLOAD_SAMPLE', '0.01'))
+    )
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+ytSALT Metrics Module
+This module provides stage-level timing instrumentation for the services and
+aggregates it into Prometheus-style histograms and counters.
+
+Services wrap each expensive step (yt-dlp extract, transcript fetch, image fetch
+and encode, prompt build, LLM wait, parse) in the `stage()` context manager. Every
+stage is observed into a process-wide histogram and, while a request is active,
+appended to the request's timing list so it can be returned as a Server-Timing
+response header.
+
+Classes:
+    Histogram: Fixed-bucket latency histogram
+    MetricsRegistry: Process-wide collection of histograms, counters and gauges
+
+Functions:
+    stage: Context manager that times a named stage
+    start_request_timing / end_request_timing: Bracket a request's timings
+    server_timing_header: Format collected timings as a Server-Timing header
+    record_token_usage: Accumulate token usage from an OpenAI response
+
+Version: 1.0.0
+License: MIT
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Cumulative fixed-bucket histogram in the Prometheus sense
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape_label_value(value) -> str:
+    """Escape a label value for the Prometheus text format: backslash, double quote, newline"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return ','.join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of labelled histograms and counters
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels tuple) -> Histogram
+        self._counters = {}    # (name, labels tuple) -> float
+        self._gauges = {}      # (name, labels tuple) -> float
+        self._help = {}
+
+    def describe(self, name: str, help_text: str, metric_type: str):
+        self._help[name] = (help_text, metric_type)
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            histograms = sorted(
+                ((k, h.buckets, list(h.counts), h.total, h.count) for k, h in self._histograms.items()),
+                key=lambda item: item[0])
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+        lines = []
+        described = set()
+
+        def header(name):
+            if name not in described and name in self._help:
+                help_text, metric_type = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                described.add(name)
+
+        for (name, labels), buckets, counts, total, count in histograms:
+            header(name)
+            labels = dict(labels)
+            for bound, bucket_count in zip(buckets, counts):
+                lines.append(f"{name}_bucket{{{_format_labels(dict(labels, le=repr(bound)))}}} {bucket_count}")
+            lines.append(f"{name}_bucket{{{_format_labels(dict(labels, le='+Inf'))}}} {count}")
+            lines.append(f"{name}_sum{{{_format_labels(labels)}}} {total:.6f}")
+            lines.append(f"{name}_count{{{_format_labels(labels)}}} {count}")
+
+        for (name, labels), value in counters + gauges:
+            header(name)
+            lines.append(f"{name}{{{_format_labels(dict(labels))}}} {value:g}")
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+registry.describe('ytsalt_stage_duration_seconds',
+                  'Time spent in each service stage', 'histogram')
+registry.describe('ytsalt_http_request_duration_seconds',
+                  'End-to-end HTTP request latency by route', 'histogram')
+registry.describe('ytsalt_llm_tokens_total',
+                  'Tokens reported by OpenAI response.usage (kind="cached": prompt tokens '
+                  'served from the prefix cache)', 'counter')
+registry.describe('ytsalt_llm_requests_total',
+                  'Completed OpenAI chat completion calls', 'counter')
+
+_request_timings = contextvars.ContextVar('ytsalt_request_timings', default=None)
+
+
+def start_request_timing():
+    """
+    Start collecting stage timings for the current request
+
+    Returns:
+        contextvars.Token: Token to pass to end_request_timing
+    """
+    return _request_timings.set([])
+
+
+def end_request_timing(token) -> List[Tuple[str, float]]:
+    """
+    Stop collecting stage timings and return what was recorded
+
+    Returns:
+        List[Tuple[str, float]]: (stage, seconds) pairs in completion order
+    """
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
+
+
+@contextmanager
+def stage(name: str, task: Optional[str] = None):
+    """
+    Time a named stage, feeding both the histogram and the active request's timings
+
+    Args:
+        name (str): Stage name, e.g. 'ytdlp_extract' or 'llm_wait'
+        task (str, optional): Task the stage belongs to, e.g. 'title'
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        labels = {'stage': name}
+        if task:
+            labels['task'] = task
+        registry.observe('ytsalt_stage_duration_seconds', elapsed, **labels)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """
+    Format stage timings as a Server-Timing header value.
+    Repeated stages within one request are summed.
+
+    Args:
+        timings (list): (stage, seconds) pairs
+        total (float, optional): Whole-request duration in seconds
+
+    Returns:
+        str: Header value, e.g. 'llm_wait;dur=812.4, parse;dur=0.3'
+    """
+    merged = {}
+    for name, elapsed in timings:
+        merged[name] = merged.get(name, 0.0) + elapsed
+    if total is not None:
+        merged['total'] = total
+    return ', '.join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in merged.items())
+
+
+def record_token_usage(task: str, model: str, usage) -> Dict:
+    """
+    Accumulate token counts from an OpenAI `response.usage` object
+
+    Args:
+        task (str): Task the completion served
+        model (str): Model name
+        usage: `response.usage` (may be None)
+
+    Returns:
+        dict: prompt/completion/total token counts that were recorded, and
+            'cached': the prompt tokens served from the provider's prefix cache
+    """
+    registry.increment('ytsalt_llm_requests_total', task=task, model=model)
+    counts = {
+        'prompt': getattr(usage, 'prompt_tokens', 0) or 0,
+        'completion': getattr(usage, 'completion_tokens', 0) or 0,
+        'total': getattr(usage, 'total_tokens', 0) or 0,
+        'cached': getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', 0) or 0,
+    }
+    for kind, value in counts.items():
+        if value:
+            registry.increment('ytsalt_llm_tokens_total', value, task=task, model=model, kind=kind)
+    return counts
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+ytSALT Model Router Module
+This module decides which OpenAI model serves each AIService task, and with what
+output cap, latency budget and cost budget, so those can be tuned per route from
+the environment instead of being hard-coded at every call site.
+
+Models are grouped in tiers (fast, standard, vision) with their per-token
+prices. Each task has a route: its tier, a fixed max_tokens, an optional
+latency budget (seconds, applied as a deadline around the model call), an
+optional cost budget (USD per call, checked against an estimate before the call;
+cheaper tiers are tried when it does not fit), the minimum number of parsed
+results that counts as a usable answer, and an optional escalation tier that is
+tried once when the answer is not usable.
+
+Classes:
+    Tier: A model and its prices
+    Route: Model selection settings for one task
+    ModelRouter: Resolves routes to call parameters
+
+Functions:
+    get_router: Shared router built from the environment
+
+Environment:
+    YTSALT_TIER_<TIER>_MODEL - Model of a tier, e.g. YTSALT_TIER_FAST_MODEL=gpt-4o-mini
+    YTSALT_TIER_<TIER>_INPUT_COST / _OUTPUT_COST - USD per million tokens
+    YTSALT_TIER_<TIER>_CACHED_INPUT_COST - USD per million cached prompt tokens
+        (default half the input cost)
+    YTSALT_ROUTE_<TASK>_TIER - Tier of a task, e.g. YTSALT_ROUTE_TITLE_TIER=fast
+    YTSALT_ROUTE_<TASK>_MAX_TOKENS - Output token cap
+    YTSALT_ROUTE_<TASK>_LATENCY_BUDGET - Seconds allowed for the model call (0 disables)
+    YTSALT_ROUTE_<TASK>_MAX_COST - Estimated USD allowed per call (0 disables)
+    YTSALT_ROUTE_<TASK>_MIN_RESULTS - Parsed results below which the answer escalates
+    YTSALT_ROUTE_<TASK>_ESCALATION - Tier to retry on, or 'none'
+
+Version: 1.0.0
+License: MIT
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from services import metrics
+
+# Rough prompt size estimate; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+DEFAULT_TIERS = {
+    # name: (model, USD per million input tokens, USD per million output tokens)
+    'fast': ('gpt-4o-mini', 0.15, 0.60),
+    'standard': ('gpt-4', 30.0, 60.0),
+    'vision': ('gpt-4o-mini', 0.15, 0.60),
+}
+
+DEFAULT_ROUTES = {
+    # task: (tier, max_tokens, min_results, escalation)
+    'title': ('standard', 300, 3, None),
+    'description': ('standard', 1000, 1, None),
+    'tags': ('fast', 500, 5, 'standard'),
+    'key_moments': ('fast', 500, 3, 'standard'),
+    'thumbnail': ('vision', 1000, 0, None),
+    'thumbnail_compare': ('vision', 1200, 0, None),
+    'thumbnail_elements': ('standard', 800, 0, None),
+    # Multi-video batches; max_tokens is the output budget of one batch
+    'title_batch': ('fast', 4000, 0, None),
+    'tags_batch': ('fast', 4000, 0, None),
+}
+
+metrics.registry.describe('ytsalt_llm_cost_usd_total',
+                          'Estimated OpenAI spend from response.usage and tier prices', 'counter')
+metrics.registry.describe('ytsalt_llm_escalations_total',
+                          'Completions retried on the escalation tier after an unusable answer', 'counter')
+metrics.registry.describe('ytsalt_llm_budget_downgrades_total',
+                          'Completions moved to a cheaper tier to fit the cost budget', 'counter')
+
+
+class Tier:
+    """A model and its prices (USD per million tokens)"""
+
+    def __init__(self, name: str, model: str, input_cost: float, output_cost: float,
+                 cached_input_cost: Optional[float] = None):
+        self.name = name
+        self.model = model
+        self.input_cost = input_cost
+        self.output_cost = output_cost
+        self.cached_input_cost = input_cost / 2 if cached_input_cost is None else cached_input_cost
+
+    def estimate(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        """Cost in USD of a call with the given token counts (cached_tokens is part of prompt_tokens)"""
+        return ((prompt_tokens - cached_tokens) * self.input_cost + cached_tokens * self.cached_input_cost
+                + completion_tokens * self.output_cost) / 1_000_000
+
+
+class Route:
+    """Model selection settings for one task"""
+
+    def __init__(self, task: str, tier: str, max_tokens: int, min_results: int = 0,
+                 escalation: Optional[str] = None, latency_budget: float = 0, max_cost: float = 0):
+        self.task = task
+        self.tier = tier
+        self.max_tokens = max_tokens
+        self.min_results = min_results
+        self.escalation = escalation
+        self.latency_budget = latency_budget
+        self.max_cost = max_cost
+
+    def as_dict(self) -> Dict:
+        return {
+            'tier': self.tier,
+            'max_tokens': self.max_tokens,
+            'min_results': self.min_results,
+            'escalation': self.escalation,
+            'latency_budget': self.latency_budget or None,
+            'max_cost': self.max_cost or None,
+        }
+
+
+class ModelRouter:
+    """
+    Resolves a task's route to the parameters of one completion call
+    """
+
+    def __init__(self, tiers: Dict[str, Tier], routes: Dict[str, Route]):
+        self.tiers = tiers
+        self.routes = routes
+
+    @classmethod
+    def from_env(cls) -> 'ModelRouter':
+        """Defaults overridden by YTSALT_TIER_* and YTSALT_ROUTE_* settings"""
+        def setting(prefix, name, key, default, cast):
+            value = os.getenv(f"{prefix}_{name.upper()}_{key}")
+            return cast(value) if value else default
+
+        tiers = {
+            name: Tier(name,
+                       setting('YTSALT_TIER', name, 'MODEL', model, str),
+                       setting('YTSALT_TIER', name, 'INPUT_COST', input_cost, float),
+                       setting('YTSALT_TIER', name, 'OUTPUT_COST', output_cost, float),
+                       setting('YTSALT_TIER', name, 'CACHED_INPUT_COST', None, float))
+            for name, (model, input_cost, output_cost) in DEFAULT_TIERS.items()
+        }
+        routes = {}
+        for task, (tier, max_tokens, min_results, escalation) in DEFAULT_ROUTES.items():
+            escalation = setting('YTSALT_ROUTE', task, 'ESCALATION', escalation, str)
+            routes[task] = Route(
+                task,
+                tier=setting('YTSALT_ROUTE', task, 'TIER', tier, str),
+                max_tokens=setting('YTSALT_ROUTE', task, 'MAX_TOKENS', max_tokens, int),
+                min_results=setting('YTSALT_ROUTE', task, 'MIN_RESULTS', min_results, int),
+                escalation=None if escalation in (None, '', 'none') else escalation,
+                latency_budget=setting('YTSALT_ROUTE', task, 'LATENCY_BUDGET', 0, float),
+                max_cost=setting('YTSALT_ROUTE', task, 'MAX_COST', 0, float),
+            )
+        for route in routes.values():
+            for tier in (route.tier, route.escalation):
+                if tier is not None and tier not in tiers:
+                    raise ValueError(f"Route {route.task} uses unknown tier {tier!r}")
+        return cls(tiers, routes)
+
+    def route(self, task: str) -> Route:
+        """Route of a task (unknown tasks use the standard tier)"""
+        return self.routes.get(task) or Route(task, 'standard', 1000)
+
+    def model(self, task: str) -> str:
+        """Model a task normally runs on"""
+        return self.tiers[self.route(task).tier].model
+
+    def can_escalate(self, task: str) -> bool:
+        return self.route(task).escalation is not None
+
+    def params(self, task: str, messages: List[Dict], escalate: bool = False, choices: int = 1) -> Dict:
+        """
+        Model and max_tokens for one call, within the route's cost budget
+
+        Args:
+            task (str): Task name
+            messages (list): Chat messages, for the prompt size estimate
+            escalate (bool): Use the route's escalation tier
+            choices (int): Completions sampled in the call (n); each may use max_tokens
+
+        Returns:
+            dict: 'tier' (the chosen tier's name, to price the call with), 'model'
+                and 'max_tokens'
+        """
+        route = self.route(task)
+        tier = self.tiers[route.escalation if escalate and route.escalation else route.tier]
+        if route.max_cost:
+            prompt_tokens = _prompt_chars(messages) // CHARS_PER_TOKEN
+            completion_tokens = route.max_tokens * max(1, choices)
+            if tier.estimate(prompt_tokens, completion_tokens) > route.max_cost:
+                cheaper = sorted((t for t in self.tiers.values()
+                                  if t.estimate(prompt_tokens, completion_tokens) <= route.max_cost),
+                                 key=lambda t: -t.estimate(prompt_tokens, completion_tokens))
+                # The most capable tier that fits, else the cheapest there is
+                tier = cheaper[0] if cheaper else min(
+                    self.tiers.values(), key=lambda t: t.estimate(prompt_tokens, completion_tokens))
+                metrics.registry.increment('ytsalt_llm_budget_downgrades_total', task=task, tier=tier.name)
+        return {'tier': tier.name, 'model': tier.model, 'max_tokens': route.max_tokens}
+
+    def record_cost(self, task: str, tier: str, tokens: Dict) -> float:
+        """
+        Add the cost of a finished call to ytsalt_llm_cost_usd_total
+
+        Args:
+            task (str): Task name
+            tier (str): Tier the call was routed to (params()['tier']); tiers may
+                share a model at different prices, so the model alone is not enough
+            tokens (dict): Output of metrics.record_token_usage
+
+        Returns:
+            float: Cost in USD (0 for unknown tiers)
+        """
+        tier = self.tiers.get(tier)
+        if tier is None:
+            return 0.0
+        cost = tier.estimate(tokens.get('prompt', 0), tokens.get('completion', 0), tokens.get('cached', 0))
+        if cost:
+            metrics.registry.increment('ytsalt_llm_cost_usd_total', cost, task=task, tier=tier.name,
+                                       model=tier.model)
+        return cost
+
+    def describe(self) -> Dict:
+        """Tiers and routes, for diagnostics"""
+        return {
+            'tiers': {name: {'model': tier.model, 'input_cost': tier.input_cost,
+                             'cached_input_cost': tier.cached_input_cost, 'output_cost': tier.output_cost}
+                      for name, tier in self.tiers.items()},
+            'routes': {task: dict(route.as_dict(), model=self.model(task)) for task, route in self.routes.items()},
+        }
+
+
+def _prompt_chars(messages: List[Dict]) -> int:
+    total = 0
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, str):
+            total += len(content)
+        elif isinstance(content, list):
+            # Images are billed separately; only text parts count here
+            total += sum(len(part.get('text', '')) for part in content if part.get('type') == 'text')
+    return total
+
+
+_router = None
+
+
+def get_router() -> ModelRouter:
+    """Shared ModelRouter, built from the environment on first use"""
+    global _router
+    if _router is None:
+        _router = ModelRouter.from_env()
+    return _router
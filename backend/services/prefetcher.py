@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+ytSALT Prefetcher Module
+This module speculatively warms the caches a user is about to hit. Once
+/api/video-info has resolved a video, the next requests are almost always the
+transcript, the thumbnail analysis and the other optimizers, so the prefetcher
+starts their slow, token-free inputs in the background right away: the
+transcript download, the thumbnail download and JPEG encode, and the content
+type. Nothing that calls the LLM is prefetched.
+
+Prefetching must never compete with the requests it is meant to speed up:
+    - jobs run on a small, bounded worker pool behind a bounded queue;
+    - a video that is already queued or running is not scheduled again;
+    - when the queue is full, the oldest queued job is cancelled, since its
+      user has most likely moved on;
+    - a job that waited longer than max_wait is dropped when a worker takes it;
+    - steps whose upstream breaker is not closed are skipped;
+    - each job runs under its own deadline.
+A foreground request for something a job is still fetching joins that fetch
+instead of repeating it (see services.cache.SingleFlight).
+
+Classes:
+    Prefetcher: Bounded background warm-up of per-video caches
+
+Environment:
+    YTSALT_PREFETCH - Set to 1 to prefetch after /api/video-info (default off)
+    YTSALT_PREFETCH_WORKERS - Worker threads (default 2)
+    YTSALT_PREFETCH_QUEUE - Jobs that may wait for a worker (default 16)
+    YTSALT_PREFETCH_MAX_WAIT - Seconds a queued job stays worth running (default 30)
+    YTSALT_PREFETCH_DEADLINE - Deadline for one job in seconds (default 20)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from services import circuit_breaker, deadline, metrics
+from services.logger import get_logger
+
+log = get_logger('prefetcher')
+
+metrics.registry.describe('ytsalt_prefetch_jobs_total',
+                          'Prefetch jobs by outcome (scheduled, duplicate, cancelled, stale, finished)', 'counter')
+metrics.registry.describe('ytsalt_prefetch_steps_total',
+                          'Prefetch steps by outcome (done, cached, skipped, failed)', 'counter')
+metrics.registry.describe('ytsalt_prefetch_queued', 'Prefetch jobs waiting for a worker', 'gauge')
+
+
+def enabled() -> bool:
+    """True when YTSALT_PREFETCH=1"""
+    return os.getenv('YTSALT_PREFETCH') == '1'
+
+
+class Prefetcher:
+    """
+    Runs per-video warm-up jobs on a bounded background pool. Safe to share
+    between request threads.
+    """
+
+    def __init__(self, transcript_service, ai_service, workers: int = None, max_queued: int = None,
+                 max_wait: float = None, job_deadline: float = None):
+        """
+        Args:
+            transcript_service: TranscriptService whose cache receives transcripts
+            ai_service: AIService whose caches receive thumbnails and content types
+            workers (int): Worker threads
+            max_queued (int): Jobs that may wait for a worker
+            max_wait (float): Seconds a queued job stays worth running
+            job_deadline (float): Deadline for one job in seconds
+        """
+        self.transcript_service = transcript_service
+        self.ai_service = ai_service
+        self.workers = workers or int(os.getenv('YTSALT_PREFETCH_WORKERS', '2'))
+        self.max_queued = max(1, max_queued or int(os.getenv('YTSALT_PREFETCH_QUEUE', '16')))
+        self.max_wait = max_wait or float(os.getenv('YTSALT_PREFETCH_MAX_WAIT', '30'))
+        self.job_deadline = job_deadline or float(os.getenv('YTSALT_PREFETCH_DEADLINE', '20'))
+
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ytsalt-prefetch')
+        # video key -> Future of jobs not yet taken by a worker, oldest first
+        self._queued = OrderedDict()
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, url: str, video_info: Dict) -> bool:
+        """
+        Queue a warm-up job for a resolved video
+
+        Args:
+            url (str): Video URL the user requested
+            video_info (dict): VideoService.get_video_info() result
+
+        Returns:
+            bool: True if a job was queued
+        """
+        if video_info.get('error'):
+            return False
+        key = video_info.get('video_id') or url
+
+        with self._lock:
+            if key in self._queued or key in self._running:
+                metrics.registry.increment('ytsalt_prefetch_jobs_total', outcome='duplicate')
+                return False
+            while len(self._queued) >= self.max_queued:
+                oldest, future = self._queued.popitem(last=False)
+                if future.cancel():
+                    metrics.registry.increment('ytsalt_prefetch_jobs_total', outcome='cancelled')
+                    log.debug("prefetch_cancelled", video=oldest)
+            future = self._pool.submit(self._run, key, url, dict(video_info), time.monotonic())
+            self._queued[key] = future
+            metrics.registry.set_gauge('ytsalt_prefetch_queued', len(self._queued))
+        metrics.registry.increment('ytsalt_prefetch_jobs_total', outcome='scheduled')
+        return True
+
+    def _run(self, key: str, url: str, video_info: Dict, queued_at: float):
+        with self._lock:
+            self._queued.pop(key, None)
+            self._running.add(key)
+            metrics.registry.set_gauge('ytsalt_prefetch_queued', len(self._queued))
+        try:
+            if time.monotonic() - queued_at > self.max_wait:
+                metrics.registry.increment('ytsalt_prefetch_jobs_total', outcome='stale')
+                return
+            with deadline.deadline(self.job_deadline):
+                for step, prefetch in (('transcript', self._prefetch_transcript),
+                                       ('thumbnail', self._prefetch_thumbnail),
+                                       ('content_type', self._prefetch_content_type)):
+                    try:
+                        outcome = prefetch(url, video_info)
+                    except Exception as e:
+                        outcome = 'failed'
+                        log.debug("prefetch_step_failed", video=key, step=step, error=str(e))
+                    metrics.registry.increment('ytsalt_prefetch_steps_total', step=step, outcome=outcome)
+            metrics.registry.increment('ytsalt_prefetch_jobs_total', outcome='finished')
+        finally:
+            with self._lock:
+                self._running.discard(key)
+
+    def _prefetch_transcript(self, url: str, video_info: Dict) -> str:
+        if self.transcript_service.is_cached(url):
+            return 'cached'
+        if circuit_breaker.state(circuit_breaker.TRANSCRIPTS) != circuit_breaker.CLOSED:
+            return 'skipped'
+        self.transcript_service.get_transcript(url)
+        return 'done'
+
+    def _prefetch_thumbnail(self, url: str, video_info: Dict) -> str:
+        thumbnail_url = video_info.get('thumbnail_url')
+        if not thumbnail_url:
+            return 'skipped'
+        image_bytes = self.ai_service.thumbnails.get(thumbnail_url)
+        if image_bytes is None:
+            if circuit_breaker.state(circuit_breaker.THUMBNAILS) != circuit_breaker.CLOSED:
+                return 'skipped'
+            image_bytes = self.ai_service.fetch_thumbnail(thumbnail_url)
+            outcome = 'done'
+        else:
+            outcome = 'cached'
+        self.ai_service.encode_thumbnail(image_bytes)
+        return outcome
+
+    def _prefetch_content_type(self, url: str, video_info: Dict) -> str:
+        self.ai_service.content_type(video_info)
+        return 'done'
+
+    def pending(self) -> Dict:
+        """Queued and running job counts"""
+        with self._lock:
+            return {'queued': len(self._queued), 'running': len(self._running)}
+
+    def shutdown(self):
+        """Cancel queued jobs and stop accepting new ones"""
+        with self._lock:
+            for future in self._queued.values():
+                future.cancel()
+            self._queued.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+ytSALT Prompts Module
+This module holds the prompt templates of the text optimizers (title,
+description, tags, key moments) and renders them into chat messages.
+
+Every template has the same layout. The system message holds all of the static
+text: role, task instructions, requirements and the output format the parsers
+expect. The user message holds only the per-video fields, in a fixed order,
+each capped to a token budget. A prompt therefore starts with the same bytes for
+every video, so the provider's prefix cache can serve that part. OpenAI caches
+prefixes of 1024 tokens and more, reported as
+usage.prompt_tokens_details.cached_tokens, which services.metrics records. The
+budgets also bound the prompt size whatever the video's metadata looks like.
+
+Batch prompts follow the same layout. A static system message describes the
+task and the JSON answer, and the user message is a JSON list of videos, each
+with an id and smaller field budgets.
+
+Text is truncated at a word boundary near budget * CHARS_PER_TOKEN characters,
+and lists are truncated between items. A truncated field ends with '[truncated]'.
+
+Classes:
+    Field: One per-video value with its token budget
+    PromptTemplate: Static prefix plus budgeted fields
+
+Functions:
+    render: Chat messages for a task
+    render_batch: Chat messages for a batch of videos (JSON in, JSON out)
+    batch_item: One video of a batch prompt
+    item_tokens: Estimated prompt tokens of a batch item
+    fit: Truncate text to a token budget
+
+Environment:
+    YTSALT_PROMPT_<TASK>_<FIELD>_TOKENS - Token budget of a field,
+        e.g. YTSALT_PROMPT_TAGS_TRANSCRIPT_TOKENS=600
+
+Version: 1.0.0
+License: MIT
+"""
+
+import json
+import os
+import textwrap
+from typing import Dict, List
+
+from services.model_router import CHARS_PER_TOKEN
+
+TRUNCATED = ' [truncated]'
+
+
+def fit(text: str, budget: int) -> str:
+    """
+    Truncate text to a token budget
+
+    Args:
+        text (str): Text to fit
+        budget (int): Token budget (0 or less means unbounded)
+
+    Returns:
+        str: The text, or its head cut at a word boundary plus ' [truncated]'
+    """
+    limit = budget * CHARS_PER_TOKEN
+    if budget <= 0 or len(text) <= limit:
+        return text
+    head = text[:limit - len(TRUNCATED)]
+    cut = head.rfind(' ')
+    if cut > limit // 2:
+        head = head[:cut]
+    return head.rstrip() + TRUNCATED
+
+
+def _fit_list(items: List[str], budget: int, separator: str) -> str:
+    limit = budget * CHARS_PER_TOKEN
+    parts = []
+    size = 0
+    for item in items:
+        size += len(item) + (len(separator) if parts else 0)
+        if budget > 0 and size > limit - len(TRUNCATED):
+            return separator.join(parts) + TRUNCATED
+        parts.append(item)
+    return separator.join(parts)
+
+
+class Field:
+    """One per-video value in a prompt, with its token budget"""
+
+    def __init__(self, name: str, label: str, budget: int, default: str = '',
+                 separator: str = ', ', block: bool = False):
+        """
+        Args:
+            name (str): Key in the values passed to render()
+            label (str): Label written before the value
+            budget (int): Token budget
+            default (str): Written when the value is missing or empty
+            separator (str): Joins list values
+            block (bool): Start the value on its own line (long text)
+        """
+        self.name = name
+        self.label = label
+        self.budget = budget
+        self.default = default
+        self.separator = separator
+        self.block = block
+
+    def value(self, value) -> str:
+        """The value as text, within the budget"""
+        if isinstance(value, (list, tuple, set)):
+            value = _fit_list([str(item) for item in value], self.budget, self.separator)
+        else:
+            value = fit(str(value or '').strip(), self.budget)
+        return value or self.default
+
+    def render(self, value) -> str:
+        value = self.value(value)
+        return f"{self.label}:\n{value}" if self.block else f"{self.label}: {value}"
+
+
+class PromptTemplate:
+    """
+    Static instructions followed by budgeted per-video fields
+    """
+
+    def __init__(self, task: str, system: str, fields: List[Field]):
+        """
+        Args:
+            task (str): Task name, used for the budget settings
+            system (str): Static instructions, including the output format
+            fields (list): Per-video fields, in prompt order
+        """
+        self.task = task
+        self.system = textwrap.dedent(system).strip()
+        self.fields = fields
+        for field in fields:
+            setting = os.getenv(f"YTSALT_PROMPT_{task.upper()}_{field.name.upper()}_TOKENS")
+            if setting:
+                field.budget = int(setting)
+
+    def render(self, values: Dict) -> List[Dict]:
+        """
+        Chat messages for one video
+
+        Args:
+            values (dict): Field name -> value (str or list)
+
+        Returns:
+            List[dict]: System message with the static prefix, user message with the fields
+        """
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": '\n\n'.join(field.render(values.get(field.name)) for field in self.fields)}
+        ]
+
+    def prefix_tokens(self) -> int:
+        """Estimated size of the static prefix"""
+        return len(self.system) // CHARS_PER_TOKEN
+
+    def max_tokens(self) -> int:
+        """Estimated upper bound of a rendered prompt"""
+        return self.prefix_tokens() + sum(field.budget + 8 for field in self.fields)
+
+
+TITLE = PromptTemplate('title', """
+    You are a YouTube SEO expert.
+    Analyze the provided video metadata and suggest 5 optimized titles
+    that will improve CTR while maintaining content accuracy.
+
+    Please provide 5 optimized titles in the following format:
+    1. [Suggested Title]
+       [Explanation of why this title would perform better]
+    2. [Suggested Title]
+       [Explanation of why this title would perform better]
+
+    Requirements for each title:
+    - Must maintain the core message
+    - Should improve CTR (Click-Through Rate)
+    - Follow YouTube best practices
+    - Include relevant keywords
+    - Stay within 70 characters
+    - Be engaging and searchable
+
+    Provide each title with a clear explanation of its benefits.
+    """, [
+    Field('title', 'Current Title', 50, 'No title provided'),
+    Field('description', 'Description', 400, 'No description provided', block=True),
+    Field('tags', 'Tags', 120, 'No tags provided'),
+])
+
+DESCRIPTION = PromptTemplate('description', """
+    You are a YouTube SEO expert.
+    Analyze the video metadata and suggest 3 optimized descriptions
+    that will improve searchability and engagement while maintaining
+    content accuracy.
+
+    For each suggestion, please use this exact format:
+    1.
+    Description: [Your suggested description here]
+    Explanation: [Why this description would perform better]
+
+    2.
+    Description: [Your suggested description here]
+    Explanation: [Why this description would perform better]
+
+    3.
+    Description: [Your suggested description here]
+    Explanation: [Why this description would perform better]
+
+    Requirements for each description:
+    - Include relevant keywords naturally
+    - Start with a compelling hook
+    - Include clear call-to-actions (CTAs)
+    - Use proper formatting and line breaks
+    - Include relevant hashtags
+    - Optimize for both viewer engagement and SEO
+    - Maximum 5000 characters
+    - Include timestamps for longer videos
+    - Include relevant links and social media
+    """, [
+    Field('title', 'Current Title', 50, 'No title provided'),
+    Field('description', 'Current Description', 1200, 'No description provided', block=True),
+    Field('tags', 'Tags', 120, 'No tags provided'),
+])
+
+TAGS = PromptTemplate('tags', """
+    You are a YouTube SEO expert.
+    Analyze the video metadata and transcript to suggest optimized tags.
+    Pay special attention to key topics and terms mentioned in the transcript
+    that aren't already covered in existing tags. Include:
+    - Primary keywords from video content
+    - Long-tail variations based on context
+    - Related terms from transcript
+    - Trending topics that relate to the content
+    Maximum 500 characters total for all tags combined.
+
+    Please provide:
+    1. A list of 15-20 optimized tags
+    2. Categories for each tag (primary keyword, long-tail, related term, trending)
+    3. Explanation of why each tag was chosen
+    4. Indicate if the tag is newly discovered from transcript content
+
+    Format each tag suggestion as:
+    Tag: [tag]
+    Category: [category]
+    Source: [metadata/transcript/both]
+    Reasoning: [brief explanation]
+
+    Remember:
+    - Prioritize terms found in the transcript that aren't in existing tags
+    - Keep individual tags under 100 characters
+    - Total tags combined should not exceed 500 characters
+    - Include a mix of specific and broad terms
+    - Consider search volume and competition
+    - Maintain relevance to video content
+    """, [
+    Field('title', 'Title', 50, 'No title provided'),
+    Field('description', 'Description', 300, 'No description provided', block=True),
+    Field('tags', 'Current Tags', 120, 'No tags provided'),
+    Field('transcript', 'Transcript Content', 400, 'No transcript available', block=True),
+    Field('existing_keywords', 'Existing Keywords', 150, 'None'),
+])
+
+KEY_MOMENTS = PromptTemplate('key_moments', """
+    You are an expert at creating YouTube chapters that maximize SEO and user engagement.
+    Focus on creating chapters that:
+    1. Help viewers navigate the content effectively
+    2. Improve search visibility
+    3. Maintain professional formatting
+    4. Use strategic keywords
+
+    Generate SEO-optimized chapter titles for the video transcript you are given.
+    Format each chapter with its timestamp in this exact format:
+    [timestamp] [brief chapter title]
+
+    Critical Requirements:
+    1. Timing Rules:
+       - Must start with "0:00" for the first chapter
+       - Minimum 10 seconds between chapters (YouTube requirement)
+       - Space chapters logically throughout the video
+       - Use proper timestamp format (M:SS or MM:SS)
+
+    2. Title Format Rules:
+       - Keep titles extremely concise (2-5 words)
+       - Must be clear and descriptive
+       - Use action words when possible
+       - Make titles scannable
+       - Capitalize key words
+
+    3. SEO Optimization:
+       - Use search-friendly keywords
+       - Match user search intent
+       - Include relevant topic terms
+       - Maintain natural language flow
+       - Consider common search phrases
+
+    4. Structure Requirements:
+       - Include introduction chapter
+       - Break into clear content segments
+       - Mark major transitions
+       - Note key demonstrations or examples
+       - Include conclusion/summary if applicable
+
+    Example Format:
+    0:00 Introduction
+    0:45 Project Overview
+    2:15 Main Demonstration
+    5:30 Key Results
+    8:45 Final Tips
+    """, [
+    Field('title', 'Title', 50),
+    Field('description', 'Description', 200, block=True),
+    Field('transcript', 'Transcript', 500, block=True),
+])
+
+TEMPLATES = {template.task: template for template in (TITLE, DESCRIPTION, TAGS, KEY_MOMENTS)}
+
+# Batch prompts: many videos in one completion, answered as one JSON object.
+# Fields get smaller budgets than in the single-video prompts.
+BATCH_FIELDS = [
+    Field('title', 'title', 50),
+    Field('description', 'description', 120),
+    Field('tags', 'tags', 60),
+]
+
+BATCH_SYSTEM = {
+    'title': """
+        You are a YouTube SEO expert auditing several YouTube videos at once.
+        For every video in the user's JSON, suggest 5 optimized titles that will
+        improve CTR while maintaining content accuracy.
+
+        Requirements for each title:
+        - Must maintain the core message
+        - Follow YouTube best practices
+        - Include relevant keywords
+        - Stay within 70 characters
+        - Be engaging and searchable
+
+        Respond with a JSON object only, in this format:
+        {"videos": [{"id": "<id from the input>", "titles": [{"title": "...", "reasoning": "<one short sentence>"}]}]}
+        Include every input video exactly once, using its id.
+        """,
+    'tags': """
+        You are a YouTube SEO expert auditing several YouTube videos at once.
+        For every video in the user's JSON, suggest 10-15 optimized tags: primary
+        keywords, long-tail variations, related terms and trending topics that
+        relate to the content. Keep individual tags under 100 characters and all
+        tags of a video under 500 characters combined.
+
+        Respond with a JSON object only, in this format:
+        {"videos": [{"id": "<id from the input>", "tags": [{"tag": "...",
+          "category": "primary keyword|long-tail|related term|trending", "reasoning": "<a few words>"}]}]}
+        Include every input video exactly once, using its id.
+        """,
+}
+
+BATCH_SYSTEM = {task: textwrap.dedent(system).strip() for task, system in BATCH_SYSTEM.items()}
+
+
+def batch_item(key: str, values: Dict) -> Dict:
+    """One video of a batch prompt: its id and budgeted fields"""
+    item = {'id': key}
+    for field in BATCH_FIELDS:
+        item[field.name] = field.value(values.get(field.name))
+    return item
+
+
+def item_tokens(item: Dict) -> int:
+    """Estimated prompt tokens of one batch item"""
+    return len(json.dumps(item, ensure_ascii=False)) // CHARS_PER_TOKEN
+
+
+def render_batch(task: str, items: List[Dict]) -> List[Dict]:
+    """
+    Chat messages for a batch of videos
+
+    Args:
+        task (str): 'title' or 'tags'
+        items (list): batch_item() dicts
+
+    Returns:
+        List[dict]: Static system message, user message with the items as JSON
+    """
+    return [
+        {"role": "system", "content": BATCH_SYSTEM[task]},
+        {"role": "user", "content": json.dumps({'videos': items}, ensure_ascii=False)}
+    ]
+
+
+def render(task: str, values: Dict) -> List[Dict]:
+    """
+    Chat messages for a task (see PromptTemplate.render)
+
+    Args:
+        task (str): 'title', 'description', 'tags' or 'key_moments'
+        values (dict): Field name -> value
+
+    Returns:
+        List[dict]: Chat messages
+    """
+    return TEMPLATES[task].render(values)
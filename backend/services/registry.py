@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+ytSALT Service Registry Module
+This module creates the shared service instances lazily, on first use, so that
+importing the application stays cheap. Heavy dependencies (yt-dlp, openai, Pillow,
+httpx) are only imported when a route that needs them first runs, or when
+warm_up() is called.
+
+Functions:
+    get_video_service: Shared VideoService instance
+    get_transcript_service: Shared TranscriptService instance
+    get_ai_service: Shared AIService instance
+    get_transcript_index: Shared TranscriptIndex over fetched transcripts
+    get_tag_index: Shared TagIndex, loaded from disk, synced periodically and saved at exit
+    get_tag_completer: Shared TagCompleter, fed by the tag index
+    get_prefetcher: Shared Prefetcher, or None unless YTSALT_PREFETCH=1
+    get_job_queue: Shared JobQueue with its workers running
+    resume_jobs: Start the job workers if jobs were left unfinished
+    warm_up: Eagerly construct services and import their dependencies
+
+Version: 1.0.0
+License: MIT
+"""
+
+import atexit
+import threading
+
+# Re-entrant: some factories build the services they depend on
+_lock = threading.RLock()
+_instances = {}
+
+
+def _get_or_create(name, factory):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+
+def get_video_service():
+    """Returns the shared VideoService, creating it on first use"""
+    def factory():
+        from services.video_service import VideoService
+        return VideoService()
+    return _get_or_create('video', factory)
+
+
+def get_transcript_service():
+    """Returns the shared TranscriptService, creating it on first use"""
+    def factory():
+        from services.transcript_service import TranscriptService
+        return TranscriptService(index=get_transcript_index())
+    return _get_or_create('transcript', factory)
+
+
+def get_transcript_index():
+    """Returns the shared TranscriptIndex, opening its database on first use"""
+    def factory():
+        from services.transcript_index import TranscriptIndex
+        return TranscriptIndex()
+    return _get_or_create('transcript_index', factory)
+
+
+def get_ai_service():
+    """Returns the shared AIService, creating it on first use"""
+    def factory():
+        from services.ai_service import AIService
+        return AIService(tag_index=get_tag_index())
+    return _get_or_create('ai', factory)
+
+
+def get_tag_index():
+    """Returns the shared TagIndex, loading it from disk and starting its sync on first use"""
+    def factory():
+        from services.tag_index import TagIndex
+        index = TagIndex().start_sync()
+        atexit.register(index.close)
+        return index
+    return _get_or_create('tag_index', factory)
+
+
+def get_tag_completer():
+    """Returns the shared TagCompleter, seeded from and kept in step with the tag index"""
+    def factory():
+        from services.tag_completer import TagCompleter
+        completer = TagCompleter()
+        get_tag_index().subscribe(completer.add_counts)
+        return completer
+    return _get_or_create('tag_completer', factory)
+
+
+def get_prefetcher():
+    """Returns the shared Prefetcher, or None when prefetching is disabled"""
+    from services import prefetcher
+    if not prefetcher.enabled():
+        return None
+
+    def factory():
+        instance = prefetcher.Prefetcher(get_transcript_service(), get_ai_service())
+        atexit.register(instance.shutdown)
+        return instance
+    return _get_or_create('prefetcher', factory)
+
+
+def get_job_queue():
+    """Returns the shared JobQueue, opening the database and starting its workers on first use"""
+    def factory():
+        from services import job_queue
+        instance = job_queue.JobQueue(job_queue.default_handlers()).start()
+        atexit.register(instance.shutdown)
+        return instance
+    return _get_or_create('job_queue', factory)
+
+
+def resume_jobs():
+    """Start the job workers at boot when queued or interrupted jobs are waiting"""
+    from services import job_queue
+    if job_queue.has_unfinished_jobs():
+        get_job_queue()
+
+
+def warm_up():
+    """
+    Construct every service and import the heavy dependencies they defer, so the
+    first real request does not pay for them.
+    """
+    get_video_service().warm_up()
+    get_transcript_service().warm_up()
+    get_ai_service().warm_up()
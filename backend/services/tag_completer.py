@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+ytSALT Tag Completer Module
+This module answers tag prefix completions from an in-memory, frequency-ranked
+trie, so editors get suggestions as they type without any LLM call.
+
+Terms come from three sources, each with its own weight: tags of fetched videos,
+recurring n-grams from fetched transcripts, and AI tag suggestions an editor
+accepted. Every trie node caches the top-k terms of its subtree, so a lookup
+walks the prefix and returns that cached list; its cost depends only on the
+prefix length, not on the vocabulary size. Weights only ever grow, which keeps
+the cached lists exact under incremental updates.
+
+The shared completer is fed by the tag index (TagIndex.subscribe), which stores
+and merges the terms of every worker process, so all workers converge on the
+same weights.
+
+Classes:
+    TagCompleter: Frequency-ranked prefix completion over tags
+
+Functions:
+    transcript_ngrams: Recurring 1-3 word phrases from transcript text
+
+Environment:
+    YTSALT_TAG_COMPLETE_TOP_K - Completions cached per trie node (default 10)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List
+
+from services.tag_index import normalize_tag
+
+# Weight added per occurrence, by source
+SOURCE_WEIGHTS = {
+    'channel': 3.0,
+    'transcript': 1.0,
+    'accepted': 5.0,
+}
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does
+for from get got had has have he her here him his how i if in into is it its just know
+let like me more my no not now of on one or our out over really right she so some than
+that the their them then there these they this to too up us very was we well were what
+when where which who why will with would yeah you your gonna going okay oh um uh
+http https www com
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9'+#-]*")
+
+
+def transcript_ngrams(text: str, max_n: int = 3, min_count: int = 2, limit: int = 200) -> Counter:
+    """
+    Recurring 1-3 word phrases from transcript text
+
+    Phrases starting or ending with a stopword are skipped, as are phrases seen
+    fewer than min_count times.
+
+    Args:
+        text (str): Transcript text
+        max_n (int): Longest phrase length in words
+        min_count (int): Minimum occurrences to keep a phrase
+        limit (int): Maximum phrases returned
+
+    Returns:
+        Counter: phrase -> occurrences
+    """
+    words = _WORD_RE.findall(text.lower())
+    counts = Counter()
+    for n in range(1, max_n + 1):
+        for i in range(len(words) - n + 1):
+            first, last = words[i], words[i + n - 1]
+            if first in STOPWORDS or last in STOPWORDS or len(first) < 3 and n == 1:
+                continue
+            counts[' '.join(words[i:i + n])] += 1
+    return Counter(dict(
+        (phrase, count) for phrase, count in counts.most_common(limit) if count >= min_count))
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        # [(weight, term)] sorted by weight, descending, at most top_k entries
+        self.top = []
+
+
+class TagCompleter:
+    """
+    Prefix completion over tags, ranked by accumulated weight. Safe to share
+    between request threads.
+    """
+
+    def __init__(self, top_k: int = None):
+        self.top_k = top_k or int(os.getenv('YTSALT_TAG_COMPLETE_TOP_K', '10'))
+        self._root = _Node()
+        self._weights: Dict[str, float] = {}
+        self._display: Dict[str, str] = {}
+        self._sources: Dict[str, set] = {}
+        # Videos / transcripts already counted, so re-fetching does not inflate weights
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._weights)
+
+    def add(self, term: str, source: str = 'channel', count: float = 1):
+        """
+        Add weight to a term
+
+        Args:
+            term (str): Tag or phrase
+            source (str): One of SOURCE_WEIGHTS
+            count (float): Occurrences to add
+        """
+        key = normalize_tag(term)
+        if not key or len(key) > 100:
+            return
+        increment = SOURCE_WEIGHTS.get(source, 1.0) * count
+
+        with self._lock:
+            weight = self._weights.get(key, 0.0) + increment
+            self._weights[key] = weight
+            self._display.setdefault(key, ' '.join(str(term).split()))
+            self._sources.setdefault(key, set()).add(source)
+
+            node = self._root
+            self._update_top(node, key, weight)
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                node = child
+                self._update_top(node, key, weight)
+
+    def _update_top(self, node: _Node, key: str, weight: float):
+        top = node.top
+        for i, (_, existing) in enumerate(top):
+            if existing == key:
+                del top[i]
+                break
+        else:
+            if len(top) >= self.top_k and weight <= top[-1][0]:
+                return
+        # Lists are at most top_k long, so a linear insert is cheapest
+        position = len(top)
+        while position > 0 and top[position - 1][0] < weight:
+            position -= 1
+        top.insert(position, (weight, key))
+        del top[self.top_k:]
+
+    def add_counts(self, source: str, counts: Dict[str, float]):
+        """Add term -> occurrences counts from one source (a TagIndex listener)"""
+        for term, count in counts.items():
+            self.add(term, source, count)
+
+    def add_tags(self, tags: Iterable[str], source: str = 'channel'):
+        """Add one occurrence of each tag"""
+        for tag in tags or []:
+            self.add(tag, source)
+
+    def _first_time(self, key) -> bool:
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    def add_video(self, video_info: Dict):
+        """Add the tags of a VideoService.get_video_info() result (once per video)"""
+        if video_info.get('error'):
+            return
+        video_id = video_info.get('video_id')
+        if video_id is None or self._first_time(('video', video_id)):
+            self.add_tags(video_info.get('tags'), 'channel')
+
+    def add_transcript(self, text: str, video_id: str = None):
+        """Add recurring n-grams from a transcript (once per video when video_id is given)"""
+        if video_id is not None and not self._first_time(('transcript', video_id)):
+            return
+        for phrase, count in transcript_ngrams(text or '').items():
+            self.add(phrase, 'transcript', count)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Completions for a prefix, highest weight first
+
+        Args:
+            prefix (str): What the editor has typed so far
+            limit (int): Maximum completions (capped at top_k)
+
+        Returns:
+            List[dict]: {'tag', 'weight', 'sources'}
+        """
+        key = ' '.join(prefix.lower().split())
+        if prefix[-1:].isspace() and key:
+            key += ' '
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        # Copy the cached list; writers reorder it in place under the lock
+        top = list(node.top[:limit])
+        return [{'tag': self._display[term], 'weight': round(weight, 2),
+                 'sources': sorted(self._sources.get(term, ()))}
+                for weight, term in top]
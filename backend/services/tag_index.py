@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+ytSALT Tag Index Module
+This module keeps a persistent corpus of the tags used by every video whose
+metadata has been fetched, so tag usage across a channel or a competitor set can
+be queried without re-fetching anything.
+
+Tags and channels are interned to integer IDs. Each video is stored as an
+array of tag IDs, each tag has an array-backed posting list of the videos using
+it, and per-channel counters hold tag frequencies and a view-weighted value, so
+frequency queries never scan the corpus and co-occurrence only touches the
+posting list of the queried tag.
+
+The index also keeps the tag completer's other terms: recurring transcript
+phrases and accepted suggestions, as counts per source. Listeners (the
+completer) are told about every new video and term count, whether it was added
+in this process or picked up from the file.
+
+Every gunicorn worker holds its own copy, and the JSON file is shared between
+them. A save takes an exclusive lock on a side file, merges what other processes
+saved since this one last read the file, then replaces the file through a temp
+file unique to the process. For a video changed on both sides, the unsaved local
+version wins. Term counts only grow, so other processes' increments are added.
+A background thread saves every YTSALT_TAG_INDEX_SYNC seconds, or reads the file
+when another process changed it, so the workers converge and a crash loses at
+most one interval of additions.
+
+Classes:
+    TagIndex: In-memory tag corpus with JSON persistence
+
+Functions:
+    normalize_tag: Canonical form used to intern tags
+
+Environment:
+    YTSALT_TAG_INDEX_PATH - JSON file the index is loaded from and saved to
+        (default backend/data/tag_index.json)
+    YTSALT_TAG_INDEX_SYNC - Seconds between saves/reloads of the file (default 30, 0 disables)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import heapq
+import json
+import math
+import os
+import threading
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional
+
+from services.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process, nothing to lock against
+    fcntl = None
+
+log = get_logger('tag_index')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data', 'tag_index.json')
+
+
+def normalize_tag(tag: str) -> str:
+    """Lower-cases a tag and collapses whitespace"""
+    return ' '.join(str(tag).lower().split())
+
+
+class TagIndex:
+    """
+    Tag corpus over fetched videos. Safe to share between request threads.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else os.getenv('YTSALT_TAG_INDEX_PATH', DEFAULT_PATH)
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[str, Dict[str, float]], None]] = []
+        # (mtime, size, inode) of the file as last read or written; None before the first
+        self._stamp = None
+        self._stop = threading.Event()
+        self._sync_thread = None
+        self._reset()
+
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    def _reset(self):
+        self._dirty = False
+
+        # Interned tags: normalized form -> id, id -> display form (first seen)
+        self._tag_ids: Dict[str, int] = {}
+        self._tags: List[str] = []
+        self._channel_ids: Dict[str, int] = {}
+        self._channels: List[str] = []
+
+        # Per video (doc id): tag ids, channel id, views, alive flag
+        self._doc_ids: Dict[str, int] = {}
+        self._doc_keys: List[str] = []
+        self._doc_tags: List[array] = []
+        self._doc_channel = array('i')
+        self._doc_views = array('q')
+        self._alive = bytearray()
+
+        # Per tag: posting list of doc ids (ascending; dead docs are skipped, and
+        # compacted away once they outnumber the live ones)
+        self._postings: List[array] = []
+        # Per channel: tag id -> video count, tag id -> view-weighted value
+        self._channel_counts: Dict[int, Counter] = {}
+        self._channel_values: Dict[int, Counter] = {}
+        self._global_counts = Counter()
+        self._global_values = Counter()
+
+        # Completer terms: source -> term -> count, and the keys of inputs already
+        # counted (e.g. 'transcript:<video id>')
+        self._terms: Dict[str, Counter] = {}
+        self._term_keys = set()
+
+        # Changes not saved yet: videos by key, term increments, input keys
+        self._pending_videos: Dict[str, tuple] = {}
+        self._pending_terms: Dict[str, Counter] = {}
+        self._pending_keys = set()
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def _intern_tag(self, tag: str) -> int:
+        key = normalize_tag(tag)
+        tag_id = self._tag_ids.get(key)
+        if tag_id is None:
+            tag_id = self._tag_ids[key] = len(self._tags)
+            self._tags.append(str(tag).strip())
+            self._postings.append(array('I'))
+        return tag_id
+
+    def _intern_channel(self, channel: str) -> int:
+        channel = channel or ''
+        channel_id = self._channel_ids.get(channel)
+        if channel_id is None:
+            channel_id = self._channel_ids[channel] = len(self._channels)
+            self._channels.append(channel)
+            self._channel_counts[channel_id] = Counter()
+            self._channel_values[channel_id] = Counter()
+        return channel_id
+
+    @staticmethod
+    def _value(views: int) -> float:
+        # A tag on a 1M-view video is worth more than on a 1k-view one, but not 1000x more
+        return 1.0 + math.log10(1 + max(0, views))
+
+    def _remove_doc(self, doc_id: int):
+        self._alive[doc_id] = 0
+        channel_id = self._doc_channel[doc_id]
+        value = self._value(self._doc_views[doc_id])
+        for tag_id in self._doc_tags[doc_id]:
+            self._channel_counts[channel_id][tag_id] -= 1
+            self._channel_values[channel_id][tag_id] -= value
+            self._global_counts[tag_id] -= 1
+            self._global_values[tag_id] -= value
+
+    def _update_views(self, doc_id: int, views: int):
+        """Re-weight a video whose view count changed, keeping its doc slot"""
+        delta = self._value(views) - self._value(self._doc_views[doc_id])
+        channel_values = self._channel_values[self._doc_channel[doc_id]]
+        for tag_id in self._doc_tags[doc_id]:
+            channel_values[tag_id] += delta
+            self._global_values[tag_id] += delta
+        self._doc_views[doc_id] = views
+
+    def _compact(self):
+        """Drop dead doc slots and renumber the live docs, keeping their order"""
+        renumbered = {}
+        doc_keys, doc_tags = [], []
+        doc_channel, doc_views = array('i'), array('q')
+        for doc_id, key in enumerate(self._doc_keys):
+            if self._alive[doc_id]:
+                renumbered[doc_id] = self._doc_ids[key] = len(doc_keys)
+                doc_keys.append(key)
+                doc_tags.append(self._doc_tags[doc_id])
+                doc_channel.append(self._doc_channel[doc_id])
+                doc_views.append(self._doc_views[doc_id])
+        self._doc_keys, self._doc_tags = doc_keys, doc_tags
+        self._doc_channel, self._doc_views = doc_channel, doc_views
+        self._alive = bytearray(b'\x01') * len(doc_keys)
+        self._postings = [array('I', (renumbered[doc] for doc in posting if doc in renumbered))
+                          for posting in self._postings]
+
+    def add_video(self, video_info: Dict) -> bool:
+        """
+        Add or replace a video in the index
+
+        Args:
+            video_info (dict): VideoService.get_video_info() result (video_id,
+                tags, channel, view_count); entries with an 'error' are ignored
+
+        Returns:
+            bool: True if the video was indexed
+        """
+        key = video_info.get('video_id') or video_info.get('url')
+        if not key or video_info.get('error'):
+            return False
+        entry = (key, video_info.get('channel') or '', int(video_info.get('view_count') or 0),
+                 [str(tag) for tag in video_info.get('tags') or []])
+        with self._lock:
+            if self._add(*entry):
+                self._pending_videos[key] = entry
+                self._dirty = True
+        return True
+
+    def _add(self, key: str, channel: str, views: int, tags: List[str]) -> bool:
+        """Index a video (lock held); False when it is already indexed as is"""
+        tag_ids = array('I', dict.fromkeys(self._intern_tag(tag) for tag in tags if normalize_tag(tag)))
+        channel_id = self._intern_channel(channel)
+
+        previous = self._doc_ids.get(key)
+        if previous is not None:
+            if self._doc_tags[previous] == tag_ids and self._doc_channel[previous] == channel_id:
+                if self._doc_views[previous] == views:
+                    return False
+                self._update_views(previous, views)
+                return True
+            self._remove_doc(previous)
+            if len(self._doc_keys) - len(self._doc_ids) > len(self._doc_ids):
+                self._compact()
+
+        doc_id = self._doc_ids[key] = len(self._doc_keys)
+        self._doc_keys.append(key)
+        self._doc_tags.append(tag_ids)
+        self._doc_channel.append(channel_id)
+        self._doc_views.append(views)
+        self._alive.append(1)
+
+        value = self._value(views)
+        channel_counts = self._channel_counts[channel_id]
+        channel_values = self._channel_values[channel_id]
+        for tag_id in tag_ids:
+            self._postings[tag_id].append(doc_id)
+            channel_counts[tag_id] += 1
+            channel_values[tag_id] += value
+            self._global_counts[tag_id] += 1
+            self._global_values[tag_id] += value
+        if previous is None and tag_ids:
+            # Completer weights count a video once, when it is first seen
+            self._notify('channel', {self._tags[tag_id]: 1 for tag_id in tag_ids})
+        return True
+
+    def add_videos(self, video_infos: Iterable[Dict]) -> int:
+        """Add many videos; returns how many were indexed"""
+        return sum(1 for info in video_infos if self.add_video(info))
+
+    def _counters(self, channels: Optional[Iterable[str]], values: bool = False) -> Counter:
+        if not channels:
+            return self._global_values if values else self._global_counts
+        source = self._channel_values if values else self._channel_counts
+        merged = Counter()
+        for channel in channels:
+            channel_id = self._channel_ids.get(channel)
+            if channel_id is not None:
+                merged.update(source[channel_id])
+        return merged
+
+    def _channel_filter(self, channels: Optional[Iterable[str]]):
+        if not channels:
+            return None
+        return {self._channel_ids[c] for c in channels if c in self._channel_ids}
+
+    def top_tags(self, limit: int = 20, channels: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Most used tags
+
+        Args:
+            limit (int): Number of tags to return
+            channels (list, optional): Restrict to these channels; defaults to the whole corpus
+
+        Returns:
+            List[dict]: {'tag', 'videos', 'value'} ordered by video count
+        """
+        with self._lock:
+            counts = self._counters(channels)
+            values = self._counters(channels, values=True)
+            top = heapq.nlargest(limit, ((count, tag_id) for tag_id, count in counts.items() if count > 0))
+            return [{'tag': self._tags[tag_id], 'videos': count, 'value': round(values[tag_id], 2)}
+                    for count, tag_id in top]
+
+    def co_occurring(self, tag: str, limit: int = 20, channels: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Tags used on the same videos as `tag`
+
+        Args:
+            tag (str): Tag to look up
+            limit (int): Number of tags to return
+            channels (list, optional): Restrict to these channels
+
+        Returns:
+            List[dict]: {'tag', 'videos', 'confidence'}, where confidence is the
+                share of videos tagged `tag` that also carry the other tag
+        """
+        with self._lock:
+            tag_id = self._tag_ids.get(normalize_tag(tag))
+            if tag_id is None:
+                return []
+            allowed = self._channel_filter(channels)
+            alive, doc_channel, doc_tags = self._alive, self._doc_channel, self._doc_tags
+            docs = [doc for doc in self._postings[tag_id]
+                    if alive[doc] and (allowed is None or doc_channel[doc] in allowed)]
+            if not docs:
+                return []
+            counts = Counter(chain.from_iterable(doc_tags[doc] for doc in docs))
+            del counts[tag_id]
+            top = heapq.nlargest(limit, ((count, other) for other, count in counts.items()))
+            return [{'tag': self._tags[other], 'videos': count, 'confidence': round(count / len(docs), 3)}
+                    for count, other in top]
+
+    def unused_high_value(self, limit: int = 20, channel: Optional[str] = None,
+                          used_tags: Optional[Iterable[str]] = None,
+                          reference_channels: Optional[List[str]] = None) -> List[Dict]:
+        """
+        High-value tags from the reference set that a channel (or tag list) does not use
+
+        Args:
+            limit (int): Number of tags to return
+            channel (str, optional): Channel whose tags are excluded
+            used_tags (iterable, optional): Additional tags to exclude, e.g. a video's tags
+            reference_channels (list, optional): Channels to draw candidates from,
+                e.g. competitors; defaults to the whole corpus
+
+        Returns:
+            List[dict]: {'tag', 'videos', 'value'} ordered by value (video count
+                weighted by log views)
+        """
+        with self._lock:
+            excluded = set()
+            channel_id = self._channel_ids.get(channel) if channel else None
+            if channel_id is not None:
+                excluded.update(tag_id for tag_id, count in self._channel_counts[channel_id].items() if count > 0)
+            for tag in used_tags or []:
+                tag_id = self._tag_ids.get(normalize_tag(tag))
+                if tag_id is not None:
+                    excluded.add(tag_id)
+
+            reference = [c for c in reference_channels or [] if c != channel]
+            values = self._counters(reference, values=True)
+            counts = self._counters(reference)
+            top = heapq.nlargest(limit, ((value, tag_id) for tag_id, value in values.items()
+                                         if tag_id not in excluded and counts[tag_id] > 0))
+            return [{'tag': self._tags[tag_id], 'videos': counts[tag_id], 'value': round(value, 2)}
+                    for value, tag_id in top]
+
+    def tag_stats(self, tags: Iterable[str], channels: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Corpus usage for specific tags
+
+        Returns:
+            dict: tag -> {'videos', 'value'}; unknown tags report zero usage
+        """
+        with self._lock:
+            counts = self._counters(channels)
+            values = self._counters(channels, values=True)
+            stats = {}
+            for tag in tags:
+                tag_id = self._tag_ids.get(normalize_tag(tag))
+                stats[tag] = {
+                    'videos': counts[tag_id] if tag_id is not None else 0,
+                    'value': round(values[tag_id], 2) if tag_id is not None else 0.0
+                }
+            return stats
+
+    def tag_counts(self) -> List[tuple]:
+        """(tag, video count) for every tag in use"""
+        with self._lock:
+            return [(self._tags[tag_id], count) for tag_id, count in self._global_counts.items() if count > 0]
+
+    def summary(self) -> Dict:
+        """Corpus size: videos, distinct tags and channels"""
+        with self._lock:
+            return {
+                'videos': len(self._doc_ids),
+                'tags': sum(1 for count in self._global_counts.values() if count > 0),
+                'channels': sum(1 for counter in self._channel_counts.values() if any(counter.values()))
+            }
+
+    def add_terms(self, source: str, counts: Dict[str, float], key: Optional[str] = None) -> bool:
+        """
+        Add completer terms
+
+        Args:
+            source (str): Term source, e.g. 'transcript' or 'accepted'
+            counts (dict): Term -> occurrences to add
+            key (str, optional): Input the counts come from; counts for a key
+                already seen (here or in another process) are ignored
+
+        Returns:
+            bool: False when the key was already counted
+        """
+        with self._lock:
+            if key is not None:
+                if key in self._term_keys:
+                    return False
+                self._term_keys.add(key)
+                self._pending_keys.add(key)
+            counts = {term: count for term, count in counts.items() if count > 0}
+            if counts:
+                self._terms.setdefault(source, Counter()).update(counts)
+                self._pending_terms.setdefault(source, Counter()).update(counts)
+                self._notify(source, counts)
+            self._dirty = True
+        return True
+
+    def has_terms(self, key: str) -> bool:
+        """True when the counts of an input key were already added"""
+        with self._lock:
+            return key in self._term_keys
+
+    def subscribe(self, listener: Callable[[str, Dict[str, float]], None]):
+        """
+        Call listener(source, counts) with the current totals now, then with every
+        increment: tags of a newly indexed video ('channel'), and added terms
+        """
+        with self._lock:
+            listener('channel', dict(self.tag_counts()))
+            for source, counts in self._terms.items():
+                listener(source, dict(counts))
+            self._listeners.append(listener)
+
+    def _notify(self, source: str, counts: Dict[str, float]):
+        for listener in self._listeners:
+            try:
+                listener(source, counts)
+            except Exception as e:
+                log.error("tag_index_listener_failed", source=source, error=str(e))
+
+    @staticmethod
+    def _file_stamp(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    @contextmanager
+    def _file_lock(self, path: str):
+        """Exclusive lock between processes sharing the file"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(f"{path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _merge_file(self, path: str) -> int:
+        """
+        Take in what other processes saved since the file was last read (file
+        lock and index lock held)
+
+        Returns:
+            int: Videos added or replaced
+        """
+        stamp = self._file_stamp(path)
+        if stamp is None or stamp == self._stamp:
+            return 0
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        tags = data.get('tags', [])
+        merged = 0
+        for key, channel, views, tag_ids in data.get('videos', []):
+            # A change not saved yet is newer than the file
+            if key not in self._pending_videos:
+                merged += self._add(key, channel, views, [tags[tag_id] for tag_id in tag_ids])
+        for source, counts in data.get('terms', {}).items():
+            totals = self._terms.setdefault(source, Counter())
+            pending = self._pending_terms.get(source, {})
+            # Counts only grow: what the file holds beyond our saved share came from elsewhere
+            added = {term: count - (totals[term] - pending.get(term, 0)) for term, count in counts.items()}
+            added = {term: count for term, count in added.items() if count > 0}
+            if added:
+                totals.update(added)
+                self._notify(source, added)
+        self._term_keys.update(data.get('term_keys', []))
+        self._stamp = stamp
+        return merged
+
+    def _snapshot(self) -> Dict:
+        return {
+            'version': 1,
+            'tags': self._tags,
+            'videos': [
+                [key, self._channels[self._doc_channel[doc]], self._doc_views[doc], self._doc_tags[doc].tolist()]
+                for key, doc in self._doc_ids.items()
+            ],
+            'terms': {source: dict(counts) for source, counts in self._terms.items()},
+            'term_keys': sorted(self._term_keys),
+        }
+
+    def save(self, path: Optional[str] = None):
+        """
+        Merge the file with changes saved by other processes, then write it back
+        atomically. Only live videos are written, so replaced entries are
+        compacted away.
+        """
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._file_lock(path):
+            with self._lock:
+                merged = self._merge_file(path)
+                data = self._snapshot()
+                pending = self._pending_videos, self._pending_terms, self._pending_keys
+                self._pending_videos, self._pending_terms, self._pending_keys = {}, {}, set()
+                self._dirty = False
+
+            # Unique per process and thread, so no two writers share a temp file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_path, path)
+            except Exception:
+                with self._lock:
+                    videos, terms, keys = pending
+                    self._pending_videos = dict(videos, **self._pending_videos)
+                    for source, counts in terms.items():
+                        self._pending_terms.setdefault(source, Counter()).update(counts)
+                    self._pending_keys |= keys
+                    self._dirty = True
+                raise
+            self._stamp = self._file_stamp(path)
+        log.debug("tag_index_saved", path=path, videos=len(data['videos']), merged=merged)
+
+    def save_if_dirty(self):
+        """Save only when videos or terms were added since the last save"""
+        if self._dirty and self.path:
+            self.save()
+
+    def sync(self):
+        """Save local changes, or else take in changes other processes saved"""
+        if not self.path:
+            return
+        if self._dirty:
+            self.save()
+        elif self._file_stamp(self.path) != self._stamp:
+            with self._file_lock(self.path), self._lock:
+                merged = self._merge_file(self.path)
+            if merged:
+                log.debug("tag_index_merged", path=self.path, videos=merged)
+
+    def start_sync(self, interval: Optional[float] = None) -> 'TagIndex':
+        """Sync with the file every interval seconds (YTSALT_TAG_INDEX_SYNC) on a daemon thread"""
+        if interval is None:
+            interval = float(os.getenv('YTSALT_TAG_INDEX_SYNC', '30'))
+        if interval > 0 and self.path and self._sync_thread is None:
+            self._sync_thread = threading.Thread(target=self._sync_loop, args=(interval,),
+                                                 name='ytsalt-tag-index-sync', daemon=True)
+            self._sync_thread.start()
+        return self
+
+    def _sync_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.sync()
+            except Exception as e:
+                log.error("tag_index_sync_failed", path=self.path, error=str(e))
+
+    def close(self):
+        """Stop the sync thread and save what is left"""
+        self._stop.set()
+        self.save_if_dirty()
+
+    def load(self, path: Optional[str] = None):
+        """Replace the index contents with a saved JSON index"""
+        path = path or self.path
+        with self._file_lock(path), self._lock:
+            self._reset()
+            self._stamp = None
+            self._merge_file(path)
+        log.info("tag_index_loaded", path=path, videos=len(self._doc_ids))
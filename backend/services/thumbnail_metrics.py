@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+ytSALT Thumbnail Metrics Module
+This module prepares thumbnail candidates for comparison without any model call:
+it decodes an image, normalizes it to RGB, downscales it to the size sent to the
+vision model, and measures simple visual properties that predict how a thumbnail
+reads at feed size (exposure, contrast, saturation, edge detail, resolution and
+aspect ratio).
+
+The local score combines those measurements into a 0-10 heuristic. It is used to
+order candidates the model did not rank, and as the whole ranking when the model
+is unavailable; it is not a CTR prediction.
+
+Functions:
+    decode_upload: Image bytes from an upload (raw bytes, base64 or a data URL)
+    analyze: Normalize, downscale, measure and encode one image
+    local_score: 0-10 heuristic score from analyze() metrics
+
+Dependencies:
+    - Pillow
+
+Version: 1.0.0
+License: MIT
+"""
+
+import base64
+import binascii
+import io
+from typing import Dict, Tuple, Union
+
+# Size candidates are downscaled to before they are measured and sent to the model
+# (16:9, and small enough for the vision model's low-detail mode)
+ANALYSIS_SIZE = (512, 288)
+
+# YouTube's recommended minimum thumbnail resolution
+RECOMMENDED_SIZE = (1280, 720)
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+
+def decode_upload(image: Union[bytes, str]) -> bytes:
+    """
+    Image bytes from an uploaded candidate
+
+    Args:
+        image (bytes or str): Raw bytes, a base64 string or a data: URL
+
+    Returns:
+        bytes: Encoded image file
+
+    Raises:
+        ValueError: If the data is not valid base64 or is too large
+    """
+    if isinstance(image, str):
+        if image.startswith('data:'):
+            image = image.partition(',')[2]
+        try:
+            image = base64.b64decode(image, validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError("Uploaded image is not valid base64")
+    if len(image) > MAX_UPLOAD_BYTES:
+        raise ValueError(f"Uploaded image is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    return image
+
+
+def _clip(value: float) -> float:
+    return max(0.0, min(1.0, value))
+
+
+def analyze(image_bytes: bytes, size: Tuple[int, int] = ANALYSIS_SIZE) -> Tuple[Dict, str]:
+    """
+    Normalize, downscale and measure one image
+
+    Args:
+        image_bytes (bytes): Encoded image file (JPEG, PNG, WebP, ...)
+        size (tuple): Bounding box to downscale into
+
+    Returns:
+        tuple: (metrics dict, base64 JPEG of the downscaled image)
+
+    Raises:
+        ValueError: If the bytes are not a readable image
+    """
+    from PIL import Image, ImageFilter, ImageStat, UnidentifiedImageError
+
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+    except UnidentifiedImageError:
+        raise ValueError("Not a readable image")
+    width, height = image.size
+    # Let the JPEG decoder scale down while decoding; other formats ignore this
+    image.draft('RGB', (size[0] * 2, size[1] * 2))
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail(size, Image.LANCZOS)
+
+    gray = image.convert('L')
+    luminance = ImageStat.Stat(gray)
+    saturation = ImageStat.Stat(image.convert('HSV')).mean[1] / 255
+    edges = ImageStat.Stat(gray.filter(ImageFilter.FIND_EDGES)).mean[0] / 255
+
+    aspect_ratio = width / height if height else 0.0
+    metrics = {
+        'width': width,
+        'height': height,
+        'aspect_ratio': round(aspect_ratio, 3),
+        'is_16_9': abs(aspect_ratio - 16 / 9) < 0.02,
+        'meets_recommended_resolution': width >= RECOMMENDED_SIZE[0] and height >= RECOMMENDED_SIZE[1],
+        'brightness': round(luminance.mean[0] / 255, 3),
+        'contrast': round(luminance.stddev[0] / 128, 3),
+        'saturation': round(saturation, 3),
+        'edge_density': round(edges, 3),
+    }
+    metrics['local_score'] = local_score(metrics)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return metrics, base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+
+def local_score(metrics: Dict) -> float:
+    """
+    0-10 heuristic: well exposed, contrasty, saturated and detailed thumbnails at
+    the recommended resolution and aspect ratio score highest
+
+    Args:
+        metrics (dict): Output of analyze()
+
+    Returns:
+        float: Score rounded to one decimal
+    """
+    exposure = _clip(1 - abs(metrics['brightness'] - 0.5) * 2)
+    contrast = _clip(metrics['contrast'] / 0.5)
+    saturation = _clip(metrics['saturation'] / 0.45)
+    detail = _clip(metrics['edge_density'] / 0.12)
+    resolution = _clip(min(metrics['width'] / RECOMMENDED_SIZE[0], metrics['height'] / RECOMMENDED_SIZE[1]))
+    aspect = 1.0 if metrics['is_16_9'] else 0.5
+    score = (0.2 * exposure + 0.25 * contrast + 0.2 * saturation + 0.2 * detail
+             + 0.1 * resolution + 0.05 * aspect)
+    return round(10 * score, 1)
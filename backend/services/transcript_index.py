@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+ytSALT Transcript Index Module
+This module keeps a persistent full-text index of every transcript that has been
+fetched, so the videos that mention a term, and the moments they mention it, can
+be found without fetching any transcript again.
+
+Transcripts are stored in SQLite as passages: runs of consecutive caption
+segments joined up to YTSALT_TRANSCRIPT_INDEX_PASSAGE_CHARS characters, so a
+phrase split across two captions is still found, while every hit keeps the start
+time of its passage. An FTS5 table over the passages answers the queries, ranked
+by BM25. Indexing is incremental: each transcript carries a digest, a video whose
+transcript did not change is skipped, and a changed one has its passages replaced
+in one transaction. Video titles and channels (from fetched metadata) are kept
+alongside, so hits can be shown without another metadata fetch.
+
+Classes:
+    TranscriptIndex: SQLite FTS5 index over transcript passages
+
+Functions:
+    match_expression: Turns a user query into a safe FTS5 MATCH expression
+    format_timestamp: Seconds -> H:MM:SS / M:SS
+
+Environment:
+    YTSALT_TRANSCRIPT_INDEX_PATH - SQLite database (default backend/data/transcripts.sqlite3)
+    YTSALT_TRANSCRIPT_INDEX_PASSAGE_CHARS - Target passage length in characters (default 240)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from services import metrics
+from services.logger import get_logger
+
+log = get_logger('transcript_index')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data', 'transcripts.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT,
+    channel TEXT,
+    digest TEXT,
+    passages INTEGER NOT NULL DEFAULT 0,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    start REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_video ON passages (video_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+    text, content='passages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts (passages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# Quoted phrases, then bare words (letters/digits, with inner apostrophes or hyphens)
+_QUERY_TOKEN = re.compile(r'"([^"]+)"|([\w][\w\'-]*)(\*?)', re.UNICODE)
+
+metrics.registry.describe('ytsalt_transcript_index_total',
+                          'Transcripts indexed, by outcome (indexed, unchanged)', 'counter')
+metrics.registry.describe('ytsalt_transcript_search_seconds', 'Run time of one transcript search', 'histogram')
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    FTS5 MATCH expression for a user query: every word or "quoted phrase" must
+    appear; a trailing * on a word matches it as a prefix. FTS5 operators and
+    punctuation in the query are treated as text.
+
+    Returns:
+        str: The expression, or None when the query has no searchable words
+    """
+    terms = []
+    for phrase, word, prefix in _QUERY_TOKEN.findall(query or ''):
+        text = ' '.join(re.findall(r'\w+', phrase or word, re.UNICODE))
+        if text:
+            terms.append(f'"{text}"' + ('*' if prefix and not phrase else ''))
+    return ' '.join(terms) or None
+
+
+def format_timestamp(seconds: float) -> str:
+    """Seconds -> H:MM:SS, or M:SS under an hour"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class TranscriptIndex:
+    """
+    Full-text index over fetched transcripts. Safe to share between request
+    threads and between processes using the same database.
+    """
+
+    def __init__(self, path: Optional[str] = None, passage_chars: int = None):
+        """
+        Args:
+            path (str, optional): SQLite database file
+            passage_chars (int, optional): Target passage length in characters
+        """
+        self.path = path or os.getenv('YTSALT_TRANSCRIPT_INDEX_PATH', DEFAULT_PATH)
+        self.passage_chars = passage_chars or int(os.getenv('YTSALT_TRANSCRIPT_INDEX_PASSAGE_CHARS', '240'))
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections are not shared between threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _passages(self, segments: Iterable[Dict]) -> List[tuple]:
+        """(start, text) passages of consecutive segments up to passage_chars long"""
+        passages = []
+        start, parts, length = None, [], 0
+        for segment in segments:
+            text = ' '.join(str(segment.get('text') or '').split())
+            if not text:
+                continue
+            if parts and length + len(text) > self.passage_chars:
+                passages.append((start, ' '.join(parts)))
+                start, parts, length = None, [], 0
+            if start is None:
+                start = float(segment.get('start') or 0)
+            parts.append(text)
+            length += len(text) + 1
+        if parts:
+            passages.append((start, ' '.join(parts)))
+        return passages
+
+    def add_transcript(self, video_id: str, segments: List[Dict]) -> bool:
+        """
+        Index (or re-index) the transcript of a video
+
+        Args:
+            video_id (str): YouTube video id
+            segments (list): Caption segments ({'text', 'start', ...}), as returned
+                by TranscriptService.get_transcript()
+
+        Returns:
+            bool: True if the index changed, False when the transcript was already indexed
+        """
+        if not video_id or not segments:
+            return False
+        passages = self._passages(segments)
+        digest = hashlib.sha256(json.dumps(passages, ensure_ascii=False).encode('utf-8')).hexdigest()[:32]
+
+        connection = self._connect()
+        row = connection.execute("SELECT digest FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        if row is not None and row['digest'] == digest:
+            metrics.registry.increment('ytsalt_transcript_index_total', outcome='unchanged')
+            return False
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute("DELETE FROM passages WHERE video_id = ?", (video_id,))
+            connection.executemany("INSERT INTO passages (video_id, start, text) VALUES (?, ?, ?)",
+                                   [(video_id, start, text) for start, text in passages])
+            connection.execute(
+                "INSERT INTO videos (video_id, digest, passages, indexed_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (video_id) DO UPDATE SET digest = excluded.digest,"
+                " passages = excluded.passages, indexed_at = excluded.indexed_at",
+                (video_id, digest, len(passages), time.time()))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        metrics.registry.increment('ytsalt_transcript_index_total', outcome='indexed')
+        log.debug("transcript_indexed", video_id=video_id, passages=len(passages))
+        return True
+
+    def add_video(self, video_info: Dict) -> bool:
+        """
+        Record the title and channel of a video, shown with its search hits
+
+        Args:
+            video_info (dict): VideoService.get_video_info() result; entries with
+                an 'error' are ignored
+
+        Returns:
+            bool: True if the video was recorded
+        """
+        video_id = video_info.get('video_id')
+        if not video_id or video_info.get('error'):
+            return False
+        self._connect().execute(
+            "INSERT INTO videos (video_id, title, channel) VALUES (?, ?, ?)"
+            " ON CONFLICT (video_id) DO UPDATE SET title = excluded.title, channel = excluded.channel",
+            (video_id, video_info.get('title'), video_info.get('channel')))
+        return True
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, video_ids: Optional[List[str]] = None,
+               channels: Optional[List[str]] = None, per_video: int = 0) -> List[Dict]:
+        """
+        Transcript passages matching a query, best first
+
+        Args:
+            query (str): Words and "quoted phrases" that must all appear; word* matches a prefix
+            limit (int): Number of hits to return
+            offset (int): Hits to skip, for paging
+            video_ids (list, optional): Restrict to these videos
+            channels (list, optional): Restrict to videos of these channels
+            per_video (int): At most this many hits per video (0 for no cap)
+
+        Returns:
+            List[dict]: {'video_id', 'title', 'channel', 'start', 'timestamp', 'url',
+                'snippet', 'score'}; the snippet marks matched words with [ ]
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return []
+
+        started = time.perf_counter()
+        connection = self._connect()
+        filters, params = [], [expression]
+        if video_ids:
+            filters.append(f"p.video_id IN ({', '.join('?' * len(video_ids))})")
+            params.extend(video_ids)
+        if channels:
+            filters.append(f"p.video_id IN (SELECT video_id FROM videos WHERE channel IN"
+                           f" ({', '.join('?' * len(channels))}))")
+            params.extend(channels)
+        ranked = ("SELECT p.id, p.video_id, p.start, passages_fts.rank AS rank"
+                  " FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid"
+                  " WHERE passages_fts MATCH ?" + ''.join(f" AND {condition}" for condition in filters) +
+                  " ORDER BY passages_fts.rank")
+        if per_video > 0:
+            # Walk the ranking, skipping videos that already have per_video hits
+            hits, seen = [], {}
+            for row in connection.execute(ranked, params):
+                if seen.get(row['video_id'], 0) < per_video:
+                    seen[row['video_id']] = seen.get(row['video_id'], 0) + 1
+                    hits.append(row)
+                    if len(hits) >= offset + limit:
+                        break
+            hits = hits[offset:]
+        else:
+            hits = connection.execute(f"{ranked} LIMIT ? OFFSET ?", params + [int(limit), int(offset)]).fetchall()
+
+        # Snippets and titles only for the page being returned
+        details = {}
+        if hits:
+            ids = [row['id'] for row in hits]
+            details = {row['id']: row for row in connection.execute(
+                "SELECT passages_fts.rowid AS id, snippet(passages_fts, 0, '[', ']', '...', 16) AS snippet,"
+                " v.title, v.channel"
+                " FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid"
+                " LEFT JOIN videos v ON v.video_id = p.video_id"
+                f" WHERE passages_fts MATCH ? AND passages_fts.rowid IN ({', '.join('?' * len(ids))})",
+                [expression] + ids)}
+        metrics.registry.observe('ytsalt_transcript_search_seconds', time.perf_counter() - started)
+
+        return [{
+            'video_id': row['video_id'],
+            'title': details[row['id']]['title'],
+            'channel': details[row['id']]['channel'],
+            'start': row['start'],
+            'timestamp': format_timestamp(row['start']),
+            'url': f"https://www.youtube.com/watch?v={row['video_id']}&t={int(row['start'])}s",
+            'snippet': details[row['id']]['snippet'],
+            # FTS5 rank (bm25) is lower for better matches; report higher-is-better
+            'score': round(-row['rank'], 3),
+        } for row in hits]
+
+    def summary(self) -> Dict:
+        """Index size: transcripts and passages"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) AS transcripts, COALESCE(SUM(passages), 0) AS passages"
+            " FROM videos WHERE digest IS NOT NULL").fetchone()
+        return {'transcripts': row['transcripts'], 'passages': row['passages']}
+
+    def optimize(self):
+        """Merge the FTS5 index segments; worth running after indexing many transcripts"""
+        self._connect().execute("INSERT INTO passages_fts (passages_fts) VALUES ('optimize')")
@@ -8,6 +8,11 @@ automatic and manual captions when available.
 Classes:
     TranscriptService: Handles transcript extraction and processing operations
 
+Environment:
+    YTSALT_TRANSCRIPT_CACHE_SIZE - Transcripts kept in memory (default 256)
+    YTSALT_TRANSCRIPT_MAX_AGE - Seconds a cached transcript is served without
+        refetching (default 900, 0 always refetches)
+
 Dependencies:
     - youtube_transcript_api
     - urllib.parse
@@ -18,13 +23,41 @@ License: MIT
 Created: February 2025
 """
 
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+import os
 from urllib.parse import urlparse, parse_qs
+from services import cassette, circuit_breaker, deadline, text_metrics
+from services.cache import LRUCache, SingleFlight
+from services.metrics import stage
+from services.logger import get_logger
+
+log = get_logger('transcript_service')
+
+# youtube_transcript_api errors about the video itself, not about YouTube being unhealthy
+_VIDEO_ERRORS = frozenset(('TranscriptsDisabled', 'NoTranscriptFound', 'NoTranscriptAvailable',
+                           'VideoUnavailable', 'InvalidVideoId', 'AgeRestricted'))
+
+def _is_transcript_failure(exc):
+    """Circuit breaker classifier: True when the error says YouTube is failing"""
+    return type(exc).__name__ not in _VIDEO_ERRORS
 
 class TranscriptService:
-    def __init__(self):
-        """Initialize TranscriptService"""
-        pass
+    def __init__(self, index=None):
+        """
+        Initialize TranscriptService
+
+        Args:
+            index (TranscriptIndex, optional): Full-text index every fetched transcript is added to
+        """
+        self.index = index
+        # Last good transcript per video: served as-is while younger than max_age,
+        # and (flagged degraded) when a deadline passes
+        self._cache = LRUCache(maxsize=int(os.getenv('YTSALT_TRANSCRIPT_CACHE_SIZE', '256')))
+        self.max_age = float(os.getenv('YTSALT_TRANSCRIPT_MAX_AGE', '900'))
+        self._flights = SingleFlight()
+
+    def warm_up(self):
+        """Import the transcript API ahead of the first request (it is deferred for fast startup)"""
+        import youtube_transcript_api  # noqa: F401
 
     def extract_video_id(self, url):
         """
@@ -45,7 +78,7 @@ class TranscriptService:
                     return parse_qs(parsed_url.query)['v'][0]
             return None
         except Exception as e:
-            print(f"Error extracting video ID: {str(e)}")
+            log.debug("video_id_extraction_failed", url=url, error=str(e))
             return None
 
     def get_transcript(self, url):
@@ -61,46 +94,95 @@ class TranscriptService:
                 - transcript: str (full concatenated transcript)
                 - segments: List[dict] (individual transcript segments with timestamps)
                 - stats: dict (transcript statistics)
+                - degraded / fallback: only present when the deadline passed (or the
+                  transcript breaker is open) and a previously fetched transcript
+                  was served instead
 
         Raises:
+            CircuitOpenError: If the transcript breaker is open and nothing is cached
             Exception: If transcript cannot be fetched or processed
         """
+        from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
+
         try:
             video_id = self.extract_video_id(url)
             if not video_id:
                 raise ValueError("Could not extract video ID from URL")
 
-            print(f"Fetching transcript for video ID: {video_id}")
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+            # Recently fetched (or prefetched) transcripts are served as they are
+            if self.max_age > 0:
+                recent = self._cache.get(video_id, max_age=self.max_age)
+                if recent is not None:
+                    return recent
 
-            # Combine transcript pieces into a single text
-            full_transcript = ' '.join(
-                item['text'] for item in transcript_list
-            )
-
-            # Calculate transcript stats
-            transcript_stats = {
-                'length': len(full_transcript),
-                'word_count': len(full_transcript.split()),
-                'segment_count': len(transcript_list)
-            }
-
-            return {
-                'transcript': full_transcript,
-                'segments': transcript_list,
-                'stats': transcript_stats
-            }
+            log.debug("transcript_fetch", video_id=video_id)
+            with stage('transcript_fetch'):
+                try:
+                    # Join a fetch of the same video that is already running (e.g. a prefetch)
+                    return self._flights.run(video_id, lambda: self._fetch(video_id),
+                                             wait=lambda future: deadline.wait(future, 'transcript_fetch'))
+                except (deadline.DeadlineExceeded, circuit_breaker.CircuitOpenError):
+                    cached = self._cache.get(video_id)
+                    if cached is None:
+                        raise
+                    deadline.record_fallback('transcript', 'cached')
+                    return dict(cached, degraded=True, fallback='cached')
 
         except TranscriptsDisabled:
             raise Exception("This video does not have subtitles or closed captions enabled.")
         except NoTranscriptFound:
             raise Exception("No transcript was found for this video.")
+        except circuit_breaker.CircuitOpenError:
+            raise
         except Exception as e:
-            print(f"Error in get_transcript: {str(e)}")
+            log.warning("transcript_failed", url=url, error=str(e))
             if "Subtitles are disabled" in str(e):
                 raise Exception("This video does not have subtitles or closed captions enabled.")
             raise Exception(f"Could not fetch transcript: {str(e)}")
 
+    def _fetch(self, video_id):
+        """Download a transcript through the breaker and cache the processed result"""
+        deadline.check('transcript_fetch')
+        breaker = circuit_breaker.get_breaker(circuit_breaker.TRANSCRIPTS, _is_transcript_failure)
+
+        def download():
+            from youtube_transcript_api import YouTubeTranscriptApi
+            return breaker.call(deadline.call, YouTubeTranscriptApi.get_transcript, video_id,
+                                what='transcript_fetch')
+
+        transcript_list = cassette.call('transcript', video_id, download)
+
+        # Combine transcript pieces into a single text
+        full_transcript = ' '.join(
+            item['text'] for item in transcript_list
+        )
+
+        # Calculate transcript stats
+        transcript_stats = dict(text_metrics.text_stats(full_transcript),
+                                segment_count=len(transcript_list))
+
+        transcript_data = {
+            'transcript': full_transcript,
+            'segments': transcript_list,
+            'stats': transcript_stats
+        }
+        self._cache.set(video_id, transcript_data)
+        if self.index is not None:
+            # Search is a side feature; a failing index must not fail the fetch
+            try:
+                self.index.add_transcript(video_id, transcript_list)
+            except Exception as e:
+                log.warning("transcript_index_failed", video_id=video_id, error=str(e))
+        return transcript_data
+
+    def is_cached(self, url, max_age=None):
+        """True when a transcript for the URL is cached (and fresh) or being fetched"""
+        video_id = self.extract_video_id(url)
+        if not video_id:
+            return False
+        max_age = self.max_age if max_age is None else max_age
+        return self._flights.in_flight(video_id) or self._cache.get(video_id, max_age=max_age) is not None
+
     def generate_timestamps(self, transcript_data):
         """
         Generate intelligent timestamps from transcript data
@@ -149,7 +231,7 @@ class TranscriptService:
             return timestamps
 
         except Exception as e:
-            print(f"Error generating timestamps: {str(e)}")
+            log.warning("timestamps_failed", error=str(e))
             return []
 
     def _is_topic_break(self, text):
@@ -185,5 +267,5 @@ class TranscriptService:
                 
             return title.capitalize()
         except Exception as e:
-            print(f"Error generating topic title: {str(e)}")
+            log.debug("topic_title_failed", error=str(e))
             return "Untitled Section"
\ No newline at end of file
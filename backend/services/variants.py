@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+ytSALT Variants Module
+This module turns the suggestions of one multi-variant completion (several
+choices sampled with the `n` parameter) into a single ranked pool, and serves
+that pool page by page, so asking for more options reads the stored pool
+instead of paying for another model call.
+
+Suggestions are deduplicated on their normalized text; a suggestion that
+several choices produced keeps a vote per choice. Each one is then scored
+locally from text_metrics (character limits and recommended lengths), its
+coverage of the video's keywords (current tags and recurring title/description
+phrases) and its votes, and the pool is ordered by score.
+
+Functions:
+    requested: Number of choices a request asks for
+    covers: Whether a stored pool is large enough for a request
+    keywords: Keywords a video's suggestions are checked against
+    rank: Deduplicate, score and order suggestions
+    page: One page of a ranked result
+
+Environment:
+    YTSALT_VARIANTS - Choices per title/description/tags call (default 1)
+    YTSALT_MAX_VARIANTS - Upper bound on a request's 'variants' (default 5)
+    YTSALT_VARIANTS_PAGE_SIZE - Suggestions per page when a request pages without a page_size (default 5)
+
+Version: 1.0.0
+License: MIT
+"""
+
+import math
+import os
+import re
+from typing import Dict, List
+
+from services import metrics
+from services.tag_completer import transcript_ngrams
+from services.tag_index import normalize_tag
+
+# Suggestion field holding the text, per task
+TEXT_FIELDS = {'title': 'title', 'description': 'description', 'tags': 'tag'}
+
+# Keywords a suggestion is checked against, and how many a suggestion needs for full coverage
+MAX_KEYWORDS = 10
+FULL_COVERAGE = {'title': 2, 'description': 4, 'tags': 1}
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9'+#-]*")
+
+metrics.registry.describe('ytsalt_variant_pages_total',
+                          'Suggestion pages served, by task and source (model call or stored pool)', 'counter')
+
+
+def requested(video_data: Dict) -> int:
+    """Choices to sample: the request's 'variants', else YTSALT_VARIANTS, within 1..YTSALT_MAX_VARIANTS"""
+    default = int(os.getenv('YTSALT_VARIANTS', '1'))
+    try:
+        count = int(video_data.get('variants') or default)
+    except (TypeError, ValueError):
+        count = default
+    return max(1, min(count, int(os.getenv('YTSALT_MAX_VARIANTS', '5'))))
+
+
+def covers(result: Dict, video_data: Dict) -> bool:
+    """
+    True when a stored pool can serve a request: any pool can, unless the request
+    sets 'variants' above the number of choices the pool was sampled with
+    """
+    if not video_data.get('variants'):
+        return True
+    return result.get('variants', 1) >= requested(video_data)
+
+
+def _words(text: str) -> set:
+    return set(_WORD_RE.findall((text or '').lower()))
+
+
+def keywords(video_data: Dict) -> List[set]:
+    """
+    Keywords of a video, as word sets: its current tags, then the phrases that
+    recur in its title and description, most frequent first
+    """
+    found, seen = [], set()
+    phrases = [normalize_tag(tag) for tag in video_data.get('tags') or []]
+    metadata = transcript_ngrams(f"{video_data.get('title', '')}\n{video_data.get('description', '')}",
+                                 max_n=2, min_count=1)
+    phrases += [phrase for phrase, _ in metadata.most_common()]
+    for phrase in phrases:
+        words = frozenset(_words(phrase))
+        if words and words not in seen:
+            seen.add(words)
+            found.append(words)
+            if len(found) >= MAX_KEYWORDS:
+                break
+    return found
+
+
+def _coverage(task: str, text: str, video_keywords: List[set]) -> float:
+    if not video_keywords:
+        return 0.0
+    words = _words(text)
+    if task == 'tags':
+        # A tag is short: sharing a word with a keyword makes it on-topic
+        covered = sum(1 for keyword in video_keywords if keyword & words)
+    else:
+        covered = sum(1 for keyword in video_keywords if keyword <= words)
+    return min(1.0, covered / min(FULL_COVERAGE[task], len(video_keywords)))
+
+
+def _form_score(task: str, suggestion: Dict) -> float:
+    """0..1 from the suggestion's text_metrics: limits first, then recommended ranges"""
+    m = suggestion.get('metrics') or {}
+    if task == 'title':
+        if not m.get('character_limit_ok', True):
+            return 0.0
+        return 0.6 + 0.3 * bool(m.get('recommended')) + 0.1 * bool(m.get('has_number'))
+    if task == 'description':
+        if not m.get('character_limit_ok', True):
+            return 0.0
+        # Longer descriptions give search more to index, with diminishing returns
+        return (0.5 + 0.3 * min(1.0, math.log1p(m.get('word_count', 0)) / math.log1p(200))
+                + 0.1 * bool(m.get('has_hashtags')) + 0.1 * bool(m.get('has_links')))
+    # Tags: new ones and transcript-backed ones first, as the tag parser orders them
+    return (0.4 + 0.3 * bool(suggestion.get('is_new', True)) + 0.2 * bool(m.get('is_recommended_length'))
+            + 0.1 * (suggestion.get('source') == 'transcript'))
+
+
+def rank(task: str, suggestions: List[Dict], video_data: Dict, choices: int = 1) -> List[Dict]:
+    """
+    Deduplicate, score and order the suggestions of one (multi-choice) completion
+
+    Args:
+        task (str): 'title', 'description' or 'tags'
+        suggestions (list): Parsed suggestions of every choice, in choice order
+        video_data (dict): Request payload, for keyword coverage
+        choices (int): Number of choices the suggestions came from
+
+    Returns:
+        List[dict]: Unique suggestions, best first, each with 'score' (0..1) and
+            'votes' (choices that produced it)
+    """
+    field = TEXT_FIELDS[task]
+    unique: Dict[str, Dict] = {}
+    for suggestion in suggestions:
+        text = str(suggestion.get(field) or '').strip()
+        key = ' '.join(_WORD_RE.findall(text.lower()))
+        if not key:
+            continue
+        if key in unique:
+            unique[key]['votes'] += 1
+        else:
+            unique[key] = dict(suggestion, votes=1)
+
+    video_keywords = keywords(video_data)
+    for suggestion in unique.values():
+        agreement = (suggestion['votes'] - 1) / (choices - 1) if choices > 1 else 0.0
+        score = (0.5 * _form_score(task, suggestion)
+                 + 0.4 * _coverage(task, suggestion[field], video_keywords)
+                 + 0.1 * min(1.0, agreement))
+        suggestion['score'] = round(score, 3)
+    # Stable: ties keep the model's order
+    return sorted(unique.values(), key=lambda suggestion: -suggestion['score'])
+
+
+def page(task: str, result: Dict, video_data: Dict) -> Dict:
+    """
+    The page of a ranked result a request asks for ('page', 1-based, and
+    'page_size'). Without either, the whole pool is returned.
+
+    Returns:
+        dict: The result with 'suggestions' cut to the page, plus 'page',
+            'page_size', 'pages', 'pool_size' and 'has_more'
+    """
+    if not result.get('success') or not isinstance(result.get('suggestions'), list):
+        return result
+    pool = result['suggestions']
+    paged = 'page' in video_data or 'page_size' in video_data
+    try:
+        number = max(1, int(video_data.get('page') or 1))
+        size = max(1, int(video_data.get('page_size') or os.getenv('YTSALT_VARIANTS_PAGE_SIZE', '5')))
+    except (TypeError, ValueError):
+        number, size = 1, len(pool) or 1
+    if not paged:
+        number, size = 1, len(pool) or 1
+
+    metrics.registry.increment('ytsalt_variant_pages_total', task=task,
+                               source='pool' if result.get('reused') else 'model')
+    start = (number - 1) * size
+    return dict(result,
+                suggestions=pool[start:start + size],
+                page=number,
+                page_size=size,
+                pages=max(1, math.ceil(len(pool) / size)),
+                pool_size=len(pool),
+                has_more=start + size < len(pool))
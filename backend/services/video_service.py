@@ -17,14 +17,196 @@ License: MIT
 Created: February 2025
 """
 
-import yt_dlp
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from services import cassette, circuit_breaker, deadline, text_metrics
+from services.cache import LRUCache
+from services.metrics import stage
+from services.logger import get_logger
+
+log = get_logger('video_service')
+
+# Only these fields leave the extractor; yt-dlp info dicts carry hundreds of
+# format entries we never use, and in process mode everything returned is pickled.
+SLIM_FIELDS = ('id', 'title', 'description', 'tags', 'duration', 'view_count',
+               'like_count', 'channel', 'upload_date')
+
+def _slim_info(info):
+    """Reduce a yt-dlp info dict to the fields VideoService uses"""
+    slim = {field: info.get(field) for field in SLIM_FIELDS}
+    thumbnails = info.get('thumbnails') or []
+    # Get thumbnail URL (prefer high quality)
+    slim['thumbnail_url'] = thumbnails[-1]['url'] if thumbnails else None
+    return slim
+
+# Per-process extractor used by pool workers, created once by _init_worker
+_worker_ydl = None
+# (Condition, shared count of workers with an extractor), handed to every worker by _init_worker
+_worker_ready = None
+
+def _init_worker(ydl_opts, setup=None, ready=None):
+    """Process pool initializer: runs the optional setup hook, builds a warm extractor and signs in as ready"""
+    global _worker_ydl, _worker_ready
+    if setup is not None:
+        setup()
+    import yt_dlp
+    _worker_ydl = yt_dlp.YoutubeDL(ydl_opts)
+    if ready is not None:
+        _worker_ready = ready
+        condition, count = ready
+        with condition:
+            count.value += 1
+            condition.notify_all()
+
+def _worker_extract(url):
+    """Runs in a pool worker; returns the slim info dict"""
+    return _slim_info(_worker_ydl.extract_info(url, download=False))
+
+# yt-dlp errors about the video itself, not about YouTube being unhealthy
+_VIDEO_ERROR_MARKERS = ('private video', 'video unavailable', 'has been removed', 'unsupported url',
+                        'is not available', 'confirm your age', 'members-only', 'does not exist')
+
+def _is_youtube_failure(exc):
+    """Circuit breaker classifier: True when the error says YouTube is failing"""
+    message = str(exc).lower()
+    return not any(marker in message for marker in _VIDEO_ERROR_MARKERS)
+
+def _slim_entries(entries):
+    """Playlist entries reduced to what list_video_urls reads (nested tabs kept)"""
+    slim = []
+    for entry in entries or []:
+        if not entry:
+            continue
+        slim.append({
+            'id': entry.get('id'),
+            'url': entry.get('url'),
+            '_type': entry.get('_type'),
+            'entries': _slim_entries(entry.get('entries')) if entry.get('entries') else None
+        })
+    return slim
+
+def _worker_ping(expected):
+    """
+    Warm-up task. It returns only once `expected` workers have built their
+    extractor, so no worker is free to take a second ping and the pool has to
+    start a process for each one.
+    """
+    if _worker_ready is not None:
+        condition, count = _worker_ready
+        with condition:
+            condition.wait_for(lambda: count.value >= expected, timeout=60)
+    return os.getpid()
 
 class VideoService:
-    def __init__(self):
+    def __init__(self, execution=None, workers=None, worker_setup=None):
+        """
+        Initialize VideoService
+
+        Args:
+            execution (str, optional): 'thread' (default) runs yt-dlp in the calling
+                thread; 'process' runs it in a pool of warm worker processes so CPU-bound
+                extraction is not serialized by the GIL. Defaults to YTSALT_VIDEO_EXECUTION.
+            workers (int, optional): Pool size for 'process' mode and batch extraction.
+                Defaults to YTSALT_VIDEO_WORKERS or the CPU count.
+            worker_setup (callable, optional): Picklable function run in each worker
+                process before its extractor is created
+        """
         self.ydl_opts = {
             'quiet': True,
             'no_warnings': True,
-            'extract_flat': True
+            'extract_flat': True,
+            # Bounds each network read, so a call abandoned at the deadline still ends
+            'socket_timeout': float(os.getenv('YTSALT_YTDLP_SOCKET_TIMEOUT', '15'))
+        }
+        self.execution = execution or os.getenv('YTSALT_VIDEO_EXECUTION', 'thread')
+        if self.execution not in ('thread', 'process'):
+            raise ValueError(f"Unknown execution mode: {self.execution}")
+        self.workers = workers or int(os.getenv('YTSALT_VIDEO_WORKERS', '0')) or os.cpu_count() or 1
+        self.worker_setup = worker_setup
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Last good metadata per URL, served (flagged degraded) when a deadline passes
+        self._info_cache = LRUCache(maxsize=int(os.getenv('YTSALT_VIDEO_CACHE_SIZE', '1024')))
+
+    def warm_up(self):
+        """Import yt-dlp ahead of the first request (it is deferred for fast startup)"""
+        import yt_dlp  # noqa: F401
+        if self.execution == 'process':
+            pool = self._get_pool()
+            # Force every worker to start and build its extractor now
+            list(pool.map(_worker_ping, [self.workers] * self.workers))
+
+    def shutdown(self):
+        """Stop the worker processes, if any"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # spawn: the parent runs threads (log writer, servers) that fork would copy mid-state
+                    context = multiprocessing.get_context('spawn')
+                    ready = (context.Condition(), context.Value('i', 0, lock=False))
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=context,
+                        initializer=_init_worker,
+                        initargs=(self.ydl_opts, self.worker_setup, ready)
+                    )
+        return self._pool
+
+    def _extract(self, url):
+        """Runs yt-dlp for one URL (or replays its cassette) and returns the slim info dict"""
+        deadline.check('ytdlp_extract')
+        breaker = circuit_breaker.get_breaker(circuit_breaker.YOUTUBE, _is_youtube_failure)
+
+        def extract():
+            if self.execution == 'process':
+                return breaker.call(lambda: deadline.wait(
+                    self._get_pool().submit(_worker_extract, url), 'ytdlp_extract'))
+            return breaker.call(deadline.call, self._extract_in_thread, url, what='ytdlp_extract')
+
+        with stage('ytdlp_extract'):
+            return cassette.call('ytdlp', url, extract)
+
+    def _extract_in_thread(self, url):
+        import yt_dlp
+        with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
+            return _slim_info(ydl.extract_info(url, download=False))
+
+    def _build_video_info(self, info):
+        """Shapes a slim info dict into the API response, adding text stats"""
+        # Get base data
+        title = info.get('title') or ''
+        description = info.get('description') or ''
+        tags = info.get('tags') or []
+
+        # Calculate stats
+        title_stats = text_metrics.text_stats(title)
+        description_stats = text_metrics.text_stats(description)
+        tags_stats = text_metrics.tags_stats(tags)
+
+        return {
+            'video_id': info.get('id'),
+            'title': title,
+            'title_stats': title_stats,
+            'description': description,
+            'description_stats': description_stats,
+            'tags': tags,
+            'tags_stats': tags_stats,
+            'thumbnail_url': info.get('thumbnail_url'),
+            'duration': info.get('duration'),
+            'view_count': info.get('view_count'),
+            'like_count': info.get('like_count'),
+            'channel': info.get('channel'),
+            'upload_date': info.get('upload_date')
         }
 
     def get_video_info(self, url):
@@ -36,6 +218,7 @@ class VideoService:
 
         Returns:
             dict: Dictionary containing video metadata including:
+                - video_id: str
                 - title: str
                 - description: str
                 - tags: List[str]
@@ -44,51 +227,107 @@ class VideoService:
                 - like_count: int
                 - channel: str
                 - upload_date: str (YYYYMMDD format)
+                - degraded / fallback: only present when the deadline passed (or
+                  YouTube's circuit breaker is open) and previously fetched
+                  metadata was served instead
+
+        Raises:
+            CircuitOpenError: If YouTube's breaker is open and nothing is cached
         """
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                # Get base data
-                title = info.get('title', '')
-                description = info.get('description', '')
-                tags = info.get('tags', [])
-                
-                # Calculate stats
-                title_stats = {
-                    'length': len(title),
-                    'word_count': len(title.split())
-                }
-                
-                description_stats = {
-                    'length': len(description),
-                    'word_count': len(description.split())
-                }
-                
-                tags_stats = {
-                    'count': len(tags),
-                    'total_length': sum(len(tag) for tag in tags)
-                }
-                
-                # Get thumbnail URL (prefer high quality)
-                thumbnails = info.get('thumbnails', [])
-                thumbnail_url = thumbnails[-1]['url'] if thumbnails else None
-                
-                return {
-                    'title': title,
-                    'title_stats': title_stats,
-                    'description': description,
-                    'description_stats': description_stats,
-                    'tags': tags,
-                    'tags_stats': tags_stats,
-                    'thumbnail_url': thumbnail_url,
-                    'duration': info.get('duration'),
-                    'view_count': info.get('view_count'),
-                    'like_count': info.get('like_count'),
-                    'channel': info.get('channel'),
-                    'upload_date': info.get('upload_date')
-                }
-                
+            video_info = self._build_video_info(self._extract(url))
+            self._info_cache.set(url, video_info)
+            return video_info
+        except (deadline.DeadlineExceeded, circuit_breaker.CircuitOpenError) as e:
+            cached = self._info_cache.get(url)
+            if cached is None:
+                log.warning("video_info_unavailable", url=url, error=str(e))
+                if isinstance(e, circuit_breaker.CircuitOpenError):
+                    raise
+                raise Exception(f"Error fetching video info: {str(e)}")
+            deadline.record_fallback('video_info', 'cached')
+            return dict(cached, degraded=True, fallback='cached')
         except Exception as e:
-            print(f"Error fetching video info: {str(e)}")  # Debug log
-            raise Exception(f"Error fetching video info: {str(e)}")
\ No newline at end of file
+            log.warning("video_info_failed", url=url, error=str(e))
+            raise Exception(f"Error fetching video info: {str(e)}")
+
+    def get_video_info_many(self, urls):
+        """
+        Extracts metadata for many URLs concurrently. Each URL goes through
+        get_video_info, so the breaker, cassette, deadline and metadata cache
+        apply as for a single URL; in 'process' mode the extraction itself runs
+        in the process pool.
+
+        Args:
+            urls (List[str]): YouTube video URLs
+
+        Returns:
+            List[dict]: One entry per URL, in order. Failed URLs yield
+                {'url': url, 'error': str} instead of metadata.
+        """
+        started = time.perf_counter()
+
+        def fetch(url):
+            try:
+                return self.get_video_info(url)
+            except Exception as e:
+                return {'url': url, 'error': str(e)}
+
+        # Each task runs in a copy of the caller's context, so the request deadline applies
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, fetch, url) for url in urls]
+            results = [future.result() for future in futures]
+        log.debug("video_info_batch", count=len(urls), execution=self.execution,
+                  duration_ms=round((time.perf_counter() - started) * 1000, 1))
+        return results
+
+    def list_video_urls(self, url, limit=None):
+        """
+        Lists the videos of a playlist or channel without fetching each one
+
+        Args:
+            url (str): YouTube playlist or channel URL
+            limit (int, optional): Maximum number of videos to return
+
+        Returns:
+            List[str]: Watch URLs in playlist order
+        """
+        opts = dict(self.ydl_opts, extract_flat='in_playlist')
+        if limit:
+            opts['playlistend'] = limit
+
+        def list_entries():
+            import yt_dlp
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info = circuit_breaker.get_breaker(circuit_breaker.YOUTUBE, _is_youtube_failure).call(
+                    ydl.extract_info, url, download=False)
+            # Only the entry ids and URLs are used below
+            return {'entries': _slim_entries(info.get('entries'))}
+
+        try:
+            with stage('ytdlp_extract'):
+                info = cassette.call('ytdlp_list', {'url': url, 'limit': limit}, list_entries)
+        except circuit_breaker.CircuitOpenError:
+            raise
+        except Exception as e:
+            log.warning("playlist_listing_failed", url=url, error=str(e))
+            raise Exception(f"Error listing videos: {str(e)}")
+
+        urls = []
+        pending = list(info.get('entries') or [])
+        while pending:
+            entry = pending.pop(0)
+            if not entry:
+                continue
+            # Channel pages nest one playlist per tab (videos, shorts, ...)
+            if entry.get('entries'):
+                pending[0:0] = entry['entries']
+                continue
+            if entry.get('_type') == 'playlist':
+                continue
+            video_id = entry.get('id')
+            if video_id:
+                urls.append(f"https://www.youtube.com/watch?v={video_id}")
+            elif entry.get('url'):
+                urls.append(entry['url'])
+        return urls[:limit] if limit else urls
\ No newline at end of file
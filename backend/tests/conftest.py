@@ -0,0 +1,6 @@
+"""Test setup: services are imported as `services.x` from the backend directory"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,146 @@
+"""Tests for services/admission.py"""
+
+import threading
+import time
+
+import pytest
+
+from services.admission import BATCH, INTERACTIVE, AdmissionController, AdmissionRejected
+
+
+class Acquirer(threading.Thread):
+    """acquire() on a thread, since a queued request blocks"""
+
+    def __init__(self, controller, client, route='optimize_title', priority=INTERACTIVE):
+        super().__init__(daemon=True)
+        self.controller, self.args = controller, (client, route, priority)
+        self.ticket = self.error = None
+        self.done_at = None
+
+    def run(self):
+        try:
+            self.ticket = self.controller.acquire(*self.args)
+        except AdmissionRejected as error:
+            self.error = error
+        self.done_at = time.perf_counter()
+
+
+def start(controller, *args, **kwargs) -> Acquirer:
+    thread = Acquirer(controller, *args, **kwargs)
+    thread.start()
+    _wait_for(lambda: thread.done_at or any(w.ticket.client == args[0] for w in controller._waiters))
+    return thread
+
+
+def _wait_for(condition, timeout=2.0):
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_client_limit_counts_waiting_requests():
+    controller = AdmissionController(max_active=1, client_limit=2, max_wait=2)
+    holder = controller.acquire('other', 'optimize_title', INTERACTIVE)
+    first, second = start(controller, 'client'), start(controller, 'client')
+    assert len(controller._waiters) == 2
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire('client', 'optimize_title', INTERACTIVE)
+    assert rejected.value.reason == 'client_limit'
+
+    holder.release()
+    _wait_for(lambda: first.ticket or second.ticket)
+    assert controller._client_load('client') == 2
+    for thread in (first, second):
+        _wait_for(lambda: thread.ticket)
+        thread.ticket.release()
+    assert controller._client_load('client') == 0
+
+
+def test_client_limit_holds_while_dispatching():
+    controller = AdmissionController(max_active=4, client_limit=2, max_wait=2)
+    tickets = [controller.acquire('client', 'optimize_title', INTERACTIVE) for _ in range(2)]
+    with pytest.raises(AdmissionRejected):
+        controller.acquire('client', 'optimize_title', INTERACTIVE)
+    assert controller.snapshot()['active'] == 2
+    for ticket in tickets:
+        ticket.release()
+
+
+def test_interactive_is_granted_before_older_batch():
+    controller = AdmissionController(max_active=1, client_limit=0, interactive_reserve=0, max_wait=2)
+    holder = controller.acquire('a', 'optimize_title', INTERACTIVE)
+    batch = start(controller, 'b', 'optimize_all', BATCH)
+    interactive = start(controller, 'c', 'optimize_title', INTERACTIVE)
+
+    holder.release()
+    _wait_for(lambda: interactive.ticket)
+    assert batch.ticket is None
+    interactive.ticket.release()
+    _wait_for(lambda: batch.ticket)
+    batch.ticket.release()
+
+
+def test_interactive_evicts_batch_waiter_when_queue_is_full():
+    controller = AdmissionController(max_active=1, client_limit=0, interactive_reserve=0,
+                                     max_waiting=1, max_wait=2)
+    holder = controller.acquire('a', 'optimize_title', INTERACTIVE)
+    batch = start(controller, 'b', 'optimize_all', BATCH)
+    interactive = start(controller, 'c', 'optimize_title', INTERACTIVE)
+
+    _wait_for(lambda: batch.done_at)
+    assert batch.error.reason == 'queue'
+    holder.release()
+    _wait_for(lambda: interactive.ticket)
+    interactive.ticket.release()
+
+
+def test_batch_queue_full_rejects_batch():
+    controller = AdmissionController(max_active=1, client_limit=0, interactive_reserve=0,
+                                     max_waiting=1, max_wait=2)
+    holder = controller.acquire('a', 'optimize_title', INTERACTIVE)
+    batch = start(controller, 'b', 'optimize_all', BATCH)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire('c', 'optimize_all', BATCH)
+    assert rejected.value.reason == 'queue'
+    holder.release()
+    _wait_for(lambda: batch.ticket)
+    batch.ticket.release()
+
+
+def test_interactive_reserve_is_kept_from_batch():
+    controller = AdmissionController(max_active=4, client_limit=0, interactive_reserve=0.25,
+                                     route_limits={}, max_wait=0.1)
+    assert controller.batch_limit == 3
+    batch = [controller.acquire(f'b{i}', 'optimize_all', BATCH) for i in range(3)]
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire('b3', 'optimize_all', BATCH)
+    assert rejected.value.reason == 'wait'
+
+    interactive = controller.acquire('c', 'optimize_title', INTERACTIVE)
+    assert controller.snapshot()['active'] == 4
+    for ticket in batch + [interactive]:
+        ticket.release()
+
+
+def test_route_limit():
+    controller = AdmissionController(max_active=8, client_limit=0, route_limits={'optimize_batch': 1},
+                                     max_wait=0.1)
+    ticket = controller.acquire('a', 'optimize_batch', BATCH)
+    with pytest.raises(AdmissionRejected):
+        controller.acquire('b', 'optimize_batch', BATCH)
+    controller.acquire('b', 'optimize_all', BATCH).release()
+    ticket.release()
+
+
+def test_limits_are_split_between_workers(monkeypatch):
+    monkeypatch.setenv('YTSALT_WORKERS', '4')
+    monkeypatch.setenv('YTSALT_ADMISSION_MAX_ACTIVE', '32')
+    monkeypatch.setenv('YTSALT_ADMISSION_CLIENT_LIMIT', '6')
+    monkeypatch.setenv('YTSALT_ADMISSION_ROUTE_OPTIMIZE_ALL', '8')
+    controller = AdmissionController.from_env()
+    assert controller.max_active == 8
+    assert controller.client_limit == 2
+    assert controller.route_limits['optimize_all'] == 2
+    assert controller.route_limits['optimize_batch'] == 1
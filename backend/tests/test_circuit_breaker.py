@@ -0,0 +1,136 @@
+"""Tests for services/circuit_breaker.py"""
+
+import types
+
+import pytest
+
+from services import circuit_breaker, deadline
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the breaker module"""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def make_breaker(**kwargs):
+    options = dict(window=10, min_requests=4, failure_rate=0.5, open_seconds=5)
+    options.update(kwargs)
+    return CircuitBreaker('test', **options)
+
+
+def fail():
+    raise RuntimeError('upstream down')
+
+
+def failures(breaker, count):
+    for _ in range(count):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+def test_opens_at_failure_rate_once_min_requests_is_reached(clock):
+    breaker = make_breaker()
+    failures(breaker, 3)
+    assert breaker.snapshot()['state'] == CLOSED
+    breaker.call(lambda: 'ok')
+    failures(breaker, 1)
+    assert breaker.snapshot()['state'] == OPEN
+
+    with pytest.raises(CircuitOpenError) as rejected:
+        breaker.call(lambda: 'never called')
+    assert rejected.value.retry_after == 5
+    assert breaker.snapshot()['rejected'] == 1
+
+
+def test_stays_closed_below_failure_rate(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.call(lambda: 'ok')
+    failures(breaker, 2)
+    assert breaker.snapshot()['state'] == CLOSED
+
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = make_breaker()
+    failures(breaker, 3)
+    clock[0] += 11
+    failures(breaker, 1)
+    snapshot = breaker.snapshot()
+    assert snapshot['state'] == CLOSED
+    assert snapshot['window_requests'] == 1
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = make_breaker()
+    failures(breaker, 4)
+    clock[0] += 5
+    assert breaker.call(lambda: 'probe') == 'probe'
+    snapshot = breaker.snapshot()
+    assert snapshot['state'] == CLOSED
+    assert snapshot['window_requests'] == 0
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = make_breaker()
+    failures(breaker, 4)
+    clock[0] += 5
+    failures(breaker, 1)
+    assert breaker.snapshot()['state'] == OPEN
+    assert breaker.snapshot()['retry_after'] == 5
+
+
+def test_half_open_allows_limited_probes(clock):
+    breaker = make_breaker(half_open_probes=1)
+    failures(breaker, 4)
+    clock[0] += 5
+    breaker.allow()
+    assert breaker.snapshot()['state'] == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.release()
+    breaker.allow()
+
+
+def test_request_errors_count_as_successes(clock):
+    breaker = make_breaker(is_failure=lambda exc: not isinstance(exc, ValueError))
+
+    def bad_request():
+        raise ValueError('private video')
+
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            breaker.call(bad_request)
+    assert breaker.snapshot()['state'] == CLOSED
+    assert breaker.snapshot()['window_failures'] == 0
+
+
+def test_deadline_hits_are_not_counted(clock):
+    breaker = make_breaker(half_open_probes=1)
+
+    def slow():
+        raise deadline.exceeded('llm_wait')
+
+    with pytest.raises(deadline.DeadlineExceeded):
+        breaker.call(slow)
+    assert breaker.snapshot()['window_requests'] == 0
+
+    failures(breaker, 4)
+    clock[0] += 5
+    with pytest.raises(deadline.DeadlineExceeded):
+        breaker.call(slow)
+    # The probe slot was given back
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.snapshot()['state'] == CLOSED
+
+
+def test_from_env_prefers_per_upstream_settings(monkeypatch):
+    monkeypatch.setenv('YTSALT_BREAKER_OPEN_SECONDS', '7')
+    monkeypatch.setenv('YTSALT_BREAKER_TEST_OPEN_SECONDS', '3')
+    monkeypatch.setenv('YTSALT_BREAKER_MIN_REQUESTS', '2')
+    breaker = CircuitBreaker.from_env('test')
+    assert breaker.open_seconds == 3
+    assert breaker.min_requests == 2
@@ -0,0 +1,54 @@
+"""Tests for services/deadline.py"""
+
+import threading
+
+import pytest
+
+from services import deadline, metrics
+from services.deadline import DeadlineExceeded
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Fresh metrics registry so deadline hits can be counted"""
+    fresh = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, 'registry', fresh)
+    return fresh
+
+
+def hits(registry):
+    return sum(value for (name, _), value in registry._counters.items()
+               if name == 'ytsalt_deadline_exceeded_total')
+
+
+def test_timeout_raised_by_the_callee_is_not_a_deadline_hit(registry):
+    def read():
+        raise TimeoutError('socket read timed out')
+
+    with deadline.deadline(5):
+        with pytest.raises(TimeoutError) as caught:
+            deadline.call(read, what='fetch')
+    assert type(caught.value) is TimeoutError
+    assert str(caught.value) == 'socket read timed out'
+    assert hits(registry) == 0
+
+
+def test_nested_deadline_hit_is_counted_once(registry):
+    def inner():
+        raise deadline.exceeded('inner')
+
+    with deadline.deadline(5):
+        with pytest.raises(DeadlineExceeded):
+            deadline.call(inner, what='outer')
+    assert hits(registry) == 1
+
+
+def test_wait_that_runs_out_raises_deadline_exceeded(registry):
+    release = threading.Event()
+    try:
+        with deadline.deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                deadline.call(release.wait, 5, what='fetch')
+    finally:
+        release.set()
+    assert hits(registry) == 1
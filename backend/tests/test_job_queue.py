@@ -0,0 +1,185 @@
+"""Tests for services/job_queue.py"""
+
+import os
+import socket
+import sqlite3
+import time
+
+import pytest
+
+from services import job_queue
+from services.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+
+def wait_for_status(queue, job_id, statuses, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        job = queue.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job still {queue.get(job_id)['status']}")
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(handlers, **kwargs):
+        options = dict(path=str(tmp_path / 'jobs.sqlite3'), workers=1, retry_delay=0.01, poll=0.02)
+        options.update(kwargs)
+        queue = JobQueue(handlers, **options)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def test_raising_handler_is_retried_then_succeeds(make_queue):
+    calls = []
+
+    def flaky(payload, progress):
+        calls.append(payload)
+        if len(calls) < 3:
+            raise RuntimeError('upstream down')
+        return {'success': True, 'value': payload['n']}
+
+    queue = make_queue({'flaky': flaky}, max_attempts=3).start()
+    job = wait_for_status(queue, queue.submit('flaky', {'n': 1})['id'], (SUCCEEDED, FAILED))
+    assert job['status'] == SUCCEEDED
+    assert job['attempts'] == 3
+    assert job['result'] == {'success': True, 'value': 1}
+
+
+def test_attempts_run_out(make_queue):
+    def broken(payload, progress):
+        raise RuntimeError('always')
+
+    queue = make_queue({'broken': broken}, max_attempts=2).start()
+    job = wait_for_status(queue, queue.submit('broken', {})['id'], (SUCCEEDED, FAILED))
+    assert job['status'] == FAILED
+    assert job['attempts'] == 2
+    assert job['error'] == 'always'
+
+
+def test_error_result_fails_without_retry(make_queue):
+    queue = make_queue({'bad': lambda payload, progress: {'success': False, 'error': 'bad input'}}).start()
+    job = wait_for_status(queue, queue.submit('bad', {})['id'], (SUCCEEDED, FAILED))
+    assert job['status'] == FAILED
+    assert job['attempts'] == 1
+
+
+def test_degraded_result_is_retried_and_kept_on_last_attempt(make_queue):
+    queue = make_queue({'degraded': lambda payload, progress: {'success': True, 'degraded': True}},
+                       max_attempts=2).start()
+    job = wait_for_status(queue, queue.submit('degraded', {})['id'], (SUCCEEDED, FAILED))
+    assert job['status'] == SUCCEEDED
+    assert job['attempts'] == 2
+    assert job['result']['degraded'] is True
+
+
+def test_worker_survives_a_failure_to_store_the_outcome(make_queue, monkeypatch):
+    queue = make_queue({'ok': lambda payload, progress: {'success': True}})
+    finish = queue._finish
+    failures = []
+
+    def locked_once(*args, **kwargs):
+        if not failures:
+            failures.append(args)
+            raise sqlite3.OperationalError('database is locked')
+        return finish(*args, **kwargs)
+
+    monkeypatch.setattr(queue, '_finish', locked_once)
+    queue.start()
+    first = queue.submit('ok', {})['id']
+    second = queue.submit('ok', {})['id']
+    assert wait_for_status(queue, second, (SUCCEEDED,))['status'] == SUCCEEDED
+    assert failures
+    assert queue.get(first)['status'] == RUNNING
+    assert all(thread.is_alive() for thread in queue._threads)
+
+
+def test_result_that_is_not_json_is_stored(make_queue):
+    queue = make_queue({'odd': lambda payload, progress: {'success': True, 'when': object()}}).start()
+    job = wait_for_status(queue, queue.submit('odd', {})['id'], (SUCCEEDED, FAILED))
+    assert job['status'] == SUCCEEDED
+    assert isinstance(job['result']['when'], str)
+
+
+def _hold(path, job_id, worker):
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("UPDATE jobs SET status = ?, worker = ?, lease_until = ? WHERE id = ?",
+                           (RUNNING, worker, time.time() + 600, job_id))
+    connection.close()
+
+
+def test_recover_jobs_of_previous_process_with_same_pid(make_queue, tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    old = make_queue({'t': lambda payload, progress: {'success': True}}, workers=0)
+    job_id = old.submit('t', {})['id']
+    # A container restart: the new process has the same host and PID, but another nonce
+    _hold(path, job_id, old.worker_id)
+    assert old.get(job_id)['status'] == RUNNING
+
+    new = make_queue({'t': lambda payload, progress: {'success': True}}, workers=0)
+    assert new.nonce != old.nonce
+    assert new.get(job_id)['status'] == QUEUED
+
+
+def test_recover_jobs_of_exited_process(make_queue, tmp_path, monkeypatch):
+    path = str(tmp_path / 'jobs.sqlite3')
+    queue = make_queue({'t': lambda payload, progress: {'success': True}}, workers=0)
+    gone, alive, remote = (queue.submit('t', {})['id'] for _ in range(3))
+    host = socket.gethostname()
+    _hold(path, gone, f'{host}:999999:abc')
+    _hold(path, alive, f'{host}:{os.getppid()}:abc')
+    _hold(path, remote, 'other-host:999999:abc')
+    monkeypatch.setattr(job_queue, '_pid_alive', lambda pid: pid != 999999)
+
+    queue._recover()
+    assert queue.get(gone)['status'] == QUEUED
+    assert queue.get(alive)['status'] == RUNNING
+    assert queue.get(remote)['status'] == RUNNING
+
+
+def test_expired_lease_is_claimed_again(make_queue, tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    queue = make_queue({'t': lambda payload, progress: {'success': True}}, workers=0)
+    job_id = queue.submit('t', {})['id']
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("UPDATE jobs SET status = ?, worker = 'other-host:1:x', lease_until = ? WHERE id = ?",
+                           (RUNNING, time.time() - 1, job_id))
+    connection.close()
+    queue.workers = 1
+    queue.start()
+    assert wait_for_status(queue, job_id, (SUCCEEDED,))['status'] == SUCCEEDED
+
+
+def test_optimize_url_passes_transcript_segments(monkeypatch):
+    from services import registry
+
+    segments = [{'start': 0.0, 'duration': 5.0, 'text': 'intro'}]
+    seen = {}
+
+    class Video:
+        def get_video_info(self, url):
+            return {'title': 'title'}
+
+    class Transcript:
+        def get_transcript(self, url):
+            return {'transcript': 'intro', 'segments': segments}
+
+    class AI:
+        def optimize_all(self, video_data, tasks, on_result=None):
+            seen.update(video_data['transcript_data'])
+            return {'success': True}
+
+    monkeypatch.setattr(registry, 'get_video_service', Video)
+    monkeypatch.setattr(registry, 'get_transcript_service', Transcript)
+    monkeypatch.setattr(registry, 'get_ai_service', AI)
+    job_queue.default_handlers()['optimize_url']({'url': 'https://youtu.be/x'}, lambda stage: None)
+    assert seen == {'full_text': 'intro', 'segments': segments}
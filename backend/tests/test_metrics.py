@@ -0,0 +1,9 @@
+"""Tests for services/metrics.py"""
+
+from services.metrics import MetricsRegistry
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.increment('ytsalt_test_total', error='say "hi"\nC:\\path')
+    assert 'ytsalt_test_total{error="say \\"hi\\"\\nC:\\\\path"} 1' in registry.render()
@@ -0,0 +1,28 @@
+"""Tests for services/model_router.py"""
+
+import pytest
+
+from services import metrics, model_router
+from services.model_router import ModelRouter
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, 'registry', fresh)
+    return fresh
+
+
+def test_tiers_sharing_a_model_are_priced_by_the_routed_tier(monkeypatch, registry):
+    monkeypatch.setenv('YTSALT_TIER_VISION_INPUT_COST', '10')
+    monkeypatch.setenv('YTSALT_TIER_VISION_OUTPUT_COST', '20')
+    router = ModelRouter.from_env()
+    messages = [{'role': 'user', 'content': 'hello'}]
+    fast, vision = router.params('tags', messages), router.params('thumbnail', messages)
+    assert fast['model'] == vision['model'] == model_router.DEFAULT_TIERS['fast'][0]
+    assert (fast['tier'], vision['tier']) == ('fast', 'vision')
+
+    tokens = {'prompt': 1_000_000, 'completion': 1_000_000, 'cached': 0}
+    assert router.record_cost('tags', fast['tier'], tokens) == pytest.approx(0.75)
+    assert router.record_cost('thumbnail', vision['tier'], tokens) == pytest.approx(30.0)
+    assert 'tier="vision"' in registry.render()
@@ -0,0 +1,47 @@
+"""Tests for services/tag_completer.py"""
+
+from services.tag_completer import TagCompleter, transcript_ngrams
+
+
+def test_completions_are_ranked_by_weight():
+    completer = TagCompleter(top_k=3)
+    completer.add_tags(['python', 'pytest', 'pandas'])
+    completer.add('pytest', 'accepted')
+    completer.add('python', 'transcript', 4)
+    assert [c['tag'] for c in completer.complete('p')] == ['pytest', 'python', 'pandas']
+    assert [c['tag'] for c in completer.complete('py', limit=1)] == ['pytest']
+    assert completer.complete('x') == []
+
+
+def test_top_k_stays_exact_as_weights_grow():
+    completer = TagCompleter(top_k=2)
+    for term in ('aa', 'ab', 'ac'):
+        completer.add(term)
+    completer.add('ac', count=5)
+    assert [c['tag'] for c in completer.complete('a')][0] == 'ac'
+
+
+def test_prefix_is_normalized():
+    completer = TagCompleter()
+    completer.add('Python  Tips')
+    assert completer.complete('PYTHON')[0]['tag'] == 'Python Tips'
+    assert completer.complete('python ')[0]['tag'] == 'Python Tips'
+    assert completer.complete('pythont') == []
+
+
+def test_video_and_transcript_are_counted_once():
+    completer = TagCompleter()
+    completer.add_video({'video_id': 'a', 'tags': ['python']})
+    completer.add_video({'video_id': 'a', 'tags': ['python']})
+    assert completer.complete('py')[0]['weight'] == 3.0
+    text = 'unit testing matters. unit testing again.'
+    completer.add_transcript(text, video_id='a')
+    completer.add_transcript(text, video_id='a')
+    assert completer.complete('unit testing')[0]['weight'] == transcript_ngrams(text)['unit testing']
+
+
+def test_transcript_ngrams_skip_stopwords_and_rare_phrases():
+    counts = transcript_ngrams('the flask app and the flask app. flask app once.')
+    assert counts['flask app'] == 3
+    assert 'the flask' not in counts
+    assert 'once' not in counts
@@ -0,0 +1,145 @@
+"""Tests for services/tag_index.py"""
+
+import json
+import os
+import threading
+
+from services.tag_completer import TagCompleter
+from services.tag_index import TagIndex
+
+
+def video(video_id, tags, channel='chan', views=100):
+    return {'video_id': video_id, 'tags': tags, 'channel': channel, 'view_count': views}
+
+
+def test_queries():
+    index = TagIndex(path='')
+    index.add_video(video('a', ['Python', 'flask'], channel='one', views=1000))
+    index.add_video(video('b', ['python', 'django'], channel='two'))
+    assert index.top_tags(limit=1) == [{'tag': 'Python', 'videos': 2, 'value': 7.0}]
+    assert {t['tag'] for t in index.co_occurring('python')} == {'flask', 'django'}
+    assert [t['tag'] for t in index.unused_high_value(channel='two', reference_channels=['one'])] == ['flask']
+    assert index.tag_stats(['PYTHON', 'nope'])['nope'] == {'videos': 0, 'value': 0.0}
+
+
+def test_replacing_a_video_moves_its_counts():
+    index = TagIndex(path='')
+    index.add_video(video('a', ['one', 'two']))
+    index.add_video(video('a', ['two', 'three']))
+    assert dict(index.tag_counts()) == {'two': 1, 'three': 1}
+    assert index.summary()['videos'] == 1
+
+
+def test_workers_saving_the_same_file_keep_each_others_videos(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    first, second = TagIndex(path), TagIndex(path)
+    first.add_video(video('a', ['alpha']))
+    second.add_video(video('b', ['beta']))
+    first.save()
+    second.save()
+
+    assert TagIndex(path).summary()['videos'] == 2
+    first.sync()
+    assert dict(first.tag_counts()) == {'alpha': 1, 'beta': 1}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_unsaved_local_change_wins_over_the_file(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    first, second = TagIndex(path), TagIndex(path)
+    first.add_video(video('a', ['old']))
+    first.save()
+    second.sync()
+    second.add_video(video('a', ['new']))
+    second.save()
+    first.sync()
+    assert dict(first.tag_counts()) == {'new': 1}
+
+
+def test_concurrent_saves(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    indexes = [TagIndex(path) for _ in range(4)]
+
+    def work(number, index):
+        for i in range(25):
+            index.add_video(video(f'{number}-{i}', [f'tag{number}', 'shared']))
+            index.save()
+
+    threads = [threading.Thread(target=work, args=item) for item in enumerate(indexes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path, encoding='utf-8') as f:
+        assert len(json.load(f)['videos']) == 100
+
+
+def test_term_counts_add_up_across_workers(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    first, second = TagIndex(path), TagIndex(path)
+    assert first.add_terms('accepted', {'python tips': 1})
+    assert second.add_terms('accepted', {'python tips': 2})
+    assert second.add_terms('transcript', {'list comprehension': 3}, key='transcript:a')
+    first.save()
+    second.save()
+    first.sync()
+    assert first._terms['accepted']['python tips'] == 3
+    # The transcript of video a was counted by the other worker
+    assert first.has_terms('transcript:a')
+    assert not first.add_terms('transcript', {'list comprehension': 3}, key='transcript:a')
+    assert TagIndex(path)._terms['transcript']['list comprehension'] == 3
+
+
+def test_completers_of_two_workers_converge(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    first, second = TagIndex(path), TagIndex(path)
+    completers = [TagCompleter(), TagCompleter()]
+    first.subscribe(completers[0].add_counts)
+    second.subscribe(completers[1].add_counts)
+
+    first.add_video(video('a', ['python tips']))
+    second.add_terms('accepted', {'python tricks': 1})
+    first.save()
+    second.save()
+    first.sync()
+    assert completers[0].complete('pyth') == completers[1].complete('pyth')
+    assert [c['tag'] for c in completers[0].complete('pyth')] == ['python tricks', 'python tips']
+
+
+def test_subscribe_replays_current_totals():
+    index = TagIndex(path='')
+    index.add_video(video('a', ['python']))
+    index.add_video(video('a', ['python']))
+    index.add_terms('accepted', {'python': 1})
+    completer = TagCompleter()
+    index.subscribe(completer.add_counts)
+    assert completer.complete('py') == [{'tag': 'python', 'weight': 8.0, 'sources': ['accepted', 'channel']}]
+
+
+def test_sync_thread_saves(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    index = TagIndex(path).start_sync(interval=0.01)
+    index.add_video(video('a', ['alpha']))
+    index._stop.wait(0.2)
+    index.close()
+    assert TagIndex(path).summary()['videos'] == 1
+
+
+def test_view_count_change_reweights_in_place():
+    index = TagIndex(path='')
+    index.add_video(video('a', ['one'], views=9))
+    assert index.add_video(video('a', ['one'], views=999))
+    assert index.top_tags() == [{'tag': 'one', 'videos': 1, 'value': 4.0}]
+    assert len(index._doc_keys) == 1
+
+
+def test_replaced_videos_are_compacted_in_memory():
+    index = TagIndex(path='')
+    for round_ in range(6):
+        for n in range(50):
+            index.add_video(video(f'v{n}', ['shared', f'tag{n}-{round_ % 2}']))
+    assert len(index._doc_keys) <= 2 * len(index)
+    assert len(index._postings[index._tag_ids['shared']]) <= 2 * len(index)
+    assert dict(index.tag_counts())['shared'] == 50
+    co = index.co_occurring('shared', limit=100)
+    assert len(co) == 50 and all(entry['videos'] == 1 for entry in co)
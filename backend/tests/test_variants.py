@@ -0,0 +1,88 @@
+"""Tests for services/variants.py and the variant pool in AIService"""
+
+import pytest
+
+from services import variants
+from services.ai_service import AIService
+
+VIDEO = {'title': 'Python list comprehension tutorial', 'description': 'Learn list comprehension in Python.',
+         'tags': ['python', 'list comprehension']}
+
+
+def title(text, length_ok=True, recommended=True):
+    return {'title': text, 'metrics': {'character_limit_ok': length_ok, 'recommended': recommended}}
+
+
+def test_rank_dedupes_and_counts_votes():
+    ranked = variants.rank('title', [title('Python List Comprehension!'), title('python list comprehension'),
+                                     title('Cooking pasta')], VIDEO, choices=2)
+    assert [s['title'] for s in ranked] == ['Python List Comprehension!', 'Cooking pasta']
+    assert ranked[0]['votes'] == 2
+    assert ranked[0]['score'] > ranked[1]['score']
+
+
+def test_rank_puts_over_limit_text_last():
+    ranked = variants.rank('title', [title('Python list comprehension', length_ok=False),
+                                     title('Python list comprehension tips')], VIDEO)
+    assert ranked[0]['title'] == 'Python list comprehension tips'
+
+
+def test_rank_keeps_model_order_on_ties():
+    ranked = variants.rank('tags', [{'tag': 'alpha'}, {'tag': 'beta'}], {})
+    assert [s['tag'] for s in ranked] == ['alpha', 'beta']
+
+
+@pytest.mark.parametrize('request_fields, expected', [
+    ({}, ['a', 'b', 'c', 'd', 'e']),
+    ({'page': 1, 'page_size': 2}, ['a', 'b']),
+    ({'page': 3, 'page_size': 2}, ['e']),
+    ({'page': 4, 'page_size': 2}, []),
+])
+def test_page(request_fields, expected):
+    result = {'success': True, 'suggestions': [{'title': t} for t in 'abcde']}
+    page = variants.page('title', result, request_fields)
+    assert [s['title'] for s in page['suggestions']] == expected
+    assert page['pool_size'] == 5
+    assert page['has_more'] == (request_fields.get('page', 1) * request_fields.get('page_size', 5) < 5)
+
+
+def test_page_leaves_failures_alone():
+    failure = {'success': False, 'error': 'x'}
+    assert variants.page('title', failure, {'page': 2}) is failure
+
+
+def test_requested_is_capped(monkeypatch):
+    monkeypatch.setenv('YTSALT_MAX_VARIANTS', '3')
+    assert variants.requested({'variants': 10}) == 3
+    assert variants.requested({'variants': 'x'}) == 1
+
+
+def test_covers():
+    pool = {'variants': 3}
+    assert variants.covers(pool, {'page': 2})
+    assert variants.covers(pool, {'variants': 2})
+    assert not variants.covers(pool, {'variants': 4})
+
+
+def test_pages_are_served_from_the_stored_pool():
+    service = AIService()
+    calls = []
+
+    def compute(choices):
+        def run():
+            calls.append(choices)
+            return {'success': True, 'variants': choices, 'suggestions': [{'title': str(i)} for i in range(9)]}
+        return run
+
+    first = service._with_stored_result('title', dict(VIDEO, variants=3), compute(3))
+    assert not first['reused']
+    # A page request without 'variants' reads the same pool
+    again = service._with_stored_result('title', dict(VIDEO, page=2, page_size=3), compute(1))
+    assert again['reused'] and again['fingerprint'] == first['fingerprint']
+    assert service._with_stored_result('title', dict(VIDEO, variants=2), compute(2))['reused']
+    assert calls == [3]
+
+    # A larger pool, or force_refresh, samples again
+    assert not service._with_stored_result('title', dict(VIDEO, variants=5), compute(5))['reused']
+    assert not service._with_stored_result('title', dict(VIDEO, force_refresh=True), compute(1))['reused']
+    assert calls == [3, 5, 1]
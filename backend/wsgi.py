@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+ytSALT WSGI Entry Point
+Production entry point for the Flask application. Serve it with gunicorn using
+the bundled configuration, which is tuned for long, I/O-bound requests:
+
+    cd backend
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Worker model, counts, timeouts and bind address are configured through the
+YTSALT_* environment variables documented in gunicorn.conf.py. Services are
+warmed up on a background thread in each worker as soon as it boots
+(set YTSALT_WARM_UP=0 to disable).
+
+Version: 1.0.0
+License: MIT
+"""
+
+import os
+
+from app import create_app
+
+app = create_app(warm_up=os.getenv('YTSALT_WARM_UP', '1') == '1')
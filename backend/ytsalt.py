@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+ytSALT Command-Line Batch Optimizer
+Runs optimization tasks over many videos without going through the HTTP API.
+The services (VideoService, TranscriptService, AIService) are called directly.
+
+Videos come from a file of URLs (one per line, '#' comments allowed), a playlist
+or a channel. Each video's results are appended to a JSONL file as soon as the
+video finishes. The output file doubles as the checkpoint: re-running with the
+same --output skips every video already recorded with status "ok", so a crashed
+run resumes where it stopped. Videos whose results were degraded by --deadline
+(cached or heuristic fallbacks) are recorded with status "degraded" and run again
+on resume.
+
+Usage (from the backend directory):
+    python ytsalt.py --urls new_uploads.txt --output results.jsonl
+    python ytsalt.py --playlist "https://www.youtube.com/playlist?list=..." --tasks title,tags
+    python ytsalt.py --channel https://www.youtube.com/@name --parallel 8 --limit 500
+
+Tasks:
+    info, transcript, title, description, tags, thumbnail, key-moments
+
+Version: 1.0.0
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from services import deadline, registry
+from services.logger import get_logger
+
+log = get_logger('cli')
+
+TASKS = ('info', 'transcript', 'title', 'description', 'tags', 'thumbnail', 'key-moments')
+DEFAULT_TASKS = ('title', 'description', 'tags', 'thumbnail', 'key-moments')
+TRANSCRIPT_TASKS = ('transcript', 'tags', 'key-moments')
+
+
+def read_url_file(path):
+    """Reads URLs from a file, skipping blank lines and '#' comments"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def channel_videos_url(url):
+    """Points a channel URL at its uploads tab"""
+    url = url.rstrip('/')
+    return url if url.endswith('/videos') else f"{url}/videos"
+
+
+def load_checkpoint(path):
+    """
+    Reads an existing JSONL output and returns the URLs that already succeeded.
+    A partially written last line (from a crash) is ignored.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('status') == 'ok':
+                done.add(record.get('url'))
+    return done
+
+
+class JsonlWriter:
+    """Appends one JSON record per line, flushed immediately, from many threads"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        # Make sure we never append onto a truncated line left by a crash
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def process_video(url, tasks, deadline_seconds=None):
+    """
+    Runs the requested tasks for one video
+
+    Args:
+        url (str): YouTube video URL
+        tasks (tuple): Task names to run
+        deadline_seconds (float, optional): Budget for the whole video; tasks still
+            running when it passes return degraded (fallback) results
+
+    Returns:
+        dict: JSONL record with per-task results and errors
+    """
+    with deadline.deadline(deadline_seconds):
+        return _process_video(url, tasks)
+
+
+def _process_video(url, tasks):
+    started = time.time()
+    results, errors = {}, {}
+    transcript_service = registry.get_transcript_service()
+    ai_service = registry.get_ai_service()
+
+    try:
+        info = registry.get_video_service().get_video_info(url)
+    except Exception as e:
+        return _record(url, started, results, {'info': str(e)})
+    registry.get_tag_index().add_video(info)
+    if 'info' in tasks:
+        results['info'] = info
+
+    video_data = {
+        'title': info.get('title', ''),
+        'description': info.get('description', ''),
+        'tags': info.get('tags') or [],
+        'thumbnail_url': info.get('thumbnail_url'),
+    }
+
+    if any(task in tasks for task in TRANSCRIPT_TASKS):
+        try:
+            transcript = transcript_service.get_transcript(url)
+            video_data['transcript_data'] = {'full_text': transcript.get('transcript', ''),
+                                             'segments': transcript.get('segments') or []}
+            if 'transcript' in tasks:
+                results['transcript'] = transcript
+        except Exception as e:
+            errors['transcript'] = str(e)
+
+    runners = {
+        'title': ai_service.optimize_title,
+        'description': ai_service.optimize_description,
+        'tags': ai_service.optimize_tags,
+        'thumbnail': ai_service.optimize_thumbnail,
+        'key-moments': ai_service.generate_key_moments,
+    }
+    for task, runner in runners.items():
+        if task not in tasks:
+            continue
+        if task == 'key-moments' and not video_data.get('transcript_data'):
+            errors[task] = errors.get('transcript', 'No transcript available')
+            continue
+        try:
+            result = runner(video_data)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        if result.get('success') is False:
+            errors[task] = result.get('error', 'unknown error')
+        else:
+            results[task] = result
+
+    return _record(url, started, results, errors)
+
+
+def _record(url, started, results, errors):
+    degraded = sorted(task for task, result in results.items()
+                      if isinstance(result, dict) and result.get('degraded'))
+    return {
+        'url': url,
+        'video_id': registry.get_transcript_service().extract_video_id(url),
+        'status': 'error' if errors else 'degraded' if degraded else 'ok',
+        'results': results,
+        'errors': errors,
+        'degraded': degraded,
+        'duration_s': round(time.time() - started, 2),
+        'completed_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def run(urls, tasks, output, parallel, deadline_seconds=None):
+    """
+    Processes urls with a bounded worker pool, streaming records to output
+
+    Returns:
+        tuple: (succeeded, failed) counts
+    """
+    writer = JsonlWriter(output)
+    succeeded = failed = 0
+    pending = set()
+    try:
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix='ytsalt') as pool:
+            # Keep at most 2x parallel videos queued so huge inputs stay cheap in memory
+            for url in urls:
+                pending.add(pool.submit(process_video, url, tasks, deadline_seconds))
+                if len(pending) >= parallel * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        ok = _write_result(writer, future)
+                        succeeded, failed = succeeded + ok, failed + (not ok)
+            for future in wait(pending).done:
+                ok = _write_result(writer, future)
+                succeeded, failed = succeeded + ok, failed + (not ok)
+    finally:
+        writer.close()
+        registry.get_tag_index().save_if_dirty()
+    return succeeded, failed
+
+
+def _write_result(writer, future):
+    record = future.result()
+    writer.write(record)
+    log.info("video_done", url=record['url'], status=record['status'],
+             errors=sorted(record['errors']), degraded=record['degraded'], duration_s=record['duration_s'])
+    return record['status'] != 'error'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='ytsalt', description='Batch-optimize YouTube videos to JSONL')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--urls', help='File with one video URL per line')
+    source.add_argument('--playlist', help='Playlist URL')
+    source.add_argument('--channel', help='Channel URL (its uploads are processed)')
+    parser.add_argument('--tasks', default=','.join(DEFAULT_TASKS),
+                        help=f"Comma-separated tasks: {', '.join(TASKS)}")
+    parser.add_argument('--output', '-o', default='ytsalt_results.jsonl', help='JSONL output / checkpoint file')
+    parser.add_argument('--parallel', '-p', type=int, default=4, help='Videos processed concurrently')
+    parser.add_argument('--limit', type=int, help='Only process the first N videos')
+    parser.add_argument('--deadline', type=float,
+                        help='Seconds allowed per video; slower tasks fall back to cached or local results')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='Process every video even if already recorded as ok in --output')
+    args = parser.parse_args(argv)
+
+    tasks = tuple(task.strip() for task in args.tasks.split(',') if task.strip())
+    unknown = [task for task in tasks if task not in TASKS]
+    if unknown:
+        parser.error(f"unknown task(s): {', '.join(unknown)}")
+    args.tasks = tasks
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.urls:
+        urls = read_url_file(args.urls)
+    else:
+        source = args.playlist or channel_videos_url(args.channel)
+        urls = registry.get_video_service().list_video_urls(source, limit=args.limit)
+    urls = list(dict.fromkeys(urls))
+    if args.limit:
+        urls = urls[:args.limit]
+
+    if not args.no_resume:
+        done = load_checkpoint(args.output)
+        if done:
+            log.info("resuming", already_done=len(done), output=args.output)
+        urls = [url for url in urls if url not in done]
+
+    log.info("batch_start", videos=len(urls), tasks=list(args.tasks), parallel=args.parallel)
+    succeeded, failed = run(urls, args.tasks, args.output, max(1, args.parallel), args.deadline)
+    log.info("batch_done", succeeded=succeeded, failed=failed, output=args.output)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())